@@ -0,0 +1,135 @@
+"""
+Async variants of the read-heavy accounts endpoints, for deployments
+served through fs_api.asgi. They return the same payloads as the DRF
+viewsets but run on the event loop instead of holding a worker thread for
+the whole request.
+
+Django's async ORM still executes SQL on its sync thread, so the gain is
+on everything around the queries: cache reads, waiting on slow clients,
+and not tying up a thread per open request. Cached users (with their
+typed profiles) come from the in-process LRU without leaving the loop.
+"""
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache import user_cache
+from .models import User, UserRelationship
+from .pagination import RelationshipCursorPagination
+from .serializers import UserDetailSerializer, UserSerializer
+from .views import (
+    FootballerProfileViewSet, IsAdminOrSelf, ManagerProfileViewSet, OrganisationProfileViewSet,
+    RegularProfileViewSet,
+)
+
+PROFILE_VIEWSETS = {
+    'regular': RegularProfileViewSet,
+    'footballer': FootballerProfileViewSet,
+    'manager': ManagerProfileViewSet,
+    'organisation': OrganisationProfileViewSet,
+}
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+def error(exc):
+    return json_response({'detail': exc.detail}, exc.status_code)
+
+
+async def authenticate(request):
+    """Run the configured DRF authenticators; return (DRF request, user)."""
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    user = await sync_to_async(lambda: drf_request.user)()
+    if not user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    return drf_request, user
+
+
+async def authorize(request, pk, action):
+    """
+    Authenticate and apply the sync viewset's IsAdminOrSelf check for
+    `action` on user `pk`, before anything about that user is looked up.
+    """
+    drf_request, user = await authenticate(request)
+    if not IsAdminOrSelf().has_permission(drf_request, SimpleNamespace(action=action, kwargs={'pk': pk})):
+        raise exceptions.PermissionDenied()
+    return drf_request, user
+
+
+async def get_user(pk):
+    try:
+        return await user_cache.aget(pk=pk)
+    except User.DoesNotExist:
+        raise exceptions.NotFound()
+
+
+async def user_detail(request, pk):
+    """GET /users/async/<pk>/: staff, or the user themselves."""
+    try:
+        await authorize(request, pk, 'retrieve')
+        user = await get_user(pk)
+    except exceptions.APIException as exc:
+        return error(exc)
+    return json_response(UserDetailSerializer(user).data)
+
+
+async def relationships_page(request, pk, direction):
+    try:
+        drf_request, _ = await authorize(request, pk, direction)
+        user = await get_user(pk)
+    except exceptions.APIException as exc:
+        return error(exc)
+
+    related_field = 'follower' if direction == 'followers' else 'following'
+    relationships = (
+        UserRelationship.objects
+        .filter(**{'following' if direction == 'followers' else 'follower': user})
+        .select_related(related_field)
+    )
+    paginator = RelationshipCursorPagination()
+    try:
+        # Reuses the cursor logic of the sync endpoints so links are interchangeable.
+        page = await sync_to_async(paginator.paginate_queryset)(relationships, drf_request)
+    except exceptions.APIException as exc:
+        return error(exc)
+    users = [getattr(relationship, related_field) for relationship in page]
+    return json_response({
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': UserSerializer(users, many=True).data,
+    })
+
+
+async def followers(request, pk):
+    """GET /users/async/<pk>/followers/: staff only."""
+    return await relationships_page(request, pk, 'followers')
+
+
+async def following(request, pk):
+    """GET /users/async/<pk>/following/: staff only."""
+    return await relationships_page(request, pk, 'following')
+
+
+async def profile_detail(request, profile_type, pk):
+    """GET /users/async/<type>-profiles/<pk>/: the current user's own profile."""
+    viewset = PROFILE_VIEWSETS.get(profile_type)
+    try:
+        if viewset is None:
+            raise exceptions.NotFound()
+        _, current = await authenticate(request)
+        # Authenticated users already come from the object cache with
+        # their profiles joined; re-read in case the authenticator didn't.
+        user = await get_user(current.pk)
+        profile = getattr(user, viewset.queryset.model._meta.model_name, None)
+        if profile is None or str(profile.pk) != pk:
+            raise exceptions.NotFound()
+    except exceptions.APIException as exc:
+        return error(exc)
+    return json_response(viewset.serializer_class(profile).data)
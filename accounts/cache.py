@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.cache import (
+    ObjectCache, LocalLRU, OBJECT_CACHE_ALIAS, OBJECT_CACHE_TIMEOUT,
+    OBJECT_CACHE_LOCAL_TIMEOUT, OBJECT_CACHE_LOCAL_SIZE,
+)
+
+# Users following (or followed by) more accounts than this are answered
+# from the database per request instead of caching the whole id set.
+RELATIONSHIP_SET_MAX_SIZE = getattr(settings, 'RELATIONSHIP_SET_MAX_SIZE', 5000)
+
+
+def user_detail_queryset():
+    from .models import User
+    from .serializers import UserDetailSerializer
+    return UserDetailSerializer.setup_eager_loading(User.objects.all())
+
+
+# Users are cached together with their typed profiles and statuses, so
+# profile saves and follower counter updates must invalidate them too.
+user_cache = ObjectCache('accounts.User', lookups=['username'], queryset=user_detail_queryset)
+
+
+class RelationshipSetCache:
+    """
+    Per-user sets of followed ids ('following') and follower ids
+    ('followers'), read through a local LRU and the shared cache like
+    ObjectCache. Follow/unfollow receivers and the bulk paths invalidate the
+    sets of both users on the edge.
+    """
+    DIRECTIONS = ('following', 'followers')
+
+    def __init__(self, timeout=OBJECT_CACHE_TIMEOUT, max_size=RELATIONSHIP_SET_MAX_SIZE):
+        self.timeout = timeout
+        self.max_size = max_size
+        self.local = LocalLRU(OBJECT_CACHE_LOCAL_SIZE, OBJECT_CACHE_LOCAL_TIMEOUT)
+
+    @property
+    def shared(self):
+        return caches[OBJECT_CACHE_ALIAS]
+
+    def key(self, direction, pk):
+        return f'relset:{direction}:{pk}'
+
+    def get_many(self, pk):
+        """Return {direction: frozenset of ids, or None when not cached}."""
+        keys = {direction: self.key(direction, pk) for direction in self.DIRECTIONS}
+        found = {direction: self.local.get(key) for direction, key in keys.items()}
+        missing = [keys[direction] for direction, ids in found.items() if ids is None]
+        if missing:
+            shared = self.shared.get_many(missing)
+            for direction, key in keys.items():
+                if key in shared:
+                    found[direction] = shared[key]
+                    self.local.set(key, shared[key])
+        return found
+
+    def set(self, direction, pk, ids):
+        key = self.key(direction, pk)
+        ids = frozenset(ids)
+        self.local.set(key, ids)
+        self.shared.set(key, ids, self.timeout)
+
+    def invalidate(self, followers=(), followings=()):
+        """Drop the 'following' sets of `followers` and 'followers' sets of `followings`."""
+        keys = [self.key('following', pk) for pk in followers] + [self.key('followers', pk) for pk in followings]
+        self.local.delete_many(keys)
+        self.shared.delete_many(keys)
+        transaction.on_commit(lambda: (self.local.delete_many(keys), self.shared.delete_many(keys)))
+
+
+relationship_sets = RelationshipSetCache()
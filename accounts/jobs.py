@@ -0,0 +1,22 @@
+from .models import User, RegularProfile, FootballerProfile, ManagerProfile, OrganisationProfile
+
+PROFILE_MODELS = {
+    User.REGULAR: RegularProfile,
+    User.FOOTBALLER: FootballerProfile,
+    User.MANAGER: ManagerProfile,
+    User.ORGANISATION: OrganisationProfile,
+}
+
+
+def provision_profile(user_id):
+    """
+    Create the profile matching the user's type. Footballer, manager and
+    organisation profiles only exist once the user is verified. Safe to run
+    more than once.
+    """
+    user = User.objects.filter(pk=user_id).only('pk', 'user_type', 'is_verified').first()
+    if user is None:
+        return
+    if user.user_type != User.REGULAR and not user.is_verified:
+        return
+    PROFILE_MODELS[user.user_type].objects.get_or_create(user=user)
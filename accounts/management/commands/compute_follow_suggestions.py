@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.recommendations import FollowGraph, compute_all, RECOMMENDATIONS_PER_USER
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's \"who to follow\" suggestions from the follow graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Users whose suggestions are written per transaction")
+        parser.add_argument('--limit', type=int, default=RECOMMENDATIONS_PER_USER,
+                            help="Suggestions kept per user")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        graph = FollowGraph.load()
+        self.stdout.write(
+            f"loaded {len(graph.targets)} edge(s) over {len(graph.ids)} user(s) "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+
+        written = 0
+        for count in compute_all(options['batch_size'], options['limit'], graph=graph):
+            written += count
+            self.stdout.write(f"{written} user(s) written")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"suggestions computed for {written} user(s) in {elapsed:.1f}s"))
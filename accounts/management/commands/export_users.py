@@ -0,0 +1,33 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.exports import FORMATS, export_rows, render
+
+
+class Command(BaseCommand):
+    help = "Dump every user with their typed profile as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FORMATS), default='ndjson')
+        parser.add_argument('--output', default='-', help="File to write, or - for stdout")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        self.exported = 0
+        lines = render(options['format'], self.count(export_rows(chunk_size=options['chunk_size'])))
+        if options['output'] == '-':
+            sys.stdout.writelines(lines)
+        else:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                f.writelines(lines)
+
+        elapsed = time.monotonic() - started
+        self.stderr.write(self.style.SUCCESS(f"exported {self.exported} user(s) in {elapsed:.1f}s"))
+
+    def count(self, rows):
+        for row in rows:
+            self.exported += 1
+            yield row
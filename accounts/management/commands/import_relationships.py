@@ -0,0 +1,90 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.cache import relationship_sets
+from accounts.models import User, UserRelationship
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a follower/following edge list (CSV with a follower,following "
+        "header, or JSON lines) into UserRelationship in chunks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help="Defaults to the file extension")
+        parser.add_argument('--lookup', choices=['id', 'username'], default='id',
+                            help="User field the edge list refers to")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--skip-counts', action='store_true',
+                            help="Don't reconcile follower counters afterwards")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('jsonl' if options['path'].endswith(('.jsonl', '.ndjson')) else 'csv')
+        imported = existing = skipped = 0
+
+        with open(options['path'], newline='') as f:
+            edges = self.read_edges(f, fmt)
+            while True:
+                chunk = list(islice(edges, options['chunk_size']))
+                if not chunk:
+                    break
+                created, present, unresolved = self.import_chunk(chunk, options['lookup'])
+                imported += created
+                existing += present
+                skipped += unresolved
+                self.stdout.write(f"{imported} edges written, {existing} already present, {skipped} skipped")
+
+        if not options['skip_counts']:
+            call_command('sync_follow_counts', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"imported {imported} edges ({existing} already present, {skipped} skipped)"
+        ))
+
+    def read_edges(self, f, fmt):
+        rows = csv.DictReader(f) if fmt == 'csv' else (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            try:
+                yield str(row['follower']), str(row['following'])
+            except KeyError as e:
+                raise CommandError(f"edge is missing {e}: {row}")
+
+    def import_chunk(self, chunk, lookup):
+        keys = {key for edge in chunk for key in edge}
+        if lookup == 'id':
+            ids = {pk: pk for pk in User.objects.filter(pk__in=keys).values_list('pk', flat=True)}
+        else:
+            ids = dict(User.objects.filter(username__in=keys).values_list('username', 'pk'))
+
+        resolved = [
+            (ids[follower], ids[following])
+            for follower, following in chunk
+            if follower in ids and following in ids and ids[follower] != ids[following]
+        ]
+        pairs = set(resolved)
+        # Bulk inserts skip the counter signals; counters are reconciled at the end.
+        with transaction.atomic():
+            stored = set(
+                UserRelationship.objects
+                .filter(follower_id__in={follower for follower, _ in pairs},
+                        following_id__in={following for _, following in pairs})
+                .values_list('follower_id', 'following_id')
+            )
+            new = pairs - stored
+            UserRelationship.objects.bulk_create(
+                [UserRelationship(follower_id=follower, following_id=following) for follower, following in new],
+                ignore_conflicts=True,
+            )
+            relationship_sets.invalidate(
+                followers={follower for follower, _ in new},
+                followings={following for _, following in new},
+            )
+        # Edges repeated in the file count as already present.
+        return len(new), len(resolved) - len(new), len(chunk) - len(resolved)
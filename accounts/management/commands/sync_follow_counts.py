@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from accounts.models import User, UserRelationship
+
+
+def _edge_count(field):
+    edges = (
+        UserRelationship.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(edges, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored follower/following counters from UserRelationship"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report drifted counters without writing them")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        drifted = (
+            User.objects
+            .annotate(actual_followers=_edge_count('following'),
+                      actual_following=_edge_count('follower'))
+            .exclude(followers_count=F('actual_followers'),
+                     following_count=F('actual_following'))
+            .only('pk', 'followers_count', 'following_count')
+            .order_by('pk')
+        )
+
+        fixed = 0
+        batch = []
+        for user in drifted.iterator(chunk_size=batch_size):
+            user.followers_count = user.actual_followers
+            user.following_count = user.actual_following
+            batch.append(user)
+            if len(batch) >= batch_size:
+                fixed += self._write(batch, options['dry_run'])
+                batch = []
+        fixed += self._write(batch, options['dry_run'])
+
+        verb = "would fix" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} counters on {fixed} user(s)"))
+
+    def _write(self, users, dry_run):
+        if users and not dry_run:
+            with transaction.atomic():
+                User.objects.bulk_update(users, ['followers_count', 'following_count'])
+        return len(users)
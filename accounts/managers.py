@@ -1,6 +1,19 @@
+from functools import reduce
+from operator import or_
+
 from django.contrib.auth.models import BaseUserManager
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, models, router, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.dispatch import Signal
+
+from accounts.cache import user_cache, relationship_sets
+
+# Sent by bulk_follow, which skips the per-edge post_save signal, with
+# `follower_id` and the `following_ids` actually followed.
+follows_created = Signal()
 
 
 class CustomUserManager(BaseUserManager):
@@ -55,3 +68,130 @@ class CustomUserManager(BaseUserManager):
             raise ValueError("Superuser must have is_superuser=True.")
         
         return self.create_user(username, phone_number, email, password, **extra_fields)
+
+
+class UserRelationshipManager(models.Manager):
+    """
+    Manager for follow edges with batch operations that write the edges and
+    adjust the stored follower/following counters once per batch.
+
+    Batches run on the write database: `self.db` is a read alias and may
+    name a replica while serving a request.
+    """
+    def write_db(self):
+        return router.db_for_write(self.model)
+
+    def bulk_follow(self, follower, user_ids):
+        User = self.model._meta.get_field('following').related_model
+        db = self.write_db()
+        with transaction.atomic(using=db):
+            already_following = self.using(db).filter(follower=follower, following_id__in=user_ids).values_list('following_id', flat=True)
+            targets = list(
+                User.objects.using(db).filter(pk__in=user_ids)
+                .exclude(pk=follower.pk)
+                .exclude(pk__in=already_following)
+                .values_list('pk', flat=True)
+            )
+            targets = self._insert_edges(follower, targets, db)
+            self._adjust_counts(User, follower, targets, 1, db)
+            if targets:
+                follows_created.send(sender=self.model, follower_id=follower.pk, following_ids=targets)
+        return len(targets)
+
+    def _insert_edges(self, follower, targets, db):
+        """Insert follow edges to `targets`; return the targets actually inserted."""
+        edges = [self.model(follower=follower, following_id=user_id) for user_id in targets]
+        try:
+            with transaction.atomic(using=db):
+                self.using(db).bulk_create(edges)
+            return targets
+        except IntegrityError:
+            pass
+        # A concurrent follow (or delete of a target) got in after the
+        # check above: insert one at a time to count only our own rows.
+        inserted = []
+        for edge in edges:
+            try:
+                with transaction.atomic(using=db):
+                    self.using(db).bulk_create([edge])
+            except IntegrityError:
+                continue
+            inserted.append(edge.following_id)
+        return inserted
+
+    def bulk_unfollow(self, follower, user_ids):
+        User = self.model._meta.get_field('following').related_model
+        db = self.write_db()
+        with transaction.atomic(using=db):
+            # Locked, so a concurrent unfollow of the same edges waits and
+            # then finds them gone instead of counting them twice.
+            edges = dict(
+                self.using(db).select_for_update()
+                .filter(follower=follower, following_id__in=user_ids)
+                .values_list('pk', 'following_id')
+            )
+            if edges:
+                # Skip the per-row post_delete signals; counters are adjusted below.
+                connection = connections[db]
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'DELETE FROM {} WHERE {} IN ({})'.format(
+                            connection.ops.quote_name(self.model._meta.db_table),
+                            connection.ops.quote_name(self.model._meta.pk.column),
+                            ', '.join(['%s'] * len(edges)),
+                        ),
+                        list(edges),
+                    )
+            targets = list(edges.values())
+            self._adjust_counts(User, follower, targets, -1, db)
+        return len(targets)
+
+    def _adjust_counts(self, User, follower, targets, sign, db):
+        if not targets:
+            return
+        users = User.objects.using(db)
+        if sign < 0:
+            users.filter(pk=follower.pk).update(following_count=Greatest(F('following_count') - len(targets), 0))
+            users.filter(pk__in=targets, followers_count__gt=0).update(followers_count=F('followers_count') - 1)
+        else:
+            users.filter(pk=follower.pk).update(following_count=F('following_count') + len(targets))
+            users.filter(pk__in=targets).update(followers_count=F('followers_count') + 1)
+        user_cache.invalidate_pk(follower.pk, *targets)
+        relationship_sets.invalidate(followers=[follower.pk], followings=targets)
+
+    def states(self, user, user_ids):
+        """
+        Return {user_id: (user follows them, they follow user)} for `user_ids`.
+
+        Served from the user's cached id sets when present. Otherwise one
+        query reads both directions: the whole set for directions small
+        enough to cache, or only the edges to `user_ids` for larger ones.
+        """
+        user_ids = list(dict.fromkeys(str(pk) for pk in user_ids))
+        sets = relationship_sets.get_many(user.pk)
+        missing = [direction for direction, ids in sets.items() if ids is None]
+        if missing:
+            sets.update(self._load_sets(user, missing, user_ids))
+        return {pk: (pk in sets['following'], pk in sets['followers']) for pk in user_ids}
+
+    def _load_sets(self, user, directions, user_ids):
+        counts = {'following': user.following_count, 'followers': user.followers_count}
+        cacheable = {direction for direction in directions if counts[direction] <= relationship_sets.max_size}
+        conditions = {
+            'following': Q(follower=user) if 'following' in cacheable else Q(follower=user, following_id__in=user_ids),
+            'followers': Q(following=user) if 'followers' in cacheable else Q(following=user, follower_id__in=user_ids),
+        }
+        # From the primary: the sets are cached well beyond replica lag.
+        edges = self.using(DEFAULT_DB_ALIAS).filter(
+            reduce(or_, [conditions[direction] for direction in directions])
+        ).order_by().values_list('follower_id', 'following_id')
+
+        sets = {direction: set() for direction in directions}
+        for follower_id, following_id in edges:
+            if follower_id == user.pk and 'following' in sets:
+                sets['following'].add(following_id)
+            if following_id == user.pk and 'followers' in sets:
+                sets['followers'].add(follower_id)
+        for direction in cacheable:
+            relationship_sets.set(direction, user.pk, sets[direction])
+        return sets
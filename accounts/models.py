@@ -4,9 +4,9 @@ from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator, EmailValidator
 from django.conf import settings
 from django.utils.translation import get_language
-import shortuuid
 from django_countries.fields import CountryField
-from accounts.managers import CustomUserManager
+from core.ids import generate_id
+from accounts.managers import CustomUserManager, UserRelationshipManager
 
 USERNAME_VALIDATOR = RegexValidator(
     regex=r'^[a-zA-Z0-9_.-]+$',
@@ -49,7 +49,7 @@ class User(AbstractUser):
         _("id"),
         primary_key=True,
         max_length=255,
-        default=shortuuid.uuid,
+        default=generate_id,
         help_text=_("User ID"),
         db_index=True
     )
@@ -87,6 +87,8 @@ class User(AbstractUser):
     is_moderator = models.BooleanField(default=False)
     is_developer = models.BooleanField(default=False)
     is_verified = models.BooleanField(default=False)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
 
     user_relationships = models.ManyToManyField(
         "self",
@@ -100,6 +102,13 @@ class User(AbstractUser):
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = ["email", "phone_number"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the post_save receiver spot type/verification changes.
+        instance._loaded_profile_state = (instance.__dict__.get('user_type'), instance.__dict__.get('is_verified'))
+        return instance
+
     def get_followers(self):
         return self.followers.all()
 
@@ -123,13 +132,45 @@ class UserRelationship(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = UserRelationshipManager()
+
     class Meta:
         unique_together = ("follower", "following")
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["following", "-created_at", "-id"], name="rel_followers_page_idx"),
+            models.Index(fields=["follower", "-created_at", "-id"], name="rel_following_page_idx"),
+        ]
 
     def __str__(self):
         return f"{self.follower} follows {self.following}"
 
+class FollowSuggestion(models.Model):
+    """Precomputed "who to follow" entry, written by accounts.recommendations"""
+    user = models.ForeignKey(
+        User,
+        related_name="follow_suggestions",
+        on_delete=models.CASCADE
+    )
+    suggested = models.ForeignKey(
+        User,
+        related_name="+",
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "suggested")
+        ordering = ["-score"]
+        indexes = [
+            models.Index(fields=["user", "-score"], name="suggestion_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.suggested} for {self.user}"
+
 class BaseProfile(models.Model):
     """Base Profile model with common fields"""
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -154,10 +195,10 @@ class BaseProfile(models.Model):
         return self.time_zone or settings.TIME_ZONE
 
     def followers_count(self):
-        return self.user.followers.count()
+        return self.user.followers_count
 
     def following_count(self):
-        return self.user.following.count()
+        return self.user.following_count
 
 class RegularProfile(BaseProfile):
     """Profile for regular users"""
@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RelationshipCursorPagination(CursorPagination):
+    """
+    Keyset pagination over UserRelationship rows ordered by (created_at, id),
+    so fetching a page costs the same regardless of how many edges a user has.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
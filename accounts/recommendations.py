@@ -0,0 +1,199 @@
+"""
+"Who to follow" suggestions: friends-of-friends ranked by how many of the
+people a user follows also follow the candidate, boosted when the two share
+a club, national team or country.
+
+The offline pass (`manage.py compute_follow_suggestions`) loads the whole
+edge list once into a CSR adjacency and counts two-hop paths per user with
+Counter.update over integer slices, so no per-user ORM traversal happens.
+New follows queue `refresh_suggestions` for the follower, which recomputes
+that one user's list from two indexed queries, bounded like the offline pass.
+"""
+import heapq
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Window
+from django.db.models.functions import RowNumber
+
+from .models import (
+    FollowSuggestion, UserRelationship, RegularProfile, FootballerProfile,
+    ManagerProfile, OrganisationProfile
+)
+
+RECOMMENDATION_WEIGHTS = {
+    'mutual': 1.0,
+    'club': 3.0,
+    'national_team': 2.0,
+    'country': 0.5,
+    **getattr(settings, 'RECOMMENDATION_WEIGHTS', {}),
+}
+RECOMMENDATIONS_PER_USER = getattr(settings, 'RECOMMENDATIONS_PER_USER', 50)
+# Seconds a follower's refresh waits in the queue, absorbing further follows.
+REFRESH_DELAY = getattr(settings, 'RECOMMENDATIONS_REFRESH_DELAY', 60)
+# An account following more than this many others contributes only its
+# first MAX_FANOUT edges to a row, which bounds the cost of any one user.
+MAX_FANOUT = getattr(settings, 'RECOMMENDATIONS_MAX_FANOUT', 5000)
+# Two-hop paths read by one refresh, whatever the size of the accounts involved.
+REFRESH_MAX_PATHS = getattr(settings, 'RECOMMENDATIONS_REFRESH_MAX_PATHS', 100000)
+
+
+class FollowGraph:
+    """
+    The follow graph in compressed sparse row form: users are numbered
+    0..n-1 and the accounts user i follows are targets[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, ids, offsets, targets):
+        self.ids = ids
+        self.index = {pk: i for i, pk in enumerate(ids)}
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def load(cls, chunk_size=10000):
+        ids, index = [], {}
+        sources, targets = array('l'), array('l')
+
+        def number(pk):
+            if pk not in index:
+                index[pk] = len(ids)
+                ids.append(pk)
+            return index[pk]
+
+        edges = UserRelationship.objects.order_by().values_list('follower_id', 'following_id')
+        for follower_id, following_id in edges.iterator(chunk_size=chunk_size):
+            sources.append(number(follower_id))
+            targets.append(number(following_id))
+
+        # Counting sort of the edges by source.
+        offsets = array('l', [0]) * (len(ids) + 1)
+        for source in sources:
+            offsets[source + 1] += 1
+        for i in range(len(ids)):
+            offsets[i + 1] += offsets[i]
+        position = array('l', offsets)
+        ordered = array('l', [0]) * len(targets)
+        for source, target in zip(sources, targets):
+            ordered[position[source]] = target
+            position[source] += 1
+        return cls(ids, offsets, ordered)
+
+    def following(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def two_hop_counts(self, i):
+        """Count the paths user i -> followed -> candidate, by candidate."""
+        counts = Counter()
+        for j in self.following(i):
+            start = self.offsets[j]
+            counts.update(self.targets[start:min(self.offsets[j + 1], start + MAX_FANOUT)])
+        return counts
+
+
+def load_attributes(user_ids=None):
+    """Return {user_id: (club, national_team, country)} from the typed profiles."""
+    attributes = {}
+    for model in (RegularProfile, ManagerProfile, OrganisationProfile):
+        profiles = model.objects.order_by()
+        if user_ids is not None:
+            profiles = profiles.filter(user_id__in=user_ids)
+        for user_id, country in profiles.values_list('user_id', 'country').iterator(chunk_size=10000):
+            attributes[user_id] = (None, None, country or None)
+    footballers = FootballerProfile.objects.order_by()
+    if user_ids is not None:
+        footballers = footballers.filter(user_id__in=user_ids)
+    rows = footballers.values_list('user_id', 'club', 'national_team', 'country')
+    for user_id, club, national_team, country in rows.iterator(chunk_size=10000):
+        attributes[user_id] = (club or None, national_team or None, country or None)
+    return attributes
+
+
+def rank(user_id, counts, exclude, attributes, limit=RECOMMENDATIONS_PER_USER):
+    """
+    Score the two-hop `counts` ({candidate_id: mutual count}) for `user_id`
+    and return the best `limit` as (score, mutual_count, candidate_id).
+    """
+    weights = RECOMMENDATION_WEIGHTS
+    own = attributes.get(user_id, (None, None, None))
+    boosts = [weights['club'], weights['national_team'], weights['country']]
+    scored = []
+    for candidate_id, mutual in counts.items():
+        if candidate_id in exclude:
+            continue
+        score = mutual * weights['mutual']
+        theirs = attributes.get(candidate_id)
+        if theirs is not None:
+            score += sum(boost for boost, a, b in zip(boosts, own, theirs) if a is not None and a == b)
+        scored.append((score, mutual, candidate_id))
+    return heapq.nlargest(limit, scored)
+
+
+def store(suggestions):
+    """Replace the stored lists of the users in `suggestions` ({user_id: ranked})."""
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=list(suggestions)).delete()
+        FollowSuggestion.objects.bulk_create([
+            FollowSuggestion(user_id=user_id, suggested_id=candidate_id, score=score, mutual_count=mutual)
+            for user_id, ranked in suggestions.items()
+            for score, mutual, candidate_id in ranked
+        ], batch_size=1000)
+
+
+def compute_all(batch_size=1000, limit=RECOMMENDATIONS_PER_USER, graph=None):
+    """
+    Recompute every user's suggestions from one load of the graph, writing
+    them `batch_size` users at a time. Yields the number of users written
+    after each batch. Stored lists of users outside the graph, who no
+    longer follow or are followed by anyone, are deleted at the end.
+    """
+    graph = graph or FollowGraph.load()
+    attributes = load_attributes()
+    batch = {}
+    for i, user_id in enumerate(graph.ids):
+        counts = graph.two_hop_counts(i)
+        exclude = {i, *graph.following(i)}
+        ranked = rank(
+            user_id,
+            {graph.ids[j]: n for j, n in counts.items() if j not in exclude},
+            (), attributes, limit,
+        )
+        batch[user_id] = ranked
+        if len(batch) >= batch_size:
+            store(batch)
+            yield len(batch)
+            batch = {}
+    if batch:
+        store(batch)
+        yield len(batch)
+
+    stale = [
+        user_id
+        for user_id in FollowSuggestion.objects.order_by().values_list('user_id', flat=True).distinct().iterator()
+        if user_id not in graph.index
+    ]
+    for start in range(0, len(stale), batch_size):
+        FollowSuggestion.objects.filter(user_id__in=stale[start:start + batch_size]).delete()
+
+
+def refresh_suggestions(user_id, limit=RECOMMENDATIONS_PER_USER):
+    """
+    Recompute one user's suggestions; queued when the user follows someone.
+    Paths start from the user's latest MAX_FANOUT follows, take the first
+    MAX_FANOUT edges of each, and stop after REFRESH_MAX_PATHS.
+    """
+    follows = UserRelationship.objects.filter(follower_id=user_id)
+    paths = (
+        UserRelationship.objects
+        .filter(follower_id__in=follows.order_by('-id').values('following_id')[:MAX_FANOUT])
+        .exclude(following_id=user_id)
+        .exclude(following_id__in=follows.values('following_id'))
+        .annotate(position=Window(RowNumber(), partition_by='follower_id', order_by='id'))
+        .filter(position__lte=MAX_FANOUT)
+        .values_list('following_id', flat=True)
+    )
+    counts = Counter(paths[:REFRESH_MAX_PATHS].iterator(chunk_size=10000))
+    attributes = load_attributes([user_id, *counts])
+    store({user_id: rank(user_id, counts, (), attributes, limit)})
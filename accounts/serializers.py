@@ -1,14 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
 from django_countries.serializers import CountryFieldMixin
+from core.metrics import TimedSerializerMixin
 from .models import (
-    UserRelationship, RegularProfile, FootballerProfile,
+    UserRelationship, FollowSuggestion, RegularProfile, FootballerProfile,
     ManagerProfile, OrganisationProfile, ProfileStatus
 )
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'phone_number', 'username', 'firstname', 'lastname',
@@ -25,17 +27,34 @@ class UserSerializer(serializers.ModelSerializer):
             instance.set_password(password)
         return super().update(instance, validated_data)
 
-class UserRelationshipSerializer(serializers.ModelSerializer):
+class UserRelationshipSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = UserRelationship
         fields = ['id', 'follower', 'following', 'created_at']
+        read_only_fields = ['follower']
+
+class BulkRelationshipSerializer(serializers.Serializer):
+    MAX_USERS = 500
+
+    user_ids = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=MAX_USERS
+    )
+
+class FollowSuggestionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    user = UserSerializer(source='suggested', read_only=True)
 
-class ProfileStatusSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FollowSuggestion
+        fields = ['user', 'score', 'mutual_count', 'computed_at']
+
+class ProfileStatusSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ProfileStatus
         fields = ['id', 'status', 'reason', 'reconsidered_at', 'created_at', 'updated_at']
 
-class BaseProfileSerializer(CountryFieldMixin, serializers.ModelSerializer):
+class BaseProfileSerializer(TimedSerializerMixin, CountryFieldMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     status = ProfileStatusSerializer(read_only=True)
     followers_count = serializers.IntegerField(read_only=True)
@@ -69,16 +88,31 @@ class OrganisationProfileSerializer(BaseProfileSerializer):
 class UserDetailSerializer(UserSerializer):
     profile = serializers.SerializerMethodField()
 
+    # Profile accessor and serializer for each User.user_type.
+    PROFILE_SERIALIZERS = {
+        User.REGULAR: ('regularprofile', RegularProfileSerializer),
+        User.FOOTBALLER: ('footballerprofile', FootballerProfileSerializer),
+        User.MANAGER: ('managerprofile', ManagerProfileSerializer),
+        User.ORGANISATION: ('organisationprofile', OrganisationProfileSerializer),
+    }
+
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + ['profile']
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Join every typed profile and its status so get_profile never queries."""
+        related = []
+        for accessor, _ in cls.PROFILE_SERIALIZERS.values():
+            related += [accessor, f'{accessor}__status']
+        return queryset.select_related(*related)
+
     def get_profile(self, obj):
-        if hasattr(obj, 'regularprofile'):
-            return RegularProfileSerializer(obj.regularprofile).data
-        elif hasattr(obj, 'footballerprofile'):
-            return FootballerProfileSerializer(obj.footballerprofile).data
-        elif hasattr(obj, 'managerprofile'):
-            return ManagerProfileSerializer(obj.managerprofile).data
-        elif hasattr(obj, 'organisationprofile'):
-            return OrganisationProfileSerializer(obj.organisationprofile).data
-        return None
\ No newline at end of file
+        accessor, serializer_class = self.PROFILE_SERIALIZERS.get(obj.user_type, (None, None))
+        if accessor is None:
+            return None
+        try:
+            profile = getattr(obj, accessor)
+        except ObjectDoesNotExist:
+            return None
+        return serializer_class(profile, context=self.context).data
@@ -1,24 +1,77 @@
 
-from .models import RegularProfile, User, FootballerProfile, ManagerProfile, OrganisationProfile
-from django.db.models.signals import post_save
+from core.jobs import enqueue
+from core.response_cache import bump
+from .cache import user_cache, relationship_sets
+from .jobs import provision_profile
+from .managers import follows_created
+from .recommendations import refresh_suggestions, REFRESH_DELAY
+from .models import RegularProfile, User, FootballerProfile, ManagerProfile, OrganisationProfile, UserRelationship, ProfileStatus
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def provision_user_profile(sender, instance, created, **kwargs):
+    # Only a new user, or a change of type or verification, can need a new
+    # profile; every other save of the user stays a single write.
+    state = (instance.user_type, instance.is_verified)
+    loaded = getattr(instance, '_loaded_profile_state', None)
+    if created or (loaded is None and instance.is_verified) or (loaded is not None and loaded != state):
+        enqueue(provision_profile, instance.pk, key=f'provision_profile:{instance.pk}')
+    instance._loaded_profile_state = state
+
+@receiver(post_save, sender=UserRelationship)
+def increment_follow_counts(sender, instance, created, **kwargs):
     if created:
-        if instance.user_type == User.REGULAR:
-            RegularProfile.objects.create(user=instance)
-        elif instance.user_type == User.FOOTBALLER and instance.is_verified:
-            FootballerProfile.objects.create(user=instance)
-        elif instance.user_type == User.MANAGER and instance.is_verified:
-            ManagerProfile.objects.create(user=instance)
-        elif instance.user_type == User.ORGANISATION and instance.is_verified:
-            OrganisationProfile.objects.create(user=instance)
-    else:
-        if instance.is_verified:
-            if instance.user_type == User.FOOTBALLER and not hasattr(instance, 'footballerprofile'):
-                FootballerProfile.objects.create(user=instance)
-            elif instance.user_type == User.MANAGER and not hasattr(instance, 'managerprofile'):
-                ManagerProfile.objects.create(user=instance)
-            elif instance.user_type == User.ORGANISATION and not hasattr(instance, 'organisationprofile'):
-                OrganisationProfile.objects.create(user=instance)
\ No newline at end of file
+        User.objects.filter(pk=instance.follower_id).update(following_count=F('following_count') + 1)
+        User.objects.filter(pk=instance.following_id).update(followers_count=F('followers_count') + 1)
+        user_cache.invalidate_pk(instance.follower_id, instance.following_id)
+        relationship_sets.invalidate(followers=[instance.follower_id], followings=[instance.following_id])
+        queue_suggestions_refresh(instance.follower_id)
+
+@receiver(follows_created, sender=UserRelationship)
+def refresh_bulk_follower_suggestions(sender, follower_id, following_ids, **kwargs):
+    queue_suggestions_refresh(follower_id)
+
+def queue_suggestions_refresh(user_id):
+    # A burst of follows collapses into one refresh while it is queued.
+    enqueue(refresh_suggestions, user_id, key=f'refresh_suggestions:{user_id}', delay=REFRESH_DELAY)
+
+@receiver(post_delete, sender=UserRelationship)
+def decrement_follow_counts(sender, instance, **kwargs):
+    # Collected deletes (admin, cascades). The API unfollows through
+    # UserRelationshipManager.bulk_unfollow, which locks the edges first.
+    User.objects.filter(pk=instance.follower_id, following_count__gt=0).update(following_count=F('following_count') - 1)
+    User.objects.filter(pk=instance.following_id, followers_count__gt=0).update(followers_count=F('followers_count') - 1)
+    user_cache.invalidate_pk(instance.follower_id, instance.following_id)
+    relationship_sets.invalidate(followers=[instance.follower_id], followings=[instance.following_id])
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    user_cache.invalidate(instance)
+
+@receiver([post_save, post_delete], sender=RegularProfile)
+@receiver([post_save, post_delete], sender=FootballerProfile)
+@receiver([post_save, post_delete], sender=ManagerProfile)
+@receiver([post_save, post_delete], sender=OrganisationProfile)
+def invalidate_profile_user_cache(sender, instance, **kwargs):
+    user_cache.invalidate_pk(instance.user_id)
+    bump('profiles')
+
+@receiver([post_save, post_delete], sender=ProfileStatus)
+def invalidate_status_user_cache(sender, instance, **kwargs):
+    for profile_model in (RegularProfile, FootballerProfile, ManagerProfile, OrganisationProfile):
+        user_cache.invalidate_pk(*profile_model.objects.filter(status=instance).values_list('user_id', flat=True))
+
+# Fields shown in public responses (search results) that depend on users.
+PUBLIC_USER_FIELDS = {'username', 'firstname', 'lastname'}
+
+@receiver(post_save, sender=User)
+def invalidate_user_responses(sender, instance, created, update_fields=None, **kwargs):
+    # Logins save last_login only; leave cached responses alone for those.
+    if created or update_fields is None or PUBLIC_USER_FIELDS.intersection(update_fields):
+        bump('profiles')
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_responses(sender, instance, **kwargs):
+    bump('profiles')
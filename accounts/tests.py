@@ -1,3 +1,399 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from core import throttling
+from core.routers import RoutingState, current_state
+
+from .cache import user_cache, relationship_sets
+from .models import User, UserRelationship, FollowSuggestion, ProfileStatus
+from . import recommendations
+from .recommendations import compute_all, refresh_suggestions
+from .serializers import UserDetailSerializer
+from .views import UserRelationshipViewSet
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], JOBS_EAGER=True)
+class UserDetailQueryCountTests(TestCase):
+    """UserDetailSerializer must not issue per-profile queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.admin = User.objects.create_superuser('admin', '+254700000000', 'admin@example.com', 'pw')
+            cls.users = [
+                User.objects.create_user(f'user{i}', f'+25471000000{i}', f'user{i}@example.com', 'pw',
+                                         user_type=user_type, is_verified=True)
+                for i, user_type in enumerate([User.REGULAR, User.FOOTBALLER, User.MANAGER, User.ORGANISATION])
+            ]
+        footballer = cls.users[1].footballerprofile
+        footballer.status = ProfileStatus.objects.create(footballer_profile=footballer)
+        footballer.save()
+
+    def setUp(self):
+        cache.clear()
+        user_cache.local.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_retrieve_is_a_single_query(self):
+        for user in self.users:
+            with self.assertNumQueries(1):
+                response = self.client.get(f'/users/{user.pk}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['profile']['user']['id'], user.pk)
+
+    def test_cached_retrieve_skips_the_database(self):
+        user = self.users[2]
+        self.client.get(f'/users/{user.pk}/')
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/users/{user.pk}/')
+        self.assertIn('current_team', response.data['profile'])
+
+    def test_follow_invalidates_cached_counts(self):
+        user = self.users[0]
+        self.client.get(f'/users/{user.pk}/')
+        self.client.post(f'/users/{user.pk}/follow/')
+        response = self.client.get(f'/users/{user.pk}/')
+        self.assertEqual(response.data['profile']['followers_count'], 1)
+
+    def test_profile_matches_user_type(self):
+        response = self.client.get(f'/users/{self.users[1].pk}/')
+        self.assertIn('position', response.data['profile'])
+        self.assertEqual(response.data['profile']['status']['status'], 'active')
+
+    def test_async_views_match_the_sync_endpoints(self):
+        user = self.users[1]
+        UserRelationship.objects.bulk_follow(self.admin, [user.pk for user in self.users])
+        for path in ['', 'followers/', 'following/']:
+            target = self.admin if path == 'following/' else user
+            expected = self.client.get(f'/users/{target.pk}/{path}').json()
+            self.assertEqual(self.client.get(f'/users/async/{target.pk}/{path}').json(), expected)
+
+        profile = user.footballerprofile
+        self.client.force_authenticate(user)
+        self.assertEqual(
+            self.client.get(f'/users/async/footballer-profiles/{profile.pk}/').json(),
+            self.client.get(f'/users/footballer-profiles/{profile.pk}/').json(),
+        )
+        self.assertEqual(self.client.get(f'/users/async/{self.users[0].pk}/').status_code, 403)
+        self.assertEqual(self.client.get(f'/users/async/{self.users[0].pk}/followers/').status_code, 403)
+
+    def test_async_views_authorize_before_looking_up_the_user(self):
+        self.client.force_authenticate(self.users[1])
+        for pk in [self.users[0].pk, 'missing']:
+            self.assertEqual(self.client.get(f'/users/async/{pk}/').status_code, 403)
+            self.assertEqual(self.client.get(f'/users/async/{pk}/following/').status_code, 403)
+        self.client.force_authenticate(None)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/users/async/missing/').status_code, 401)
+        self.assertEqual(self.client.get(f'/users/async/{self.users[0].pk}/').status_code, 401)
+
+    def test_async_user_detail_from_cache_skips_the_database(self):
+        user = self.users[2]
+        self.client.get(f'/users/async/{user.pk}/')
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/users/async/{user.pk}/')
+        self.assertIn('current_team', response.json()['profile'])
+
+    def test_export_streams_users_with_their_profile(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/users/export/')
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = {row['username']: row for row in map(json.loads, lines)}
+        self.assertEqual(len(rows), len(self.users) + 1)
+        self.assertEqual(rows['user1']['profile']['id'], self.users[1].footballerprofile.pk)
+        self.assertIn('position', rows['user1']['profile'])
+        self.assertIn('organisation_name', rows['user3']['profile'])
+
+        response = self.client.get('/users/export/?output=csv')
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual({row['username']: row['profile_current_team'] for row in rows}['user2'], '')
+
+    def test_export_is_staff_only(self):
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.get('/users/export/').status_code, 403)
+
+    def test_list_of_details_is_a_single_query(self):
+        queryset = UserDetailSerializer.setup_eager_loading(User.objects.all())
+        with self.assertNumQueries(1):
+            data = UserDetailSerializer(queryset, many=True).data
+        self.assertEqual(len(data), len(self.users) + 1)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], JOBS_EAGER=True)
+class FollowSuggestionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.a, cls.b, cls.c, cls.d, cls.e, cls.f = [
+                User.objects.create_user(name, f'+25472000000{i}', f'{name}@example.com', 'pw',
+                                         user_type=User.FOOTBALLER, is_verified=True)
+                for i, name in enumerate('abcdef')
+            ]
+        for user, club in [(cls.a, 'Gor Mahia'), (cls.f, 'Gor Mahia'), (cls.d, 'AFC Leopards')]:
+            user.footballerprofile.club = club
+            user.footballerprofile.save()
+        UserRelationship.objects.bulk_create([
+            UserRelationship(follower=follower, following=following)
+            for follower, following in [
+                (cls.a, cls.b), (cls.a, cls.c),
+                (cls.b, cls.d), (cls.c, cls.d), (cls.b, cls.e), (cls.c, cls.f), (cls.b, cls.c),
+            ]
+        ])
+
+    def setUp(self):
+        cache.clear()
+        user_cache.local.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.a)
+
+    def test_friends_of_friends_ranked_with_club_boost(self):
+        list(compute_all())
+        suggestions = list(FollowSuggestion.objects.filter(user=self.a).order_by('-score'))
+        # f: one mutual plus the shared club outranks d's two mutuals.
+        self.assertEqual([s.suggested_id for s in suggestions], [self.f.pk, self.d.pk, self.e.pk])
+        self.assertEqual(suggestions[1].mutual_count, 2)
+
+    def test_endpoint_leaves_out_accounts_followed_since(self):
+        list(compute_all())
+        UserRelationship.objects.bulk_create([UserRelationship(follower=self.a, following=self.f)])
+        response = self.client.get(f'/users/{self.a.pk}/suggestions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['user']['id'] for row in response.data], [self.d.pk, self.e.pk])
+
+    def test_follow_refreshes_the_followers_suggestions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRelationship.objects.create(follower=self.a, following=self.e)
+        suggested = set(FollowSuggestion.objects.filter(user=self.a).values_list('suggested_id', flat=True))
+        self.assertEqual(suggested, {self.d.pk, self.f.pk})
+
+    def test_refresh_is_bounded_by_the_fanout_caps(self):
+        def suggested():
+            return list(FollowSuggestion.objects.filter(user=self.a).values_list('suggested_id', 'mutual_count'))
+
+        # Only a's latest follow, c, and c's first edge, to d, are read.
+        with mock.patch.object(recommendations, 'MAX_FANOUT', 1):
+            refresh_suggestions(self.a.pk)
+        self.assertEqual(suggested(), [(self.d.pk, 1)])
+        with mock.patch.object(recommendations, 'REFRESH_MAX_PATHS', 1):
+            refresh_suggestions(self.a.pk)
+        self.assertEqual(len(suggested()), 1)
+        refresh_suggestions(self.a.pk)
+        self.assertEqual(set(suggested()), {(self.d.pk, 2), (self.e.pk, 1), (self.f.pk, 1)})
+
+    def test_bulk_follows_refresh_the_followers_suggestions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRelationship.objects.bulk_follow(self.a, [self.d.pk, self.e.pk])
+        suggested = set(FollowSuggestion.objects.filter(user=self.a).values_list('suggested_id', flat=True))
+        self.assertEqual(suggested, {self.f.pk})
+
+    def test_recompute_drops_users_who_left_the_graph(self):
+        list(compute_all())
+        self.assertTrue(FollowSuggestion.objects.filter(user=self.a).exists())
+        UserRelationship.objects.filter(follower=self.a).delete()
+        UserRelationship.objects.filter(following=self.a).delete()
+        list(compute_all(batch_size=1))
+        self.assertFalse(FollowSuggestion.objects.filter(user=self.a).exists())
+        self.assertTrue(FollowSuggestion.objects.filter(user=self.b).exists())
+
+    def test_other_users_suggestions_are_private(self):
+        response = self.client.get(f'/users/{self.b.pk}/suggestions/')
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RelationshipCheckTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.me, cls.friend, cls.fan, cls.idol, cls.stranger = [
+            User.objects.create_user(name, f'+25473000000{i}', f'{name}@example.com', 'pw')
+            for i, name in enumerate(['me', 'friend', 'fan', 'idol', 'stranger'])
+        ]
+        UserRelationship.objects.bulk_follow(cls.me, [cls.friend.pk, cls.idol.pk])
+        UserRelationship.objects.bulk_follow(cls.friend, [cls.me.pk])
+        UserRelationship.objects.bulk_follow(cls.fan, [cls.me.pk])
+
+    def setUp(self):
+        cache.clear()
+        relationship_sets.local.clear()
+        self.me.refresh_from_db()
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def check(self, *users):
+        response = self.client.post('/users/user-relationships/check/',
+                                    {'user_ids': [user.pk for user in users]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return {pk: (state['following'], state['followed_by']) for pk, state in response.data['results'].items()}
+
+    def test_states_in_one_query_then_from_cache(self):
+        users = [self.friend, self.fan, self.idol, self.stranger]
+        expected = {
+            self.friend.pk: (True, True), self.fan.pk: (False, True),
+            self.idol.pk: (True, False), self.stranger.pk: (False, False),
+        }
+        with self.assertNumQueries(1):
+            self.assertEqual(UserRelationship.objects.states(self.me, [u.pk for u in users]), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(UserRelationship.objects.states(self.me, [u.pk for u in users]), expected)
+        self.assertEqual(self.check(*users), expected)
+
+    def test_follow_invalidates_cached_sets(self):
+        self.check(self.stranger)
+        UserRelationship.objects.create(follower=self.stranger, following=self.me)
+        UserRelationship.objects.bulk_follow(self.me, [self.stranger.pk])
+        self.assertEqual(self.check(self.stranger), {self.stranger.pk: (True, True)})
+
+    def test_large_sets_are_queried_per_request(self):
+        relationship_sets.max_size, max_size = 1, relationship_sets.max_size
+        try:
+            with self.assertNumQueries(1):
+                states = UserRelationship.objects.states(self.me, [self.fan.pk, self.idol.pk])
+            self.assertEqual(states, {self.fan.pk: (False, True), self.idol.pk: (True, False)})
+            self.assertEqual(relationship_sets.get_many(self.me.pk), {'following': None, 'followers': None})
+        finally:
+            relationship_sets.max_size = max_size
+
+    def test_follow_writes_are_throttled_per_user(self):
+        with mock.patch.object(throttling, 'THROTTLE_RATES', {'follow': {'user': '2/min'}}):
+            statuses = [
+                self.client.post('/users/user-relationships/bulk-follow/',
+                                 {'user_ids': [self.stranger.pk]}, format='json').status_code,
+                self.client.post('/users/user-relationships/bulk-unfollow/',
+                                 {'user_ids': [self.stranger.pk]}, format='json').status_code,
+            ]
+            response = self.client.post('/users/user-relationships/bulk-follow/',
+                                        {'user_ids': [self.stranger.pk]}, format='json')
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        # Reads have no scope and are never throttled.
+        self.assertEqual(self.check(self.stranger), {self.stranger.pk: (False, False)})
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BulkRelationshipTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.me, cls.a, cls.b, cls.c = [
+            User.objects.create_user(name, f'+25474000000{i}', f'{name}@example.com', 'pw')
+            for i, name in enumerate(['me', 'a', 'b', 'c'])
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def post(self, path, *users, ids=()):
+        response = self.client.post(f'/users/user-relationships/{path}/',
+                                    {'user_ids': [user.pk for user in users] + list(ids)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['count']
+
+    def counts(self):
+        return {
+            user.username: (user.following_count, user.followers_count)
+            for user in User.objects.filter(pk__in=[self.me.pk, self.a.pk, self.b.pk, self.c.pk])
+        }
+
+    def test_bulk_follow_and_unfollow_count_only_changed_edges(self):
+        UserRelationship.objects.create(follower=self.me, following=self.a)
+        self.assertEqual(self.post('bulk-follow', self.a, self.b, self.b, self.me, ids=['missing']), 1)
+        self.assertEqual(self.counts(), {'me': (2, 0), 'a': (0, 1), 'b': (0, 1), 'c': (0, 0)})
+
+        self.assertEqual(self.post('bulk-unfollow', self.a, self.c), 1)
+        self.assertEqual(self.post('bulk-unfollow', self.a, self.c), 0)
+        self.assertEqual(self.counts(), {'me': (1, 0), 'a': (0, 0), 'b': (0, 1), 'c': (0, 0)})
+        self.assertEqual(list(UserRelationship.objects.values_list('following__username', flat=True)), ['b'])
+
+    def test_edges_deleted_concurrently_are_not_counted_twice(self):
+        UserRelationship.objects.create(follower=self.b, following=self.a)
+        response = self.client.post('/users/user-relationships/', {'follower': self.b.pk, 'following': self.a.pk})
+        self.assertEqual(response.status_code, 201, response.data)
+        edge = UserRelationship.objects.get(pk=response.data['id'])
+        self.assertEqual(edge.follower, self.me)
+        # Another request unfollows between this one's lookup and delete.
+        UserRelationship.objects.filter(pk=edge.pk).delete()
+        view = UserRelationshipViewSet(request=SimpleNamespace(user=self.me))
+        view.perform_destroy(edge)
+        self.assertEqual(self.post('bulk-unfollow', self.a), 0)
+        self.client.post(f'/users/{self.a.pk}/unfollow/')
+        self.assertEqual(self.counts(), {'me': (0, 0), 'a': (0, 1), 'b': (1, 0), 'c': (0, 0)})
+
+    def test_edges_cannot_be_moved(self):
+        edge = UserRelationship.objects.create(follower=self.me, following=self.a)
+        url = f'/users/user-relationships/{edge.pk}/'
+        self.assertEqual(self.client.put(url, {'following': self.b.pk}).status_code, 405)
+        self.assertEqual(self.client.patch(url, {'following': self.b.pk}).status_code, 405)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.counts(), {'me': (0, 0), 'a': (0, 0), 'b': (0, 0), 'c': (0, 0)})
+
+    def test_edges_inserted_concurrently_are_not_counted(self):
+        # Another request follows `a` between the check and the insert.
+        UserRelationship.objects.bulk_create([UserRelationship(follower=self.me, following=self.a)])
+        inserted = UserRelationship.objects._insert_edges(self.me, [self.a.pk, self.b.pk], 'default')
+        self.assertEqual(inserted, [self.b.pk])
+        self.assertEqual(UserRelationship.objects.filter(follower=self.me).count(), 2)
+
+    def test_import_reports_only_written_edges(self):
+        UserRelationship.objects.create(follower=self.a, following=self.b)
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('follower,following\n')
+            f.write('a,b\nb,c\nb,c\nc,missing\nme,me\n')
+        self.addCleanup(os.unlink, f.name)
+        out = StringIO()
+        call_command('import_relationships', f.name, '--lookup', 'username', stdout=out)
+        self.assertIn('imported 1 edges (2 already present, 2 skipped)', out.getvalue())
+        self.assertEqual(self.counts(), {'me': (0, 0), 'a': (1, 0), 'b': (1, 1), 'c': (0, 1)})
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+                   DATABASE_REPLICAS=['replica_1'])
+class BulkRelationshipRoutingTests(TransactionTestCase):
+    """
+    Batches while serving an unpinned request, when reads go to a replica.
+    TestCase's wrapping transaction would keep reads on the primary.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.me, self.a, self.b = [
+            User.objects.create_user(name, f'+25474100000{i}', f'{name}@example.com', 'pw')
+            for i, name in enumerate(['me', 'a', 'b'])
+        ]
+        token = current_state.set(RoutingState())
+        self.addCleanup(current_state.reset, token)
+
+    def test_batches_write_inside_a_transaction_on_the_primary(self):
+        writes = []
+
+        def record(execute, sql, params, many, context):
+            if sql.startswith(('INSERT INTO "accounts_', 'UPDATE "accounts_', 'DELETE FROM "accounts_')):
+                writes.append((sql.split()[0], connection.in_atomic_block))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            self.assertEqual(UserRelationship.objects.bulk_follow(self.me, [self.a.pk, self.b.pk]), 2)
+            self.assertEqual(UserRelationship.objects.bulk_unfollow(self.me, [self.a.pk]), 1)
+        self.assertEqual(writes, [('INSERT', True)] + [('UPDATE', True)] * 2 + [('DELETE', True)]
+                         + [('UPDATE', True)] * 2)
+        self.assertEqual(
+            {user.username: (user.following_count, user.followers_count) for user in User.objects.all()},
+            {'me': (1, 0), 'a': (0, 0), 'b': (0, 1)},
+        )
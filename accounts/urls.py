@@ -1,16 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
-router.register(r'', views.UserViewSet)
 router.register(r'regular-profiles', views.RegularProfileViewSet)
 router.register(r'footballer-profiles', views.FootballerProfileViewSet)
 router.register(r'manager-profiles', views.ManagerProfileViewSet)
 router.register(r'organisation-profiles', views.OrganisationProfileViewSet)
 router.register(r'profile-statuses', views.ProfileStatusViewSet)
 router.register(r'user-relationships', views.UserRelationshipViewSet)
+# Last, so its <pk>/ route doesn't shadow the list routes above.
+router.register(r'', views.UserViewSet)
 
 urlpatterns = [
+    path('async/<str:profile_type>-profiles/<str:pk>/', async_views.profile_detail, name='async-profile-detail'),
+    path('async/<str:pk>/', async_views.user_detail, name='async-user-detail'),
+    path('async/<str:pk>/followers/', async_views.followers, name='async-user-followers'),
+    path('async/<str:pk>/following/', async_views.following, name='async-user-following'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
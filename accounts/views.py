@@ -1,14 +1,21 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import mixins, viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import BasePermission
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from .cache import user_cache
+from .exports import FORMATS, export_rows, render
 from .models import (
-    User, UserRelationship, RegularProfile, FootballerProfile,
+    User, UserRelationship, FollowSuggestion, RegularProfile, FootballerProfile,
     ManagerProfile, OrganisationProfile, ProfileStatus
 )
+from .pagination import RelationshipCursorPagination
 from .serializers import (
     UserSerializer, UserDetailSerializer, UserRelationshipSerializer,
+    BulkRelationshipSerializer, FollowSuggestionSerializer,
     RegularProfileSerializer, FootballerProfileSerializer,
     ManagerProfileSerializer, OrganisationProfileSerializer,
     ProfileStatusSerializer
@@ -25,10 +32,10 @@ class IsAdminOrSelf(BasePermission):
         if request.user.is_staff:
             return True
         # Non-admin users can only perform actions on their own user object
-        elif view.action in ['retrieve', 'update', 'partial_update']:
+        elif view.action in ['retrieve', 'update', 'partial_update', 'suggestions']:
             user_id = view.kwargs.get('pk')
             if user_id is not None:
-                return int(user_id) == request.user.id
+                return user_id == str(request.user.pk)
         return False
 
 
@@ -36,45 +43,119 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserDetailSerializer
     permission_classes = [IsAdminOrSelf]
+    throttle_scopes = {'create': 'signup', 'follow': 'follow', 'unfollow': 'follow'}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['retrieve', 'update', 'partial_update']:
+            queryset = UserDetailSerializer.setup_eager_loading(queryset)
+        return queryset
+
+    def get_object(self):
+        # Writes go to the database; reads are served from the object cache.
+        if self.action not in ['retrieve', 'follow', 'unfollow', 'followers', 'following', 'suggestions']:
+            return super().get_object()
+        try:
+            user = user_cache.get(pk=self.kwargs['pk'])
+        except User.DoesNotExist:
+            raise Http404
+        self.check_object_permissions(self.request, user)
+        return user
 
     def get_serializer_class(self):
         if self.action in ['list', 'create']:
             return UserSerializer
         return UserDetailSerializer
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every user with their typed profile. ?output=ndjson (default)
+        or ?output=csv. Staff only.
+        """
+        fmt = request.query_params.get('output', 'ndjson')
+        if fmt not in FORMATS:
+            return Response({'output': f"Choose one of: {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(render(fmt, export_rows()), content_type=FORMATS[fmt])
+        filename = f"users-{timezone.now():%Y%m%d%H%M%S}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
     @action(detail=True, methods=['post'])
     def follow(self, request, pk=None):
         user = self.get_object()
         follower = request.user
-        UserRelationship.objects.get_or_create(follower=follower, following=user)
+        with transaction.atomic():
+            UserRelationship.objects.get_or_create(follower=follower, following=user)
         return Response({'status': 'now following'})
 
     @action(detail=True, methods=['post'])
     def unfollow(self, request, pk=None):
         user = self.get_object()
-        follower = request.user
-        UserRelationship.objects.filter(follower=follower, following=user).delete()
+        # Locks the edge, so concurrent unfollows decrement the counters once.
+        UserRelationship.objects.bulk_unfollow(request.user, [user.pk])
         return Response({'status': 'unfollowed'})
 
     @action(detail=True, methods=['get'])
     def followers(self, request, pk=None):
         user = self.get_object()
-        followers = user.followers.all()
-        serializer = UserSerializer(followers, many=True)
-        return Response(serializer.data)
+        relationships = UserRelationship.objects.filter(following=user)
+        return self.paginate_relationships(relationships, 'follower')
 
     @action(detail=True, methods=['get'])
     def following(self, request, pk=None):
         user = self.get_object()
-        following = user.following.all()
-        serializer = UserSerializer(following, many=True)
+        relationships = UserRelationship.objects.filter(follower=user)
+        return self.paginate_relationships(relationships, 'following')
+
+    @action(detail=True, methods=['get'])
+    def suggestions(self, request, pk=None):
+        """
+        Precomputed "who to follow" list, best first. Accounts followed since
+        the list was computed are left out. Takes ?limit= (default 20).
+        """
+        user = self.get_object()
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), 50) if limit.isdigit() and int(limit) else 20
+        suggestions = (
+            FollowSuggestion.objects
+            .filter(user=user)
+            .exclude(suggested__in=UserRelationship.objects.filter(follower=user).values('following'))
+            .select_related('suggested')
+            .order_by('-score')[:limit]
+        )
+        serializer = FollowSuggestionSerializer(suggestions, many=True)
         return Response(serializer.data)
 
+    def paginate_relationships(self, relationships, related_field):
+        """
+        Return one cursor page of the users on the `related_field` side of
+        `relationships`, fetched together with the edges in a single query.
+        """
+        paginator = RelationshipCursorPagination()
+        page = paginator.paginate_queryset(
+            relationships.select_related(related_field), self.request, view=self
+        )
+        users = [getattr(relationship, related_field) for relationship in page]
+        serializer = UserSerializer(users, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
 class BaseProfileViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        return self.queryset.filter(user=self.request.user).select_related('user', 'status')
+
+    def get_object(self):
+        # The cached user carries all of its typed profiles.
+        if self.action != 'retrieve':
+            return super().get_object()
+        user = user_cache.get(pk=self.request.user.pk)
+        profile = getattr(user, self.queryset.model._meta.model_name, None)
+        if profile is None or str(profile.pk) != self.kwargs['pk']:
+            raise Http404
+        self.check_object_permissions(self.request, profile)
+        return profile
 
 class RegularProfileViewSet(BaseProfileViewSet):
     queryset = RegularProfile.objects.all()
@@ -97,13 +178,51 @@ class ProfileStatusViewSet(viewsets.ModelViewSet):
     serializer_class = ProfileStatusSerializer
     permission_classes = [permissions.IsAdminUser]
 
-class UserRelationshipViewSet(viewsets.ModelViewSet):
+class UserRelationshipViewSet(mixins.CreateModelMixin,
+                              mixins.ListModelMixin,
+                              mixins.RetrieveModelMixin,
+                              mixins.DestroyModelMixin,
+                              viewsets.GenericViewSet):
+    """A user's follow edges. Edges are never updated in place; unfollow and follow again."""
     queryset = UserRelationship.objects.all()
     serializer_class = UserRelationshipSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scopes = {action: 'follow' for action in ('create', 'destroy', 'bulk_follow', 'bulk_unfollow')}
 
     def get_queryset(self):
         return self.queryset.filter(follower=self.request.user)
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(follower=self.request.user)
\ No newline at end of file
+        serializer.save(follower=self.request.user)
+
+    def perform_destroy(self, instance):
+        UserRelationship.objects.bulk_unfollow(self.request.user, [instance.following_id])
+
+    @action(detail=False, methods=['post'], url_path='bulk-follow')
+    def bulk_follow(self, request):
+        serializer = BulkRelationshipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        count = UserRelationship.objects.bulk_follow(request.user, serializer.validated_data['user_ids'])
+        return Response({'status': 'now following', 'count': count})
+
+    @action(detail=False, methods=['post'], url_path='bulk-unfollow')
+    def bulk_unfollow(self, request):
+        serializer = BulkRelationshipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        count = UserRelationship.objects.bulk_unfollow(request.user, serializer.validated_data['user_ids'])
+        return Response({'status': 'unfollowed', 'count': count})
+
+    @action(detail=False, methods=['post'], url_path='check')
+    def check(self, request):
+        """
+        Follow state between the current user and each of `user_ids`:
+        {"results": {"<id>": {"following": bool, "followed_by": bool}}}
+        """
+        serializer = BulkRelationshipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        states = UserRelationship.objects.states(request.user, serializer.validated_data['user_ids'])
+        return Response({'results': {
+            pk: {'following': following, 'followed_by': followed_by}
+            for pk, (following, followed_by) in states.items()
+        }})
@@ -0,0 +1,71 @@
+import binascii
+import pickle
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+
+from knox.auth import TokenAuthentication
+from knox.crypto import hash_token
+from knox.settings import knox_settings
+
+from accounts.cache import user_cache
+
+TOKEN_CACHE_ALIAS = getattr(settings, 'TOKEN_CACHE_ALIAS', 'default')
+TOKEN_CACHE_TIMEOUT = getattr(settings, 'TOKEN_CACHE_TIMEOUT', 300)
+
+
+def token_cache_key(digest):
+    return f'auth:token:{digest}'
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Knox token authentication that remembers a verified token by its digest,
+    and resolves the user through the object cache. A cache hit costs one
+    SHA-512 and no queries. Deleting an AuthToken (logout) invalidates it.
+    """
+
+    def authenticate_credentials(self, token):
+        try:
+            digest = hash_token(token.decode('utf-8'))
+        except (TypeError, UnicodeDecodeError, binascii.Error):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        cache = caches[TOKEN_CACHE_ALIAS]
+        cached = cache.get(token_cache_key(digest))
+        if cached is not None:
+            auth_token = pickle.loads(cached)
+            if auth_token.expiry is None or auth_token.expiry > timezone.now():
+                return self.validate_cached_user(auth_token, cache, digest)
+            cache.delete(token_cache_key(digest))
+
+        user, auth_token = super().authenticate_credentials(token)
+        self.remember(auth_token, cache, digest)
+        return user, auth_token
+
+    def validate_cached_user(self, auth_token, cache, digest):
+        try:
+            user = user_cache.get(pk=auth_token.user_id)
+        except user_cache.model.DoesNotExist:
+            cache.delete(token_cache_key(digest))
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        auth_token.user = user
+        if knox_settings.AUTO_REFRESH and auth_token.expiry:
+            self.renew_token(auth_token)
+            self.remember(auth_token, cache, digest)
+        return self.validate_user(auth_token)
+
+    def remember(self, auth_token, cache, digest):
+        timeout = TOKEN_CACHE_TIMEOUT
+        if auth_token.expiry is not None:
+            timeout = min(timeout, (auth_token.expiry - timezone.now()).total_seconds())
+        if timeout <= 0:
+            return
+        user = auth_token.user
+        # The user is cached separately; keep it out of the token entry.
+        auth_token._state.fields_cache.pop('user', None)
+        cache.set(token_cache_key(digest), pickle.dumps(auth_token, pickle.HIGHEST_PROTOCOL), timeout)
+        auth_token.user = user
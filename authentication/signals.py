@@ -0,0 +1,11 @@
+from django.core.cache import caches
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from knox.models import AuthToken
+
+from .auth import TOKEN_CACHE_ALIAS, token_cache_key
+
+@receiver(post_delete, sender=AuthToken)
+def forget_deleted_token(sender, instance, **kwargs):
+    caches[TOKEN_CACHE_ALIAS].delete(token_cache_key(instance.digest))
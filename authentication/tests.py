@@ -1,3 +1,86 @@
-from django.test import TestCase
+import base64
 
-# Create your tests here.
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from knox.crypto import hash_token
+from knox.models import AuthToken
+from rest_framework import exceptions
+from rest_framework.test import APIClient
+
+from accounts.cache import user_cache
+from accounts.models import User
+
+from .auth import TOKEN_CACHE_ALIAS, CachedTokenAuthentication, token_cache_key
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CachedTokenAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player', '+254700000001', 'player@example.com', 'pw')
+
+    def setUp(self):
+        self.cache = caches[TOKEN_CACHE_ALIAS]
+        self.cache.clear()
+        user_cache.local.clear()
+        _, self.token = AuthToken.objects.create(user=self.user)
+
+    def authenticate(self, token=None):
+        return CachedTokenAuthentication().authenticate_credentials((token or self.token).encode())
+
+    def cached(self, token=None):
+        return self.cache.get(token_cache_key(hash_token(token or self.token))) is not None
+
+    def client_for(self, token=None):
+        return APIClient(HTTP_AUTHORIZATION=f'Token {token or self.token}')
+
+    def test_verified_tokens_are_served_from_the_cache(self):
+        user, auth_token = self.authenticate()
+        self.assertEqual(user, self.user)
+        self.assertTrue(self.cached())
+        # The user comes from the object cache, filled on first use.
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user, cached_token = self.authenticate()
+        self.assertEqual((user, cached_token.pk), (self.user, auth_token.pk))
+
+    def test_unknown_and_malformed_tokens_are_rejected(self):
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate('0' * len(self.token))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate('not a token')
+
+    def test_deleted_user_drops_the_cached_token(self):
+        self.authenticate()
+        User.objects.filter(pk=self.user.pk).delete()
+        user_cache.local.clear()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate()
+        self.assertFalse(self.cached())
+
+    def test_login_issues_a_token_usable_on_later_requests(self):
+        basic = base64.b64encode(b'player:pw').decode()
+        response = APIClient(HTTP_AUTHORIZATION=f'Basic {basic}').post('/auth/login/')
+        self.assertEqual(response.status_code, 200)
+        token = response.json()['token']
+        self.assertEqual(self.client_for(token).get(f'/users/{self.user.pk}/').status_code, 200)
+        self.assertTrue(self.cached(token))
+
+    def test_logout_evicts_the_cached_token(self):
+        client = self.client_for()
+        self.assertEqual(client.get(f'/users/{self.user.pk}/').status_code, 200)
+        self.assertTrue(self.cached())
+        self.assertEqual(client.post('/auth/logout/').status_code, 204)
+        self.assertFalse(self.cached())
+        self.assertEqual(client.get(f'/users/{self.user.pk}/').status_code, 401)
+
+    def test_logoutall_evicts_every_cached_token(self):
+        _, other = AuthToken.objects.create(user=self.user)
+        for token in (self.token, other):
+            self.authenticate(token)
+        self.assertEqual(self.client_for(other).post('/auth/logoutall/').status_code, 204)
+        self.assertFalse(self.cached())
+        self.assertFalse(self.cached(other))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate()
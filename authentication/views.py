@@ -1,3 +1,12 @@
-from django.shortcuts import render
+from rest_framework.authentication import BasicAuthentication
+from knox import views as knox_views
 
-# Create your views here.
+class LoginView(knox_views.LoginView):
+    """Exchange username/password (HTTP Basic) for a token, once."""
+    authentication_classes = [BasicAuthentication]
+
+class LogoutView(knox_views.LogoutView):
+    pass
+
+class LogoutAllView(knox_views.LogoutAllView):
+    pass
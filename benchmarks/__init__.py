@@ -0,0 +1,5 @@
+"""
+Standalone benchmarks. Each module runs against a throwaway test database:
+
+    python -m benchmarks.<module> [options]
+"""
@@ -0,0 +1,161 @@
+"""
+Latency, throughput and query counts per accounts endpoint over a seeded
+power-law follow graph, driven in-process through the DRF test client.
+
+    python -m benchmarks.accounts_api --users 2000 --requests 200
+    python -m benchmarks.accounts_api --database-url postgres://localhost/fs_api_bench
+
+Results go to benchmarks/results/accounts_api-<commit>-<database>.json
+unless --output is given; compare two runs with benchmarks.compare.
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from benchmarks.seed import DEFAULT_MIX, parse_mix, seed_follows, seed_users
+from benchmarks.utils import (
+    add_database_argument, environment, percentiles, setup_django, test_database, write_results
+)
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+class Scenario:
+    """One endpoint: `request(client, rng)` issues a request and returns the response."""
+
+    def __init__(self, name, request, expected=200):
+        self.name = name
+        self.request = request
+        self.expected = expected
+
+
+def scenarios(admin, ranking, profiles):
+    from accounts.models import User
+
+    hubs = ranking[:10]
+    tail = ranking[len(ranking) // 2:]
+
+    def follow_toggle(client, rng):
+        target = rng.choice(tail)
+        client.post(f'/users/{target}/follow/')
+        return client.post(f'/users/{target}/unfollow/')
+
+    def own_profile(client, rng):
+        user_type, user_id, profile_id = rng.choice(profiles)
+        client.force_authenticate(User(pk=user_id, user_type=user_type, is_active=True))
+        try:
+            accessor = f'{user_type.lower()}-profiles'
+            return client.get(f'/users/{accessor}/{profile_id}/')
+        finally:
+            client.force_authenticate(admin)
+
+    return [
+        Scenario('user_detail', lambda client, rng: client.get(f'/users/{rng.choice(ranking)}/')),
+        Scenario('user_list', lambda client, rng: client.get('/users/')),
+        Scenario('followers_hub', lambda client, rng: client.get(f'/users/{rng.choice(hubs)}/followers/')),
+        Scenario('followers_tail', lambda client, rng: client.get(f'/users/{rng.choice(tail)}/followers/')),
+        Scenario('following', lambda client, rng: client.get(f'/users/{rng.choice(ranking)}/following/')),
+        Scenario('relationship_check', lambda client, rng: client.post(
+            '/users/user-relationships/check/', {'user_ids': rng.sample(ranking, 100)}, format='json'
+        )),
+        Scenario('profile_detail', own_profile),
+        Scenario('follow_unfollow', follow_toggle),
+    ]
+
+
+def measure(scenario, client, requests, warmup, rng):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        response = scenario.request(client, rng)
+        assert response.status_code == scenario.expected, (scenario.name, response.status_code)
+
+    latencies = []
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for _ in range(requests):
+            began = time.perf_counter()
+            scenario.request(client, rng)
+            latencies.append((time.perf_counter() - began) * 1000)
+        elapsed = time.perf_counter() - start
+    stats = percentiles(latencies)
+    return {
+        'requests_per_second': round(requests / elapsed, 1),
+        'p50_ms': round(stats['p50'], 2),
+        'p99_ms': round(stats['p99'], 2),
+        'queries_per_request': round(len(queries) / requests, 2),
+    }
+
+
+def run(users, mix, average_following, exponent, requests, warmup, only=None):
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+
+    from accounts.jobs import PROFILE_MODELS
+    from accounts.models import User
+
+    rng = random.Random(42)
+    with_seed = time.perf_counter()
+    user_ids = seed_users(users, mix, rng)
+    ranking = seed_follows(user_ids, average_following, exponent, rng)
+    profiles = [
+        (user_type, user_id, profile_id)
+        for user_type, model in PROFILE_MODELS.items()
+        for user_id, profile_id in model.objects.values_list('user_id', 'pk')[:500]
+    ]
+    seeding = time.perf_counter() - with_seed
+
+    admin = User.objects.create_superuser('bench-admin', '+254799999999', 'admin@example.com', 'pw')
+    client = APIClient()
+    client.force_authenticate(admin)
+
+    results = {}
+    # Queue jobs instead of running them inline, as in production.
+    with override_settings(JOBS_EAGER=False):
+        for scenario in scenarios(admin, ranking, profiles):
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = measure(scenario, client, requests, warmup, rng)
+    return {
+        'environment': environment(),
+        'parameters': {
+            'users': users, 'mix': mix, 'average_following': average_following,
+            'exponent': exponent, 'requests': requests, 'warmup': warmup,
+        },
+        'graph': {
+            'edges': sum(User.objects.values_list('following_count', flat=True)),
+            'max_followers': max(User.objects.values_list('followers_count', flat=True)),
+            'seed_seconds': round(seeding, 2),
+        },
+        'endpoints': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help="Profile type shares, e.g. REGULAR=0.85,FOOTBALLER=0.1,MANAGER=0.03,ORGANISATION=0.02")
+    parser.add_argument('--average-following', type=int, default=20)
+    parser.add_argument('--exponent', type=float, default=1.1,
+                        help="Power-law exponent of the follower distribution")
+    parser.add_argument('--requests', type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--only', nargs='*', help="Endpoint scenarios to run")
+    parser.add_argument('--output')
+    add_database_argument(parser)
+    args = parser.parse_args()
+
+    setup_django(args.database_url)
+    with test_database():
+        results = run(args.users, args.mix, args.average_following, args.exponent,
+                      args.requests, args.warmup, args.only)
+    env = results['environment']
+    output = args.output or RESULTS_DIR / f"accounts_api-{env['commit'] or 'local'}-{env['database']}.json"
+    write_results('accounts_api', results, output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+The async accounts endpoints (accounts.async_views) against the DRF
+viewsets they mirror: served through Django's in-process ASGI handler at
+several concurrency levels, and the viewsets through the WSGI handler for
+reference.
+
+    python -m benchmarks.async_views --users 1000 --requests 400 --concurrency 1 50 200
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.seed import seed_follows, seed_users
+from benchmarks.utils import (
+    add_database_argument, environment, percentiles, setup_django, test_database, write_results
+)
+
+
+def endpoints(ranking, owner):
+    """name -> (sync path, async path, headers-owner); paths take a random user id."""
+    profile_path = f"{owner['type']}-profiles/{owner['profile']}/"
+    return {
+        'user_detail': (lambda pk: f'/users/{pk}/', lambda pk: f'/users/async/{pk}/', 'admin'),
+        'followers': (lambda pk: f'/users/{pk}/followers/', lambda pk: f'/users/async/{pk}/followers/', 'admin'),
+        'following': (lambda pk: f'/users/{pk}/following/', lambda pk: f'/users/async/{pk}/following/', 'admin'),
+        'profile_detail': (lambda pk: f'/users/{profile_path}', lambda pk: f'/users/async/{profile_path}', 'owner'),
+    }
+
+
+def summarise(latencies, elapsed):
+    stats = percentiles(latencies)
+    return {
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(stats['p50'], 2),
+        'p99_ms': round(stats['p99'], 2),
+    }
+
+
+def run_wsgi(path, ids, headers, requests):
+    from django.test import Client
+
+    client = Client(headers=headers)
+    latencies = []
+    start = time.perf_counter()
+    for pk in ids[:requests]:
+        began = time.perf_counter()
+        response = client.get(path(pk))
+        latencies.append((time.perf_counter() - began) * 1000)
+        assert response.status_code == 200, (path(pk), response.status_code)
+    return summarise(latencies, time.perf_counter() - start)
+
+
+async def run_asgi(path, ids, headers, requests, concurrency):
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    latencies = []
+    queue = iter(ids[:requests])
+
+    async def worker():
+        for pk in queue:
+            began = time.perf_counter()
+            response = await client.get(path(pk), headers=headers)
+            latencies.append((time.perf_counter() - began) * 1000)
+            assert response.status_code == 200, (path(pk), response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarise(latencies, time.perf_counter() - start)
+
+
+def run(users, requests, concurrency_levels):
+    from knox.models import AuthToken
+
+    from accounts.jobs import PROFILE_MODELS
+    from accounts.models import User
+
+    rng = random.Random(7)
+    ranking = seed_follows(seed_users(users, rng=rng), rng=rng)
+    admin = User.objects.create_superuser('bench-admin', '+254799999999', 'admin@example.com', 'pw')
+    footballer = PROFILE_MODELS[User.FOOTBALLER].objects.select_related('user').first()
+    tokens = {
+        'admin': AuthToken.objects.create(user=admin)[1],
+        'owner': AuthToken.objects.create(user=footballer.user)[1],
+    }
+    owner = {'type': 'footballer', 'profile': footballer.pk}
+    ids = [rng.choice(ranking) for _ in range(requests)]
+
+    results = {}
+    for name, (sync_path, async_path, who) in endpoints(ranking, owner).items():
+        headers = {'Authorization': f'Token {tokens[who]}'}
+        # Warm the object and token caches the same way for every mode.
+        run_wsgi(sync_path, ids, headers, requests)
+        results[name] = {'wsgi_sync': run_wsgi(sync_path, ids, headers, requests)}
+        for concurrency in concurrency_levels:
+            for mode, path in (('asgi_sync', sync_path), ('asgi_async', async_path)):
+                results[name][f'{mode}_c{concurrency}'] = asyncio.run(
+                    run_asgi(path, ids, headers, requests, concurrency)
+                )
+    return {
+        'environment': environment(),
+        'parameters': {'users': users, 'requests': requests, 'concurrency': concurrency_levels},
+        'endpoints': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=400, help="Requests per endpoint and mode")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 50])
+    parser.add_argument('--output')
+    add_database_argument(parser)
+    args = parser.parse_args()
+
+    setup_django(args.database_url)
+    with test_database():
+        results = run(args.users, args.requests, args.concurrency)
+    write_results('async_views', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
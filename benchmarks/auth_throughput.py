@@ -0,0 +1,77 @@
+"""
+Authenticated requests per second on GET /users/<pk>/ with HTTP Basic
+(a PBKDF2 check per request), knox tokens, and cached knox tokens.
+
+    python -m benchmarks.auth_throughput --requests 200
+"""
+import argparse
+import base64
+import time
+
+from benchmarks.utils import percentiles, setup_django, test_database, write_results
+
+
+def run(requests):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from knox.auth import TokenAuthentication
+    from knox.models import AuthToken
+    from rest_framework.authentication import BasicAuthentication
+    from rest_framework.test import APIClient
+
+    from accounts.models import User
+    from accounts.views import UserViewSet
+    from authentication.auth import CachedTokenAuthentication
+
+    password = 'benchmark-password'
+    user = User.objects.create_superuser('bench', '+254700000000', 'bench@example.com', password)
+    _, token = AuthToken.objects.create(user=user)
+    basic = base64.b64encode(f'bench:{password}'.encode()).decode()
+
+    modes = {
+        'basic': ([BasicAuthentication], f'Basic {basic}'),
+        'token': ([TokenAuthentication], f'Token {token}'),
+        'cached_token': ([CachedTokenAuthentication], f'Token {token}'),
+    }
+    url = f'/users/{user.pk}/'
+    results = {}
+    original = UserViewSet.authentication_classes
+    try:
+        for name, (classes, header) in modes.items():
+            UserViewSet.authentication_classes = classes
+            client = APIClient(HTTP_AUTHORIZATION=header)
+            assert client.get(url).status_code == 200, name
+            latencies = []
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(requests):
+                    began = time.perf_counter()
+                    client.get(url)
+                    latencies.append((time.perf_counter() - began) * 1000)
+                elapsed = time.perf_counter() - start
+            stats = percentiles(latencies)
+            results[name] = {
+                'requests_per_second': round(requests / elapsed, 1),
+                'p50_ms': round(stats['p50'], 2),
+                'p99_ms': round(stats['p99'], 2),
+                'queries_per_request': round(len(queries) / requests, 2),
+            }
+    finally:
+        UserViewSet.authentication_classes = original
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        results = run(args.requests)
+    write_results('auth_throughput', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
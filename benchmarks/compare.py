@@ -0,0 +1,64 @@
+"""
+Compare two benchmark result files endpoint by endpoint.
+
+    python -m benchmarks.compare benchmarks/results/accounts_api-abc123-sqlite.json \
+        benchmarks/results/accounts_api-def456-sqlite.json --threshold 10
+
+Exits non-zero when a latency or query count got worse by more than
+--threshold percent.
+"""
+import argparse
+import json
+import sys
+
+# Metric -> whether a higher value is better.
+METRICS = {
+    'requests_per_second': True,
+    'p50_ms': False,
+    'p99_ms': False,
+    'queries_per_request': False,
+}
+
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)['results']
+    return data.get('endpoints', data)
+
+
+def compare(base, head, threshold):
+    regressions = []
+    rows = []
+    for endpoint in sorted(set(base) & set(head)):
+        for metric, higher_is_better in METRICS.items():
+            if metric not in base[endpoint] or metric not in head[endpoint]:
+                continue
+            before, after = base[endpoint][metric], head[endpoint][metric]
+            change = (after - before) / before * 100 if before else 0.0
+            worse = -change if higher_is_better else change
+            # Query counts are exact, so any increase counts.
+            regressed = after > before if metric == 'queries_per_request' else worse > threshold
+            rows.append((endpoint, metric, before, after, change, regressed))
+            if regressed:
+                regressions.append((endpoint, metric))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Allowed slowdown in percent before a timing counts as a regression")
+    args = parser.parse_args()
+
+    rows, regressions = compare(load(args.base), load(args.head), args.threshold)
+    for endpoint, metric, before, after, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{endpoint:<22} {metric:<20} {before:>10} -> {after:<10} {change:+7.1f}%{flag}')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Primary key insert throughput of time-ordered ids (core.ids) against the
+random shortuuid keys they replace. Rows go into a scratch table shaped like
+League's key column, so slug generation and signals don't mask index cost.
+
+    python -m benchmarks.id_inserts --rows 200000 --batch-size 1000
+"""
+import argparse
+
+from benchmarks.utils import setup_django, test_database, timer, write_results
+
+
+def run(connection, rows, batch_size):
+    import shortuuid
+    from core.ids import generate_id
+
+    generators = {
+        'shortuuid': shortuuid.uuid,
+        'time_ordered': generate_id,
+    }
+    results = {}
+    with connection.cursor() as cursor:
+        for name, generate in generators.items():
+            cursor.execute('DROP TABLE IF EXISTS benchmark_keys')
+            cursor.execute('CREATE TABLE benchmark_keys (id varchar(255) PRIMARY KEY, name varchar(255))')
+            with timer() as elapsed:
+                for start in range(0, rows, batch_size):
+                    cursor.executemany(
+                        'INSERT INTO benchmark_keys (id, name) VALUES (%s, %s)',
+                        [(generate(), f'row {i}') for i in range(start, min(start + batch_size, rows))]
+                    )
+            results[name] = {
+                'rows': rows,
+                'seconds': round(elapsed['seconds'], 3),
+                'rows_per_second': round(rows / elapsed['seconds']),
+            }
+        cursor.execute('DROP TABLE benchmark_keys')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database() as connection:
+        results = run(connection, args.rows, args.batch_size)
+    write_results('id_inserts', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Fan-out of live match updates through matches.hub: many subscriptions
+spread over a few matches, each receiving bursts of score updates.
+Reports delivery latency (publish to the subscriber's coroutine waking up),
+how many updates were coalesced into each batch, and the memory held per
+subscription. Sockets are left out, so this measures the hub itself.
+
+    python -m benchmarks.live_scores --connections 20000 --matches 10 --bursts 20 --burst-size 5
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+from benchmarks.utils import environment, percentiles, setup_django, write_results
+
+
+async def run(connections, matches, bursts, burst_size, interval):
+    from matches.hub import Hub
+
+    hub = Hub(interval=interval)
+    channels = [f'match-{i}' for i in range(matches)]
+    latencies = []
+    delivered = 0
+    sent_at = {}
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    subscriptions = [hub.subscribe(channels[i % matches]) for i in range(connections)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    per_connection = sum(stat.size_diff for stat in after.compare_to(before, 'filename')) / connections
+
+    async def consume(subscription):
+        nonlocal delivered
+        while True:
+            data = await subscription.next()
+            if data is None:
+                return
+            latencies.append((time.perf_counter() - sent_at[subscription.channel]) * 1000)
+            delivered += 1
+
+    consumers = [asyncio.ensure_future(consume(subscription)) for subscription in subscriptions]
+    rng = random.Random(7)
+    start = time.perf_counter()
+    for burst in range(bursts):
+        for channel in channels:
+            # Latency is measured from the first update of each batch.
+            sent_at[channel] = time.perf_counter()
+            for score in range(burst_size):
+                hub.publish(channel, {'match': {'id': channel, 'home_score': score},
+                                      'event': {'kind': 'GOAL', 'minute': rng.randint(1, 90)}})
+        # Each burst lands in one batch per match; wait until every
+        # subscription has it so bursts don't overlap.
+        while delivered < (burst + 1) * connections:
+            await asyncio.sleep(interval / 10)
+    elapsed = time.perf_counter() - start
+
+    for subscription in subscriptions:
+        subscription.close()
+    await asyncio.gather(*consumers)
+
+    stats = percentiles(latencies)
+    return {
+        'environment': environment(),
+        'parameters': {'connections': connections, 'matches': matches, 'bursts': bursts,
+                       'burst_size': burst_size, 'interval': interval},
+        'messages_published': hub.received,
+        'batches_encoded': hub.batches,
+        'coalescing_ratio': round(hub.received / max(hub.batches, 1), 1),
+        'deliveries': delivered,
+        'deliveries_per_second': round(delivered / elapsed, 1),
+        'latency_p50_ms': round(stats['p50'], 2),
+        'latency_p99_ms': round(stats['p99'], 2),
+        'bytes_per_connection': round(per_connection),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=20000)
+    parser.add_argument('--matches', type=int, default=10)
+    parser.add_argument('--bursts', type=int, default=20)
+    parser.add_argument('--burst-size', type=int, default=5, help="Updates per match in each burst")
+    parser.add_argument('--interval', type=float, default=0.05, help="Coalescing interval in seconds")
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    results = asyncio.run(run(args.connections, args.matches, args.bursts, args.burst_size, args.interval))
+    write_results('live_scores', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Goal alert delivery for a club with many fans: a goal is recorded, the
+queue is drained by an in-process core.jobs.Worker, and the time to fan
+out and write every inbox entry is reported. A second goal inside the
+coalescing window measures the update path, where each fan's entry is
+folded into rather than added.
+
+    python -m benchmarks.notifications --users 20000 --chunk-size 1000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timezone
+
+from benchmarks.seed import seed_users
+from benchmarks.utils import add_database_argument, environment, setup_django, test_database, write_results
+
+
+def drain(worker):
+    from core.models import Job
+
+    start = time.perf_counter()
+    processed = worker.processed
+    while worker.run_once():
+        pass
+    elapsed = time.perf_counter() - start
+    assert not Job.objects.filter(status=Job.FAILED).exists(), "a job failed"
+    return processed, elapsed
+
+
+def run(users, fan_share, chunk_size, batch_size):
+    from django.test import override_settings
+    from clubs.models import Club
+    from core.jobs import Worker
+    from core.models import Job
+    from leagues.models import League
+    from matches.models import Match, MatchEvent
+    from matches.services import record_event
+    from notifications import services
+    from notifications.models import Favourite, Notification
+
+    rng = random.Random(7)
+    user_ids = seed_users(users, rng=rng)
+    league = League.objects.create(name='Bench League', short_name='BL', country='KE')
+    home = Club.objects.create(name='Bench Home', full_name='Bench Home', short_name='BH', league=league)
+    away = Club.objects.create(name='Bench Away', full_name='Bench Away', short_name='BA', league=league)
+    fans = rng.sample(user_ids, int(len(user_ids) * fan_share))
+    Favourite.objects.bulk_create([Favourite(user_id=pk, club=home) for pk in fans], batch_size=5000)
+    match = Match.objects.create(league=league, season='2026/27', home_club=home, away_club=away,
+                                 kickoff=datetime(2026, 10, 18, 15, tzinfo=timezone.utc))
+    Job.objects.all().delete()
+
+    services.NOTIFICATIONS_CHUNK_SIZE = chunk_size
+    worker = Worker(batch_size=batch_size)
+    results = {}
+    with override_settings(JOBS_EAGER=False):
+        for name, minute in (('first_goal', 10), ('coalesced_goal', 20)):
+            record_event(match, MatchEvent.GOAL, minute=minute, club=home)
+            before, elapsed = drain(worker)
+            results[name] = {
+                'jobs': worker.processed - before,
+                'seconds': round(elapsed, 3),
+                'recipients_per_second': round(len(fans) / elapsed, 1),
+                'jobs_per_second': round((worker.processed - before) / elapsed, 1),
+            }
+    results['inbox_entries'] = Notification.objects.count()
+    return {
+        'environment': environment(),
+        'parameters': {'users': users, 'fans': len(fans), 'chunk_size': chunk_size, 'batch_size': batch_size},
+        'delivery': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--fan-share', type=float, default=0.5, help="Share of users following the scoring club")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Recipients per deliver job")
+    parser.add_argument('--batch-size', type=int, default=20, help="Jobs the worker claims at a time")
+    parser.add_argument('--output')
+    add_database_argument(parser)
+    args = parser.parse_args()
+
+    setup_django(args.database_url)
+    with test_database():
+        results = run(args.users, args.fan_share, args.chunk_size, args.batch_size)
+    write_results('notifications', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
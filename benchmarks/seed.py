@@ -0,0 +1,79 @@
+"""
+Synthetic data for the benchmarks: users with a configurable profile type
+mix and a follow graph whose in-degree follows a power law, as on real
+social graphs (a few accounts with very many followers, a long tail with
+few).
+"""
+import io
+import random
+
+from django.contrib.auth.hashers import make_password
+
+
+DEFAULT_MIX = {'REGULAR': 0.85, 'FOOTBALLER': 0.1, 'MANAGER': 0.03, 'ORGANISATION': 0.02}
+
+
+def parse_mix(value):
+    """Parse "REGULAR=0.85,FOOTBALLER=0.1,..." into a mix dict."""
+    mix = {}
+    for part in value.split(','):
+        user_type, _, share = part.partition('=')
+        mix[user_type.strip().upper()] = float(share)
+    return mix
+
+
+def seed_users(count, mix=None, rng=None):
+    """Create `count` users of the mixed types with their profiles; return their ids."""
+    from accounts.jobs import PROFILE_MODELS
+    from accounts.models import User
+
+    rng = rng or random.Random(0)
+    mix = mix or DEFAULT_MIX
+    types = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    password = make_password('benchmark-password')
+    users = [
+        User(username=f'bench{i}', email=f'bench{i}@example.com', phone_number=f'+2547{i:08d}',
+             firstname=f'First{i}', lastname=f'Last{i}', password=password,
+             user_type=user_type, is_verified=user_type != User.REGULAR)
+        for i, user_type in enumerate(types)
+    ]
+    # bulk_create skips the provisioning signal, so profiles are made here.
+    User.objects.bulk_create(users, batch_size=1000)
+    for user_type, model in PROFILE_MODELS.items():
+        model.objects.bulk_create(
+            [model(user=user) for user in users if user.user_type == user_type], batch_size=1000
+        )
+    return [user.pk for user in users]
+
+
+def seed_follows(user_ids, average_following=20, exponent=1.1, rng=None):
+    """
+    Give each user a follow list: how many accounts they follow is drawn
+    around `average_following`, and whom they follow is drawn with weight
+    1 / rank ** exponent over a shuffled popularity ranking.
+    """
+    from django.core.management import call_command
+    from accounts.models import UserRelationship
+
+    rng = rng or random.Random(1)
+    ranking = list(user_ids)
+    rng.shuffle(ranking)
+    weights = [1 / (rank ** exponent) for rank in range(1, len(ranking) + 1)]
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+
+    edges = []
+    for follower_id in user_ids:
+        following = min(int(rng.expovariate(1 / average_following)) + 1, len(user_ids) - 1)
+        targets = set(rng.choices(ranking, cum_weights=cumulative, k=following))
+        targets.discard(follower_id)
+        edges.extend(UserRelationship(follower_id=follower_id, following_id=target) for target in targets)
+        if len(edges) >= 10000:
+            UserRelationship.objects.bulk_create(edges, ignore_conflicts=True)
+            edges = []
+    UserRelationship.objects.bulk_create(edges, ignore_conflicts=True)
+    call_command('sync_follow_counts', stdout=io.StringIO())
+    return ranking
@@ -0,0 +1,95 @@
+"""
+Per-request cost of core.throttling.TokenBucketThrottle, measured against
+a minimal DRF view with no throttle, DRF's own ScopedRateThrottle (which
+reads, rewrites and stores a list of timestamps per key) for reference,
+and the token bucket on an unscoped view, in a granted and a denied state.
+Uses the THROTTLE_CACHE_ALIAS cache; LocMemCache unless configured.
+
+    python -m benchmarks.throttle_overhead --requests 20000
+"""
+import argparse
+import time
+from unittest import mock
+
+from benchmarks.utils import environment, percentiles, setup_django, write_results
+
+
+def measure(view, requests, clients):
+    from rest_framework.test import APIRequestFactory
+
+    factory = APIRequestFactory()
+    prepared = [
+        factory.post('/bench/', REMOTE_ADDR=f'10.0.{i // 256 % 256}.{i % 256}')
+        for i in range(clients)
+    ]
+    latencies = []
+    statuses = {}
+    for i in range(requests):
+        request = prepared[i % clients]
+        began = time.perf_counter()
+        response = view(request)
+        latencies.append((time.perf_counter() - began) * 1_000_000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    stats = percentiles(latencies)
+    return {'p50_us': round(stats['p50'], 1), 'p99_us': round(stats['p99'], 1),
+            'mean_us': round(stats['mean'], 1), 'statuses': statuses}
+
+
+def run(requests, clients):
+    from django.core.cache import caches
+    from rest_framework.response import Response
+    from rest_framework.throttling import ScopedRateThrottle
+    from rest_framework.views import APIView
+    from core import throttling
+
+    class Bench(APIView):
+        authentication_classes = []
+        permission_classes = []
+        throttle_scope = 'bench'
+
+        def post(self, request):
+            return Response({'ok': True})
+
+    class DRFScoped(ScopedRateThrottle):
+        THROTTLE_RATES = {'bench': '1000000/min'}
+
+    variants = {
+        'no_throttle': Bench.as_view(throttle_classes=[]),
+        'drf_scoped': Bench.as_view(throttle_classes=[DRFScoped]),
+        'token_bucket_unscoped': Bench.as_view(throttle_classes=[throttling.TokenBucketThrottle], throttle_scope=None),
+        'token_bucket_granted': Bench.as_view(throttle_classes=[throttling.TokenBucketThrottle]),
+    }
+    results = {}
+    with mock.patch.object(throttling, 'THROTTLE_RATES', {'bench': {'ip': '1000000/min'}}):
+        for name, view in variants.items():
+            caches[throttling.THROTTLE_CACHE_ALIAS].clear()
+            measure(view, min(requests, 1000), clients)
+            results[name] = measure(view, requests, clients)
+    with mock.patch.object(throttling, 'THROTTLE_RATES', {'bench': {'ip': '1/hour'}}):
+        caches[throttling.THROTTLE_CACHE_ALIAS].clear()
+        results['token_bucket_denied'] = measure(variants['token_bucket_granted'], requests, clients)
+
+    baseline = results['no_throttle']['mean_us']
+    for name, result in results.items():
+        result['overhead_us'] = round(result['mean_us'] - baseline, 1)
+    return {
+        'environment': environment(),
+        'cache': caches[throttling.THROTTLE_CACHE_ALIAS].__class__.__name__,
+        'parameters': {'requests': requests, 'clients': clients},
+        'variants': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=100, help="Distinct client addresses, i.e. buckets")
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    write_results('throttle_overhead', run(args.requests, args.clients), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import json
+import os
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import django
+
+
+def setup_django(database_url=None):
+    """
+    Configure Django. `database_url` (e.g. postgres://user:pw@localhost/fs_api)
+    replaces the default database, so one suite runs against SQLite or Postgres.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fs_api.settings')
+    if database_url:
+        import environ
+        from django.conf import settings
+        settings.DATABASES['default'] = environ.Env.db_url_config(database_url)
+    django.setup()
+
+
+def add_database_argument(parser):
+    parser.add_argument('--database-url', default=os.environ.get('BENCHMARK_DATABASE_URL'),
+                        help="Database to run against (default: the settings database, i.e. SQLite)")
+
+
+def environment():
+    """Describe what the results were measured on, for comparing runs."""
+    from django.db import connection
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'database': connection.vendor}
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """Create the test database for the duration of a benchmark."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+@contextmanager
+def timer():
+    result = {}
+    start = time.perf_counter()
+    yield result
+    result['seconds'] = time.perf_counter() - start
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return {'p50': 0.0, 'p99': 0.0, 'mean': 0.0}
+    return {
+        'p50': ordered[int(0.50 * (len(ordered) - 1))],
+        'p99': ordered[int(0.99 * (len(ordered) - 1))],
+        'mean': statistics.fmean(ordered),
+    }
+
+
+def write_results(name, results, output=None):
+    """Print results and, if `output` is given, store them as JSON for comparison."""
+    print(json.dumps(results, indent=2, default=str))
+    if output:
+        path = Path(output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'benchmark': name, 'results': results}, indent=2, default=str))
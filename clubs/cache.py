@@ -0,0 +1,9 @@
+from core.cache import ObjectCache
+
+
+def club_queryset():
+    from .models import Club
+    return Club.objects.select_related('league')
+
+
+club_cache = ObjectCache('clubs.Club', lookups=['slug'], queryset=club_queryset)
@@ -1,23 +1,20 @@
 from django.db import models
-from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
-import shortuuid
-from django_countries.fields import CountryField
-from autoslug import AutoSlugField
-
+from core.ids import generate_id
+from core.slugs import SlugFromNameMixin
 from leagues.models import League
 
 
-class Club(models.Model):
+class Club(SlugFromNameMixin, models.Model):
     id = models.CharField(_(u'id'),
                           primary_key=True,
                           max_length=255,
-                          default=shortuuid.ShortUUID().random(4),
+                          default=generate_id,
                           help_text=u'Club ID',
                           db_index=True)
     name = models.CharField(max_length=255)
-    slug = AutoSlugField(populate_from='name', unique=True)
+    slug = models.SlugField(max_length=255, unique=True, editable=False)
     full_name = models.CharField(max_length=155)
     short_name = models.CharField(max_length=55)
     logo = models.URLField(blank=True, null=True)
@@ -28,7 +25,3 @@ class Club(models.Model):
 
     def __str__(self):
         return self.name
-    
-    def save(self, **kwargs):
-        self.slug = slugify(self.name)
-        super().save()
\ No newline at end of file
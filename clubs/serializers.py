@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from leagues.models import League
+from core.metrics import TimedSerializerMixin
+from .models import Club
+
+class ClubSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    league = serializers.SlugRelatedField(slug_field='slug', queryset=League.objects.all())
+
+    class Meta:
+        model = Club
+        fields = ['id', 'name', 'slug', 'full_name', 'short_name', 'logo',
+                  'year_established', 'league', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'slug']
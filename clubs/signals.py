@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.response_cache import bump
+from leagues.models import League
+from .cache import club_cache
+from .models import Club
+
+@receiver([post_save, post_delete], sender=Club)
+def invalidate_club_cache(sender, instance, **kwargs):
+    club_cache.invalidate(instance)
+    bump('clubs')
+
+@receiver(post_save, sender=League)
+def invalidate_league_clubs(sender, instance, created, **kwargs):
+    # Cached clubs carry their league; drop them when it changes.
+    if not created:
+        club_cache.invalidate_pk(*instance.club_set.values_list('pk', flat=True))
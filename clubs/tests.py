@@ -1,3 +1,45 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from core import response_cache
+from leagues.models import League
+from .models import Club
+
+
+class ClubValidatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Premier', short_name='PL', country='KE')
+        cls.club = Club.objects.create(name='Alpha', full_name='Alpha FC', short_name='ALP', league=cls.league)
+
+    def setUp(self):
+        cache.clear()
+        response_cache.cache().clear()
+
+    def rename_league(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.league.name = 'Super League'
+            self.league.save()
+
+    def test_unchanged_club_revalidates_with_304(self):
+        url = f'/clubs/{self.club.slug}/'
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        response = self.client.get('/clubs/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/clubs/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_league_rename_changes_the_club_validators(self):
+        detail = self.client.get(f'/clubs/{self.club.slug}/')
+        listing = self.client.get('/clubs/')
+        self.rename_league()
+
+        response = self.client.get(f'/clubs/{self.club.slug}/', HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['league'], 'super-league')
+        self.assertNotEqual(response['ETag'], detail['ETag'])
+
+        response = self.client.get('/clubs/', HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['league'], 'super-league')
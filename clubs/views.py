@@ -1,3 +1,41 @@
-from django.shortcuts import render
+from django.http import Http404
+from rest_framework import viewsets
+from core.mixins import ConditionalGetMixin
+from core.response_cache import ResponseCacheMixin
+from leagues.pagination import CatalogueCursorPagination
+from .cache import club_cache
+from .models import Club
+from .serializers import ClubSerializer
 
-# Create your views here.
+class ClubViewSet(ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Club.objects.select_related('league')
+    # Clubs are listed with their league's slug and filtered by its country.
+    response_cache_namespaces = ('clubs', 'leagues')
+    # The payload carries the league's slug, which changes with its name.
+    last_modified_fields = ('updated_at', 'league__updated_at')
+    serializer_class = ClubSerializer
+    pagination_class = CatalogueCursorPagination
+    lookup_field = 'slug'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        league = self.request.query_params.get('league')
+        country = self.request.query_params.get('country')
+        continent = self.request.query_params.get('continent')
+        if league:
+            queryset = queryset.filter(league__slug=league)
+        if country:
+            queryset = queryset.filter(league__country=country.upper())
+        if continent:
+            queryset = queryset.filter(league__continent=continent.upper())
+        return queryset
+
+    def get_object(self):
+        if self.action != 'retrieve':
+            return super().get_object()
+        try:
+            club = club_cache.get(slug=self.kwargs['slug'])
+        except Club.DoesNotExist:
+            raise Http404
+        self.check_object_permissions(self.request, club)
+        return club
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key', 'status', 'attempts', 'run_after', 'created_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'key')
+    readonly_fields = ('created_at', 'locked_at', 'last_error')
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,212 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+OBJECT_CACHE_ALIAS = getattr(settings, 'OBJECT_CACHE_ALIAS', 'default')
+OBJECT_CACHE_TIMEOUT = getattr(settings, 'OBJECT_CACHE_TIMEOUT', 300)
+OBJECT_CACHE_LOCAL_TIMEOUT = getattr(settings, 'OBJECT_CACHE_LOCAL_TIMEOUT', 5)
+OBJECT_CACHE_LOCAL_SIZE = getattr(settings, 'OBJECT_CACHE_LOCAL_SIZE', 1000)
+
+
+class LocalLRU:
+    """
+    Bounded, thread-safe LRU with a per-entry TTL. The TTL bounds how long
+    another process may serve an object after it was invalidated elsewhere.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class ObjectCache:
+    """
+    Read-through cache of model instances keyed by primary key, with extra
+    unique `lookups` (e.g. slug) stored as pointers to the primary key.
+
+    Reads go through a bounded in-process LRU, then the Django cache
+    backend, then the database. Call `invalidate` from post_save/post_delete
+    receivers; `invalidate_pk` drops an object whose row changed through
+    `QuerySet.update()`.
+    """
+    registry = []
+
+    def __init__(self, model, lookups=(), queryset=None, timeout=OBJECT_CACHE_TIMEOUT):
+        self.model_label = model
+        self.lookups = tuple(lookups)
+        self.get_queryset = queryset
+        self.timeout = timeout
+        self.local = LocalLRU(OBJECT_CACHE_LOCAL_SIZE, OBJECT_CACHE_LOCAL_TIMEOUT)
+        self.hits = {'local': 0, 'shared': 0}
+        self.misses = 0
+        self.registry.append(self)
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def shared(self):
+        return caches[OBJECT_CACHE_ALIAS]
+
+    def key(self, field, value):
+        return f'objcache:{self.model_label.lower()}:{field}:{value}'
+
+    def get(self, **lookup):
+        """Return the instance matching a single `pk=` or lookup field, or raise DoesNotExist."""
+        (field, value), = lookup.items()
+        if field != 'pk':
+            pk, _ = self._read(self.key(field, value))
+            if pk is not None:
+                instance = self._get_by_pk(pk)
+                if instance is not None and str(getattr(instance, field)) == str(value):
+                    return instance
+            instance = self._fetch(**lookup)
+            self._write(self.key(field, value), instance.pk)
+            return instance
+
+        instance = self._get_by_pk(value)
+        if instance is None:
+            instance = self._fetch(pk=value)
+        return instance
+
+    async def aget(self, **lookup):
+        """
+        Async `get`. Local hits return without leaving the event loop; the
+        shared cache and database are read with their async APIs.
+        """
+        (field, value), = lookup.items()
+        if field != 'pk':
+            pk, _ = await self._aread(self.key(field, value))
+            if pk is not None:
+                instance = await self._aget_by_pk(pk)
+                if instance is not None and str(getattr(instance, field)) == str(value):
+                    return instance
+            instance = await self._afetch(**lookup)
+            await self._awrite(self.key(field, value), instance.pk)
+            return instance
+
+        instance = await self._aget_by_pk(value)
+        if instance is None:
+            instance = await self._afetch(pk=value)
+        return instance
+
+    def invalidate(self, instance):
+        keys = [self.key('pk', instance.pk)] + [
+            self.key(field, getattr(instance, field)) for field in self.lookups
+        ]
+        self._delete(keys)
+
+    def invalidate_pk(self, *pks):
+        self._delete([self.key('pk', pk) for pk in pks])
+
+    def stats(self):
+        requests = sum(self.hits.values()) + self.misses
+        return {
+            'model': self.model_label,
+            'local_hits': self.hits['local'],
+            'shared_hits': self.hits['shared'],
+            'misses': self.misses,
+            'hit_ratio': (requests - self.misses) / requests if requests else 0.0,
+        }
+
+    def _get_by_pk(self, pk):
+        data, tier = self._read(self.key('pk', pk))
+        if data is None:
+            return None
+        self.hits[tier] += 1
+        return pickle.loads(data)
+
+    def _fetch(self, **lookup):
+        self.misses += 1
+        queryset = self.get_queryset() if self.get_queryset else self.model._default_manager.all()
+        # Always the primary: a lagging replica could put back the copy
+        # that was just invalidated.
+        instance = queryset.using(DEFAULT_DB_ALIAS).get(**lookup)
+        self._write(self.key('pk', instance.pk), pickle.dumps(instance, pickle.HIGHEST_PROTOCOL))
+        return instance
+
+    async def _aget_by_pk(self, pk):
+        data, tier = await self._aread(self.key('pk', pk))
+        if data is None:
+            return None
+        self.hits[tier] += 1
+        return pickle.loads(data)
+
+    async def _afetch(self, **lookup):
+        self.misses += 1
+        queryset = self.get_queryset() if self.get_queryset else self.model._default_manager.all()
+        instance = await queryset.using(DEFAULT_DB_ALIAS).aget(**lookup)
+        await self._awrite(self.key('pk', instance.pk), pickle.dumps(instance, pickle.HIGHEST_PROTOCOL))
+        return instance
+
+    def _read(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            return value, 'local'
+        value = self.shared.get(key)
+        if value is not None:
+            self.local.set(key, value)
+            return value, 'shared'
+        return None, None
+
+    def _write(self, key, value):
+        self.local.set(key, value)
+        self.shared.set(key, value, self.timeout)
+
+    async def _aread(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            return value, 'local'
+        value = await self.shared.aget(key)
+        if value is not None:
+            self.local.set(key, value)
+            return value, 'shared'
+        return None, None
+
+    async def _awrite(self, key, value):
+        self.local.set(key, value)
+        await self.shared.aset(key, value, self.timeout)
+
+    def _delete(self, keys):
+        self.local.delete_many(keys)
+        self.shared.delete_many(keys)
+        # Drop anything re-read from the old row before the write committed.
+        transaction.on_commit(lambda: (self.local.delete_many(keys), self.shared.delete_many(keys)))
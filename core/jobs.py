@@ -0,0 +1,136 @@
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS_MAX_ATTEMPTS = getattr(settings, 'JOBS_MAX_ATTEMPTS', 5)
+JOBS_LOCK_TIMEOUT = getattr(settings, 'JOBS_LOCK_TIMEOUT', 300)
+
+
+def job_name(func):
+    return func if isinstance(func, str) else f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *args, key=None, delay=0, using=None):
+    """
+    Queue `func(*args)` once the current transaction commits. `args` must be
+    JSON-serialisable. While a job with the same `key` is pending, further
+    enqueues with that key are dropped. One made while it is already
+    running is queued, since the running job may have read the state the
+    enqueue is about.
+
+    With JOBS_EAGER the job runs in-process on commit instead, which is meant
+    for tests and one-off scripts.
+    """
+    name = job_name(func)
+
+    def queue():
+        if getattr(settings, 'JOBS_EAGER', False):
+            run_job(name, list(args))
+            return
+        Job.objects.using(using).bulk_create([
+            Job(name=name, args=list(args), key=key,
+                run_after=timezone.now() + timedelta(seconds=delay)),
+        ], ignore_conflicts=True)
+
+    transaction.on_commit(queue, using=using)
+
+
+def enqueue_many(func, arg_lists, delay=0, using=None):
+    """
+    Queue `func(*args)` for each of `arg_lists` with a single insert once the
+    current transaction commits. Unkeyed, so nothing is deduplicated.
+    """
+    name = job_name(func)
+    arg_lists = [list(args) for args in arg_lists]
+
+    def queue():
+        if getattr(settings, 'JOBS_EAGER', False):
+            for args in arg_lists:
+                run_job(name, args)
+            return
+        run_after = timezone.now() + timedelta(seconds=delay)
+        Job.objects.using(using).bulk_create(
+            [Job(name=name, args=args, run_after=run_after) for args in arg_lists],
+            batch_size=1000,
+        )
+
+    transaction.on_commit(queue, using=using)
+
+
+def run_job(name, args):
+    return import_string(name)(*args)
+
+
+class Worker:
+    """
+    Polls the Job table and runs due jobs in this process. Several workers
+    can share the table: on databases with SKIP LOCKED each claims a
+    disjoint batch, elsewhere claiming is serialised by the write lock.
+    """
+
+    def __init__(self, batch_size=20, poll_interval=1.0):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self.failed = 0
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            due = (
+                Job.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=Job.PENDING, run_after__lte=now)
+                    | Q(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=JOBS_LOCK_TIMEOUT))
+                )
+                .order_by('run_after', 'id')[:self.batch_size]
+            )
+            jobs = list(due)
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(status=Job.RUNNING, locked_at=now)
+        return jobs
+
+    def run_once(self):
+        jobs = self.claim()
+        for job in jobs:
+            self.execute(job)
+        return len(jobs)
+
+    def execute(self, job):
+        try:
+            run_job(job.name, job.args)
+        except Exception:
+            self.failed += 1
+            job.attempts += 1
+            job.last_error = traceback.format_exc()
+            if job.attempts >= JOBS_MAX_ATTEMPTS:
+                job.status = Job.FAILED
+                logger.exception("Job %s failed permanently", job)
+            else:
+                job.status = Job.PENDING
+                job.run_after = timezone.now() + timedelta(seconds=2 ** job.attempts)
+            try:
+                with transaction.atomic():
+                    job.save(update_fields=['attempts', 'last_error', 'status', 'run_after'])
+            except IntegrityError:
+                # The key was enqueued again while this ran; that job redoes the work.
+                job.delete()
+        else:
+            self.processed += 1
+            job.delete()
+
+    def run(self, max_jobs=None):
+        while max_jobs is None or self.processed + self.failed < max_jobs:
+            if not self.run_once():
+                time.sleep(self.poll_interval)
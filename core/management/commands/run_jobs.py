@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the jobs that are due now and exit")
+
+    def handle(self, *args, **options):
+        worker = Worker(batch_size=options['batch_size'], poll_interval=options['poll_interval'])
+        start = time.perf_counter()
+        try:
+            if options['once']:
+                while worker.run_once():
+                    pass
+            else:
+                worker.run()
+        except KeyboardInterrupt:
+            pass
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{worker.processed} job(s) done, {worker.failed} failed in {elapsed:.2f}s "
+            f"({worker.processed / elapsed if elapsed else 0:.1f} jobs/s)"
+        ))
@@ -0,0 +1,133 @@
+"""
+In-process request metrics: per-route histograms of latency, response
+size, query count, database time and serializer time, rendered in the
+Prometheus text format by core.views.MetricsView.
+
+Each process keeps its own registry; scrape every worker (or run one
+metrics port per worker) to see the whole deployment.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .cache import ObjectCache
+
+METRICS_ENABLED = getattr(settings, 'METRICS_ENABLED', True)
+# Share of requests that also record queries, DB time and serializer time.
+METRICS_SAMPLE_RATE = getattr(settings, 'METRICS_SAMPLE_RATE', 0.1)
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label tuples."""
+
+    def __init__(self, name, help, buckets, labels=('route', 'method')):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self.series.items()]
+        for labels, counts, total in sorted(series):
+            label_text = ','.join(f'{name}="{escape(value)}"' for name, value in zip(self.labels, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_duration = Histogram('http_request_duration_seconds', 'Time spent handling the request.', SECONDS)
+response_size = Histogram('http_response_size_bytes', 'Size of non-streaming response bodies.', BYTES)
+db_queries = Histogram('http_request_db_queries', 'SQL queries per sampled request.', QUERIES)
+db_duration = Histogram('http_request_db_duration_seconds', 'Time spent in SQL per sampled request.', SECONDS)
+serializer_duration = Histogram(
+    'http_request_serializer_duration_seconds', 'Time spent in serializer to_representation per sampled request.',
+    SECONDS,
+)
+HISTOGRAMS = [request_duration, response_size, db_queries, db_duration, serializer_duration]
+
+
+class RequestSample:
+    """Timings collected for one sampled request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+current_sample = ContextVar('current_sample', default=None)
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin that adds to_representation time to the request's
+    sample. Only the outermost call is counted, so nested serializers
+    don't add twice, and the items of a many=True list add up to the list.
+    """
+
+    def to_representation(self, instance):
+        sample = current_sample.get()
+        if sample is None:
+            return super().to_representation(instance)
+        sample.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            sample.serializer_depth -= 1
+            if not sample.serializer_depth:
+                sample.serializer_time += time.perf_counter() - started
+
+
+def render():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render()
+    lines += ['# HELP object_cache_requests_total Object cache lookups by outcome.',
+              '# TYPE object_cache_requests_total counter']
+    for cache in ObjectCache.registry:
+        stats = cache.stats()
+        for outcome in ('local_hits', 'shared_hits', 'misses'):
+            lines.append(f'object_cache_requests_total{{model="{stats["model"]}",outcome="{outcome}"}} {stats[outcome]}')
+    return '\n'.join(lines) + '\n'
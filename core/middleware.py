@@ -0,0 +1,139 @@
+import hashlib
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from . import metrics
+from .routers import RoutingState, current_state
+
+
+class MetricsMiddleware:
+    """
+    Records request latency and response size for every request and, for
+    a METRICS_SAMPLE_RATE share of them, SQL query count, SQL time and
+    the time serializers using metrics.TimedSerializerMixin spend in
+    to_representation. Sampled requests carry the breakdown in a
+    Server-Timing header.
+
+    Under ASGI the SQL runs on Django's sync thread, out of reach of the
+    connection wrappers installed here, so requests served that way only
+    report serializer and total time.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not metrics.METRICS_ENABLED:
+            return self.get_response(request)
+
+        sample = self.start_sample()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            if sample is not None:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample))
+                token = metrics.current_sample.set(sample)
+                stack.callback(metrics.current_sample.reset, token)
+            response = self.get_response(request)
+        return self.record(request, response, time.perf_counter() - started, sample, with_db=True)
+
+    async def __acall__(self, request):
+        if not metrics.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        sample = self.start_sample()
+        token = metrics.current_sample.set(sample)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_sample.reset(token)
+        return self.record(request, response, time.perf_counter() - started, sample, with_db=False)
+
+    def start_sample(self):
+        return metrics.RequestSample() if random.random() < metrics.METRICS_SAMPLE_RATE else None
+
+    def record(self, request, response, elapsed, sample, with_db):
+        match = request.resolver_match
+        labels = (match.view_name if match else 'unmatched', request.method)
+        metrics.request_duration.observe(labels, elapsed)
+        if not response.streaming:
+            metrics.response_size.observe(labels, len(response.content))
+        if sample is not None:
+            timings = [f'serializer;dur={sample.serializer_time * 1000:.1f}', f'total;dur={elapsed * 1000:.1f}']
+            if with_db:
+                metrics.db_queries.observe(labels, sample.queries)
+                metrics.db_duration.observe(labels, sample.db_time)
+                timings.insert(0, f'db;dur={sample.db_time * 1000:.1f};desc="{sample.queries} queries"')
+            metrics.serializer_duration.observe(labels, sample.serializer_time)
+            response['Server-Timing'] = ', '.join(timings)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes for core.routers.ReplicaRouter. A request that writes
+    pins its client (by credentials, session or address) to the primary
+    for REPLICA_PIN_SECONDS, so e.g. a follow is visible in the follower's
+    next following list even while replicas lag.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not getattr(settings, 'DATABASE_REPLICAS', []):
+            return self.get_response(request)
+        key = self.pin_key(request)
+        state = RoutingState(pinned=cache.get(key) is not None)
+        token = current_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_state.reset(token)
+        if state.wrote:
+            cache.set(key, 1, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'DATABASE_REPLICAS', []):
+            return await self.get_response(request)
+        key = self.pin_key(request)
+        state = RoutingState(pinned=await cache.aget(key) is not None)
+        token = current_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_state.reset(token)
+        if state.wrote:
+            await cache.aset(key, 1, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    @staticmethod
+    def pin_key(request):
+        client = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            or request.META.get('REMOTE_ADDR', '')
+        )
+        return f'db:pin:{hashlib.sha256(client.encode()).hexdigest()}'
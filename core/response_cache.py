@@ -0,0 +1,179 @@
+"""
+Shared cache of rendered DRF GET responses that are the same for every
+caller who can read them, such as the catalogue endpoints.
+
+Entries are keyed by scheme, host, path, sorted query parameters,
+rendered media type and language (the reader's profile
+`preferred_language`, else their Accept-Language, narrowed to
+accounts.models.LANGUAGES), plus the current generation of each
+namespace the view declares. Save/delete receivers call
+`bump(namespace)` on commit, which moves every key of that namespace to
+a new generation in one `incr`; old entries are never looked up again
+and age out. RESPONSE_CACHE_ALIAS must be shared by every process, or a
+bump only reaches the process that made it.
+
+A miss is computed by one request at a time per key: the others wait up
+to RESPONSE_CACHE_WAIT seconds for its result before computing their own.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+from .cache import OBJECT_CACHE_LOCAL_TIMEOUT
+
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+RESPONSE_CACHE_WAIT = getattr(settings, 'RESPONSE_CACHE_WAIT', 2.0)
+# How long a computing request holds a key before others give up on it.
+RESPONSE_CACHE_LOCK_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_LOCK_TIMEOUT', 10)
+STORED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+POLL_INTERVAL = 0.02
+
+
+def cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def bump(*namespaces):
+    """Invalidate every cached response of `namespaces` once the transaction commits."""
+    def run():
+        shared = cache()
+        for namespace in namespaces:
+            key = f'respgen:{namespace}'
+            if not shared.add(key, time.time_ns(), timeout=None):
+                try:
+                    shared.incr(key)
+                except ValueError:
+                    shared.add(key, time.time_ns(), timeout=None)
+            shared.set(f'respgen-at:{namespace}', time.time(), timeout=OBJECT_CACHE_LOCAL_TIMEOUT)
+
+    transaction.on_commit(run)
+
+
+def generations(shared, namespaces):
+    """Current generations of `namespaces`, plus when each was last bumped if recently."""
+    keys = [f'respgen:{namespace}' for namespace in namespaces]
+    found = shared.get_many(keys + [f'respgen-at:{namespace}' for namespace in namespaces])
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # Generations start from the clock, so one that was evicted (or a
+        # cache that restarted) resumes above every number it has used and
+        # entries of older generations are never served again.
+        for key in missing:
+            shared.add(key, time.time_ns(), timeout=None)
+        found.update(shared.get_many(missing))
+        for key in missing:
+            found.setdefault(key, time.time_ns())
+    return found
+
+
+def language(request):
+    from accounts.jobs import PROFILE_MODELS
+    from accounts.models import LANGUAGES
+
+    codes = {code for code, _ in LANGUAGES}
+    user = request.user
+    if user and user.is_authenticated:
+        model = PROFILE_MODELS.get(user.user_type)
+        profile = getattr(user, model._meta.model_name, None) if model else None
+        if profile is not None and profile.preferred_language in codes:
+            return profile.preferred_language
+    for code, _ in parse_accept_lang_header(request.META.get('HTTP_ACCEPT_LANGUAGE', '')):
+        code = code.split('-')[0]
+        if code in codes:
+            return code
+    return 'en'
+
+
+class ResponseCacheMixin:
+    """
+    Caches `list` and `retrieve` of a viewset. Set `response_cache_namespaces`
+    to the namespaces whose `bump` must drop the view's responses.
+    """
+    response_cache_namespaces = ()
+    response_cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    def response_cache_key(self, request, current):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        # Pagination links are absolute, so the host and scheme are part of the response.
+        parts = (request.scheme, request.get_host(), request.path, query, request.accepted_media_type, language(request),
+                 *(current[f'respgen:{namespace}'] for namespace in self.response_cache_namespaces))
+        digest = hashlib.md5('|'.join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+        return f'resp:{type(self).__name__}:{digest}'
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        # The browsable API page carries the user's name and CSRF token.
+        if request.accepted_renderer.format == 'api':
+            return handler(request, *args, **kwargs)
+        shared = cache()
+        current = generations(shared, self.response_cache_namespaces)
+        key = self.response_cache_key(request, current)
+
+        entry = shared.get(key)
+        if entry is None:
+            entry = self.fill(shared, key, current, request, handler, *args, **kwargs)
+            if isinstance(entry, HttpResponse):
+                return entry
+        return self.from_entry(request, entry)
+
+    def fill(self, shared, key, current, request, handler, *args, **kwargs):
+        lock = f'{key}:lock'
+        if not shared.add(lock, 1, timeout=RESPONSE_CACHE_LOCK_TIMEOUT):
+            deadline = time.monotonic() + RESPONSE_CACHE_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                entry = shared.get(key)
+                if entry is not None:
+                    return entry
+            # Still missing; compute without storing over the holder.
+            return handler(request, *args, **kwargs)
+        try:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            entry = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'headers': {name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+            }
+            shared.set(key, entry, self.entry_timeout(current))
+        finally:
+            shared.delete(lock)
+        return entry
+
+    def entry_timeout(self, current):
+        # Other processes' object caches may serve what a bump replaced for
+        # a few more seconds; don't keep a response built from them.
+        bumped = [at for name, at in current.items() if name.startswith('respgen-at:')]
+        if bumped and time.time() - max(bumped) < OBJECT_CACHE_LOCAL_TIMEOUT:
+            return OBJECT_CACHE_LOCAL_TIMEOUT
+        return self.response_cache_timeout
+
+    def from_entry(self, request, entry):
+        headers = entry['headers']
+        last_modified = parse_http_date_safe(headers['Last-Modified']) if 'Last-Modified' in headers else None
+        response = get_conditional_response(request, etag=headers.get('ETag'), last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        for name, value in headers.items():
+            response[name] = value
+        patch_vary_headers(response, ['Accept', 'Accept-Language'])
+        return response
@@ -0,0 +1,57 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Apps whose viewset reads may be served by a replica.
+REPLICA_APPS = {'accounts', 'leagues', 'clubs'}
+
+
+class RoutingState:
+    """Per-request routing flags, set up by ReplicaPinningMiddleware."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+current_state = ContextVar('routing_state', default=None)
+
+
+class ReplicaRouter:
+    """
+    Sends reads of REPLICA_APPS models made while serving a request to a
+    random replica in DATABASE_REPLICAS. Reads stay on the primary when:
+
+    - there is no request (management commands, jobs);
+    - the request already wrote, or the client wrote within
+      REPLICA_PIN_SECONDS (read-your-writes);
+    - they happen inside a transaction on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas or model._meta.app_label not in REPLICA_APPS:
+            return None
+        state = current_state.get()
+        if state is None or state.pinned or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = current_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
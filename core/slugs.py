@@ -0,0 +1,92 @@
+import re
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+
+class SlugAllocator:
+    """
+    Hands out unique slugs against a known set of taken ones, appending
+    -2, -3, ... on conflict without going back to the database.
+    """
+
+    def __init__(self, taken=(), max_length=255, fallback='item'):
+        self.taken = set(taken)
+        self.max_length = max_length
+        self.fallback = fallback
+
+    def base(self, value):
+        return (slugify(value) or self.fallback)[:self.max_length]
+
+    def allocate(self, value):
+        base = self.base(value)
+        slug, index = base, 1
+        while slug in self.taken:
+            index += 1
+            suffix = f'-{index}'
+            slug = base[:self.max_length - len(suffix)] + suffix
+        self.taken.add(slug)
+        return slug
+
+
+def unique_slug(queryset, value, field='slug', max_length=255, fallback='item'):
+    """
+    Return a slug for `value` not used in `queryset`. A single query reads
+    the plain slug and its numbered variants, not every slug sharing its
+    first characters.
+    """
+    allocator = SlugAllocator((), max_length, fallback)
+    base = allocator.base(value)
+    # Numbered variants of long slugs cut the base short to fit the suffix;
+    # up to "-99999" they all start with `prefix`.
+    prefix = base[:max_length - 6]
+    if prefix == base:
+        prefix, variants = f'{base}-', rf'^{re.escape(base)}-[0-9]+$'
+    else:
+        variants = rf'^{re.escape(prefix)}[-a-z0-9_]*-[0-9]+$'
+    allocator.taken.update(
+        queryset.filter(Q(**{field: base}) | Q(**{f'{field}__startswith': prefix, f'{field}__regex': variants}))
+        .order_by().values_list(field, flat=True)
+    )
+    return allocator.allocate(value)
+
+
+class SlugFromNameMixin:
+    """
+    Model mixin that fills `slug` from `slug_source` when the instance is
+    created without one, or when the source changed since it was loaded.
+    Saves with `update_fields` that leave out the source never touch the slug.
+    """
+    slug_source = 'name'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Read the raw value so a deferred source field isn't fetched.
+        instance._loaded_slug_source = instance.__dict__.get(cls.slug_source)
+        return instance
+
+    def slug_needs_update(self, update_fields):
+        if update_fields is not None and self.slug_source not in update_fields:
+            return False
+        if not self.slug:
+            return True
+        loaded = getattr(self, '_loaded_slug_source', None)
+        return loaded is not None and loaded != getattr(self, self.slug_source)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.slug_needs_update(update_fields):
+            field = self._meta.get_field('slug')
+            self.slug = unique_slug(
+                type(self)._default_manager.exclude(pk=self.pk),
+                getattr(self, self.slug_source),
+                max_length=field.max_length,
+                fallback=self._meta.model_name,
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'slug'}
+        super().save(*args, **kwargs)
+        if update_fields is None or self.slug_source in update_fields:
+            # Otherwise the stored source is still the one loaded.
+            self._loaded_slug_source = self.__dict__.get(self.slug_source)
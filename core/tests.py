@@ -0,0 +1,432 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import cache, caches
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+from accounts.models import User
+from accounts.serializers import UserDetailSerializer
+from leagues.models import League
+from . import jobs, metrics, response_cache, throttling
+from .ids import ID_LENGTH, RANDOM_BITS, IdGenerator, id_timestamp
+from .models import Job
+from .middleware import ReplicaPinningMiddleware
+from .routers import ReplicaRouter, RoutingState, current_state
+from .slugs import SlugAllocator, unique_slug
+
+
+calls = []
+
+
+def record_call(*args):
+    calls.append(args)
+
+
+def fail_call(*args):
+    raise ValueError(args)
+
+
+@override_settings(JOBS_EAGER=False)
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def enqueue(self, func, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            jobs.enqueue(func, *args, **kwargs)
+
+    def test_keyed_jobs_are_queued_once_while_pending(self):
+        self.enqueue(record_call, 1, key='k')
+        self.enqueue(record_call, 1, key='k')
+        self.enqueue(record_call, 2)
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(jobs.Worker().run_once(), 2)
+        self.assertEqual(calls, [(1,), (2,)])
+        self.assertFalse(Job.objects.exists())
+
+    def test_enqueue_while_running_queues_another_run(self):
+        self.enqueue(record_call, 1, key='k')
+        claimed = jobs.Worker().claim()
+        self.enqueue(record_call, 1, key='k')
+        self.assertEqual(list(Job.objects.values_list('status', flat=True)), [Job.RUNNING, Job.PENDING])
+        worker = jobs.Worker()
+        worker.execute(claimed[0])
+        self.assertEqual(worker.run_once(), 1)
+        self.assertEqual(calls, [(1,), (1,)])
+
+    def test_failed_jobs_back_off_then_fail_permanently(self):
+        self.enqueue(fail_call, 'x')
+        worker = jobs.Worker()
+        for attempt in range(1, jobs.JOBS_MAX_ATTEMPTS + 1):
+            with self.assertLogs('core.jobs', 'ERROR') if attempt == jobs.JOBS_MAX_ATTEMPTS else nullcontext():
+                self.assertEqual(worker.run_once(), 1)
+            job = Job.objects.get()
+            self.assertEqual(job.attempts, attempt)
+            self.assertIn('ValueError', job.last_error)
+            if job.status == Job.PENDING:
+                self.assertGreater(job.run_after, timezone.now())
+                self.assertEqual(worker.run_once(), 0)
+                Job.objects.update(run_after=timezone.now())
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual((worker.processed, worker.failed), (0, jobs.JOBS_MAX_ATTEMPTS))
+
+    def test_failed_retry_yields_to_a_newer_enqueue_of_its_key(self):
+        self.enqueue(fail_call, 'x', key='k')
+        claimed = jobs.Worker().claim()
+        self.enqueue(fail_call, 'x', key='k')
+        jobs.Worker().execute(claimed[0])
+        self.assertEqual(list(Job.objects.values_list('status', 'attempts')), [(Job.PENDING, 0)])
+
+    def test_eager_jobs_run_on_commit(self):
+        with override_settings(JOBS_EAGER=True):
+            self.enqueue(record_call, 'a')
+            with self.captureOnCommitCallbacks(execute=True):
+                jobs.enqueue_many(record_call, [['b'], ['c']])
+        self.assertEqual(calls, [('a',), ('b',), ('c',)])
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+
+    def routed_read(self, model=User):
+        return self.router.db_for_read(model)
+
+    def test_reads_outside_requests_stay_on_the_primary(self):
+        self.assertEqual(self.routed_read(), 'default')
+
+    def test_request_reads_go_to_replicas_until_a_write(self):
+        token = current_state.set(RoutingState())
+        try:
+            self.assertEqual(self.routed_read(), 'replica_1')
+            self.assertIsNone(self.routed_read(Group))
+            self.router.db_for_write(User)
+            self.assertEqual(self.routed_read(), 'default')
+        finally:
+            current_state.reset(token)
+
+    def test_writing_client_is_pinned_to_the_primary(self):
+        routed = []
+
+        def view(request):
+            routed.append(self.routed_read())
+            if request.method == 'POST':
+                self.router.db_for_write(User)
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        factory = RequestFactory(HTTP_AUTHORIZATION='Token abc')
+        middleware(factory.get('/users/1/following/'))
+        middleware(factory.post('/users/2/follow/'))
+        middleware(factory.get('/users/1/following/'))
+        middleware(RequestFactory(HTTP_AUTHORIZATION='Token other').get('/users/1/following/'))
+        self.assertEqual(routed, ['replica_1', 'replica_1', 'default', 'replica_1'])
+
+
+@mock.patch.object(throttling, 'THROTTLE_RATES', {'follow': {'user': '3/min', 'ip': '5/min'}})
+class TokenBucketThrottleTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = caches[throttling.THROTTLE_CACHE_ALIAS]
+        self.cache.clear()
+        self.now = 1_700_000_000_000
+        patcher = mock.patch.object(throttling.time, 'time_ns', lambda: self.now * 1_000_000)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.view = SimpleNamespace(action='follow', throttle_scopes={'follow': 'follow'})
+
+    def request(self, user=None, ip='10.0.0.1', forwarded_for=None):
+        meta = {'REMOTE_ADDR': ip}
+        if forwarded_for:
+            meta['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        return SimpleNamespace(user=user or AnonymousUser(), META=meta)
+
+    def attempt(self, request):
+        throttle = throttling.TokenBucketThrottle()
+        return throttle.allow_request(request, self.view), throttle.wait()
+
+    def test_bucket_bursts_to_capacity_then_refills_evenly(self):
+        user = SimpleNamespace(pk='U1', is_authenticated=True)
+        self.assertEqual([self.attempt(self.request(user))[0] for _ in range(4)], [True, True, True, False])
+        self.assertEqual(self.attempt(self.request(user)), (False, 20))
+        self.now += 20_000
+        self.assertEqual([self.attempt(self.request(user))[0] for _ in range(2)], [True, False])
+
+    def test_user_and_ip_buckets_are_separate_and_refunded(self):
+        users = [SimpleNamespace(pk=f'U{i}', is_authenticated=True) for i in range(3)]
+        # Two users behind one address share its five tokens.
+        results = [self.attempt(self.request(users[i % 2]))[0] for i in range(6)]
+        self.assertEqual(results, [True] * 5 + [False])
+        # The denied request's user token was refunded, leaving one.
+        self.assertTrue(self.attempt(self.request(users[1], ip='10.0.0.2'))[0])
+        self.assertFalse(self.attempt(self.request(users[1], ip='10.0.0.2'))[0])
+        self.assertTrue(self.attempt(self.request(users[2], ip='10.0.0.3'))[0])
+
+    def test_views_without_a_scope_are_not_throttled(self):
+        self.view = SimpleNamespace(action='list', throttle_scopes={'follow': 'follow'})
+        self.assertTrue(all(self.attempt(self.request())[0] for _ in range(10)))
+        self.assertEqual(self.cache.get('throttle:follow:ip:10.0.0.1'), None)
+
+    def test_ip_buckets_trust_forwarded_for_only_behind_proxies(self):
+        # Rotating a spoofed header doesn't buy a fresh bucket.
+        results = [self.attempt(self.request(forwarded_for=f'192.0.2.{i}'))[0] for i in range(6)]
+        self.assertEqual(results, [True] * 5 + [False])
+        with mock.patch.object(api_settings, 'NUM_PROXIES', 1):
+            # Behind one proxy, the address it appended is the client's.
+            spoofed = [self.attempt(self.request(forwarded_for=f'192.0.2.{i}, 198.51.100.7'))[0] for i in range(6)]
+            self.assertTrue(self.attempt(self.request(forwarded_for='198.51.100.8'))[0])
+        self.assertEqual(spoofed, [True] * 5 + [False])
+
+
+class ResponseCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Premier', short_name='PL', country='KE')
+
+    def setUp(self):
+        cache.clear()
+        self.shared = response_cache.cache()
+        self.shared.clear()
+
+    def test_hits_skip_the_database_until_a_save_bumps_the_generation(self):
+        first = self.client.get('/leagues/', {'country': 'ke'})
+        with self.assertNumQueries(0):
+            second = self.client.get('/leagues/', {'country': 'ke'})
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/leagues/', {'country': 'ke'}, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.league.short_name = 'KPL'
+            self.league.save()
+        self.assertEqual(self.client.get('/leagues/', {'country': 'ke'}).json()['results'][0]['short_name'], 'KPL')
+
+    def test_language_and_query_are_part_of_the_key(self):
+        self.client.get('/leagues/', HTTP_ACCEPT_LANGUAGE='en-GB,en;q=0.8')
+        with self.assertNumQueries(0):
+            self.client.get('/leagues/', HTTP_ACCEPT_LANGUAGE='en')
+        self.assertGreater(len(self.captured_queries('/leagues/', HTTP_ACCEPT_LANGUAGE='sw')), 0)
+        self.assertGreater(len(self.captured_queries('/leagues/', {'continent': 'af'})), 0)
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_host_and_scheme_are_part_of_the_key(self):
+        League.objects.create(name='Championship', short_name='CH', country='KE')
+        self.client.get('/leagues/', {'page_size': 1}, HTTP_HOST='evil.example')
+        response = self.client.get('/leagues/', {'page_size': 1}, HTTP_HOST='api.example')
+        self.assertTrue(response.json()['next'].startswith('http://api.example/leagues/'))
+        response = self.client.get('/leagues/', {'page_size': 1}, HTTP_HOST='api.example', secure=True)
+        self.assertTrue(response.json()['next'].startswith('https://api.example/leagues/'))
+
+    def captured_queries(self, *args, **kwargs):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(*args, **kwargs)
+        return context.captured_queries
+
+    def test_lost_generations_restart_above_every_used_number(self):
+        self.client.get('/leagues/')
+        with self.captureOnCommitCallbacks(execute=True):
+            response_cache.bump('leagues')
+        bumped = self.shared.get('respgen:leagues')
+        self.client.get('/leagues/')
+        # An evicted generation must not fall back to a number whose
+        # entries are still stored.
+        self.shared.delete('respgen:leagues')
+        self.assertGreater(len(self.captured_queries('/leagues/')), 0)
+        self.assertGreater(self.shared.get('respgen:leagues'), bumped)
+
+    def test_concurrent_misses_wait_for_the_computing_request(self):
+        url = f'/leagues/{self.league.slug}/'
+        with mock.patch.object(self.shared, 'set', wraps=self.shared.set) as stored:
+            self.client.get(url)
+        key, entry, _ = next(call.args for call in stored.call_args_list if call.args[0].startswith('resp:'))
+        self.shared.delete(key)
+        # Another request holds the lock and stores its result while we wait.
+        self.assertTrue(self.shared.add(f'{key}:lock', 1))
+        with mock.patch.object(response_cache.time, 'sleep', side_effect=lambda seconds: self.shared.set(key, entry)):
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+        self.assertEqual(response.json()['slug'], self.league.slug)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class MetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', '+254700000000', 'admin@example.com', 'pw')
+
+    def setUp(self):
+        cache.clear()
+        for histogram in metrics.HISTOGRAMS:
+            histogram.clear()
+        self.client.force_login(self.admin)
+
+    def test_sampled_requests_report_queries_and_serializer_time(self):
+        samples, request_sample = [], metrics.RequestSample
+
+        def sample():
+            samples.append(request_sample())
+            return samples[-1]
+
+        with mock.patch.object(metrics, 'METRICS_SAMPLE_RATE', 1.0), \
+                mock.patch.object(metrics, 'RequestSample', sample):
+            response = self.client.get(f'/users/{self.admin.pk}/')
+        timings = dict(timing.split(';dur=', 1) for timing in response['Server-Timing'].split(', '))
+        self.assertEqual(list(timings), ['db', 'serializer', 'total'])
+        self.assertIn(f'desc="{samples[0].queries} queries"', timings['db'])
+        self.assertGreater(samples[0].serializer_time, 0)
+        self.assertEqual(samples[0].serializer_depth, 0)
+
+        with mock.patch.object(metrics, 'METRICS_SAMPLE_RATE', 0.0):
+            response = self.client.get(f'/users/{self.admin.pk}/')
+        self.assertNotIn('Server-Timing', response)
+
+        exposition = self.client.get('/metrics').content.decode()
+        self.assertIn('http_request_duration_seconds_count{route="user-detail",method="GET"} 2', exposition)
+        self.assertIn('http_request_db_queries_count{route="user-detail",method="GET"} 1', exposition)
+        self.assertIn('http_request_serializer_duration_seconds_count{route="user-detail",method="GET"} 1', exposition)
+        self.assertIn('object_cache_requests_total{model="accounts.User",outcome="misses"}', exposition)
+
+    def test_nested_serializers_are_timed_once(self):
+        sample = metrics.RequestSample()
+        token = metrics.current_sample.set(sample)
+        try:
+            with mock.patch('core.metrics.time.perf_counter', side_effect=range(100)):
+                UserDetailSerializer([self.admin, self.admin], many=True).data
+        finally:
+            metrics.current_sample.reset(token)
+        # One tick per list item: nested profile serializers don't add.
+        self.assertEqual(sample.serializer_time, 2)
+        self.assertEqual(sample.serializer_depth, 0)
+
+    def test_metrics_are_staff_only(self):
+        self.client.logout()
+        self.assertIn(self.client.get('/metrics').status_code, (401, 403))
+
+
+class SlugAllocatorTests(SimpleTestCase):
+
+    def test_collisions_get_numbered_suffixes(self):
+        allocator = SlugAllocator({'premier-league', 'premier-league-2'})
+        self.assertEqual(allocator.allocate('Premier League'), 'premier-league-3')
+        self.assertEqual(allocator.allocate('Premier  League!'), 'premier-league-4')
+        self.assertEqual(allocator.allocate('Super League'), 'super-league')
+        self.assertEqual(allocator.allocate('Super League'), 'super-league-2')
+
+    def test_fallback_and_max_length(self):
+        allocator = SlugAllocator(max_length=8, fallback='league')
+        self.assertEqual(allocator.allocate('!!!'), 'league')
+        self.assertEqual(allocator.allocate('???'), 'league-2')
+        self.assertEqual(allocator.allocate('Championship'), 'champion')
+        self.assertEqual(allocator.allocate('Championship'), 'champi-2')
+
+
+class SlugFromNameMixinTests(TestCase):
+
+    def create(self, name):
+        return League.objects.create(name=name, short_name=name[:3].upper(), country='KE')
+
+    def test_names_that_collide_get_distinct_slugs(self):
+        slugs = [self.create('Premier League').slug for _ in range(3)]
+        self.assertEqual(slugs, ['premier-league', 'premier-league-2', 'premier-league-3'])
+        self.assertEqual(unique_slug(League.objects.all(), 'Premier League'), 'premier-league-4')
+        self.assertEqual(self.create('???').slug, 'league')
+
+    def test_only_the_slug_and_its_numbered_variants_are_read(self):
+        for name in ['FC', 'FC Talanta', 'FC 2020', 'FC', 'FC-3 Stars']:
+            self.create(name)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(unique_slug(League.objects.all(), 'FC'), 'fc-3')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self.create('FC').slug, 'fc-3')
+
+        long_name = 'x' * 300
+        slugs = [unique_slug(League.objects.all(), long_name, max_length=20)]
+        for _ in range(2):
+            league = self.create('Long')
+            League.objects.filter(pk=league.pk).update(slug=slugs[-1])
+            slugs.append(unique_slug(League.objects.all(), long_name, max_length=20))
+        self.assertEqual(slugs, ['x' * 20, 'x' * 18 + '-2', 'x' * 18 + '-3'])
+
+    def test_slug_changes_only_with_the_name(self):
+        league = self.create('Premier League')
+        self.create('Super League')
+        league.short_name = 'KPL'
+        with CaptureQueriesContext(connection) as queries:
+            league.save()
+        self.assertEqual(league.slug, 'premier-league')
+        self.assertFalse([query for query in queries if 'LIKE' in query['sql']])
+
+        league.name = 'Super League'
+        league.save()
+        self.assertEqual(league.slug, 'super-league-2')
+        league.refresh_from_db()
+        self.assertEqual(league.slug, 'super-league-2')
+        # Saving the unchanged name again keeps its own slug.
+        League.objects.get(pk=league.pk).save()
+        self.assertEqual(League.objects.get(pk=league.pk).slug, 'super-league-2')
+
+    def test_update_fields_without_the_name_leave_the_slug(self):
+        league = self.create('Premier League')
+        league.name = 'Top Flight'
+        league.save(update_fields=['short_name'])
+        self.assertEqual(League.objects.values_list('name', 'slug').get(pk=league.pk),
+                         ('Premier League', 'premier-league'))
+        league.save(update_fields=['name'])
+        self.assertEqual(League.objects.values_list('name', 'slug').get(pk=league.pk), ('Top Flight', 'top-flight'))
+
+        deferred = League.objects.only('pk', 'short_name').get(pk=league.pk)
+        deferred.short_name = 'TF'
+        with CaptureQueriesContext(connection) as queries:
+            deferred.save(update_fields=['short_name'])
+        self.assertFalse([query for query in queries if '"name"' in query['sql'] or 'LIKE' in query['sql']])
+
+
+class IdGeneratorTests(SimpleTestCase):
+
+    def test_ids_are_unique_and_time_ordered(self):
+        generate = IdGenerator()
+        before = timezone.now().timestamp() * 1000
+        ids = [generate() for _ in range(5000)]
+        after = timezone.now().timestamp() * 1000
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(len(value) == ID_LENGTH for value in ids))
+        self.assertLessEqual(before - 1, id_timestamp(ids[0]))
+        self.assertLessEqual(id_timestamp(ids[-1]), after + 1)
+
+    def test_order_survives_a_clock_step_back_and_counter_overflow(self):
+        generate = IdGenerator()
+        with mock.patch('core.ids.time.time_ns', return_value=1_800_000_000_000_000_000):
+            first = generate()
+        with mock.patch('core.ids.time.time_ns', return_value=1_700_000_000_000_000_000):
+            second = generate()
+            generate.last_random = (1 << RANDOM_BITS) - 1
+            third = generate()
+        self.assertLess(first, second)
+        self.assertLess(second, third)
+        self.assertEqual(id_timestamp(second), 1_800_000_000_000)
+        self.assertEqual(id_timestamp(third), 1_800_000_000_001)
+
+    def test_ids_from_concurrent_threads_are_unique(self):
+        generate = IdGenerator()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda _: generate(), range(4000)))
+        self.assertEqual(len(set(ids)), len(ids))
@@ -0,0 +1,157 @@
+"""
+Token-bucket throttling for DRF views, with buckets per user, per client IP
+and per scope.
+
+A view opts in by naming a scope, either per action through
+`throttle_scopes = {'follow': 'follow', ...}` or for every action through
+`throttle_scope`. THROTTLE_RATES gives each scope a rate per kind of
+bucket:
+
+    THROTTLE_RATES = {
+        'follow': {'user': '60/min', 'ip': '300/min'},
+        'signup': {'ip': '5/hour'},
+    }
+
+'60/min' is a bucket of 60 tokens refilled evenly over a minute, so a
+client may burst 60 requests and then sustain one per second. 'ip'
+buckets key on the client address as DRF resolves it: REMOTE_ADDR, or
+the X-Forwarded-For entry added by the outermost of NUM_PROXIES proxies.
+
+Each bucket is one integer in the THROTTLE_CACHE_ALIAS cache holding the
+time at which it will be full again (the GCRA form of a token bucket).
+Taking a token is a single atomic `incr` by the refill interval (plus a
+`touch` to keep the bucket until it is full again); a request the bucket
+can't afford is refunded with a second `incr`. Buckets expire once full,
+so an idle client costs nothing. With the default LocMemCache
+buckets are per process; point the alias at Redis or Memcached to share
+them between processes.
+"""
+import math
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_CACHE_ALIAS = getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')
+THROTTLE_RATES = getattr(settings, 'THROTTLE_RATES', {})
+
+PERIODS = {'s': 1, 'sec': 1, 'second': 1, 'm': 60, 'min': 60, 'minute': 60,
+           'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'60/min' -> (capacity, milliseconds to refill one token)."""
+    try:
+        count, period = rate.split('/')
+        capacity, seconds = int(count), PERIODS[period.strip()]
+    except (ValueError, KeyError):
+        raise ImproperlyConfigured(f"Invalid throttle rate {rate!r}; use e.g. '60/min'")
+    return capacity, max(1, round(seconds * 1000 / capacity))
+
+
+class Bucket:
+    __slots__ = ('key', 'capacity', 'interval')
+
+    def __init__(self, key, capacity, interval):
+        self.key = key
+        self.capacity = capacity
+        self.interval = interval
+
+    def take(self, cache, now):
+        """
+        Take a token at `now` (ms). Returns 0 if granted, otherwise the
+        milliseconds until one is available.
+        """
+        try:
+            full_at = cache.incr(self.key, self.interval)
+        except ValueError:
+            # No bucket means a full one: take its first token.
+            if cache.add(self.key, now + self.interval, timeout=self.ttl(self.interval)):
+                return 0
+            # Another request created it first.
+            try:
+                full_at = cache.incr(self.key, self.interval)
+            except ValueError:
+                return 0
+        # `full_at` lags behind `now` by at most the expiry rounding for an
+        # idle bucket, so it is used as is rather than corrected, which
+        # would need a read-modify-write.
+        excess = full_at - now - self.capacity * self.interval
+        if excess > 0:
+            cache.incr(self.key, -self.interval)
+            return excess
+        cache.touch(self.key, self.ttl(full_at - now))
+        return 0
+
+    def refund(self, cache):
+        try:
+            cache.incr(self.key, -self.interval)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def ttl(milliseconds):
+        # Expire once full; cache timeouts are whole seconds on some backends.
+        return max(1, math.ceil(milliseconds / 1000))
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttles requests to views that name a scope. A request must get a
+    token from every bucket configured for its scope; when one is empty
+    the tokens already taken are returned and the response is a 429 with
+    Retry-After.
+    """
+
+    def __init__(self):
+        self.wait_ms = 0
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', None)
+        if scopes:
+            scope = scopes.get(getattr(view, 'action', None))
+            if scope:
+                return scope
+        return getattr(view, 'throttle_scope', None)
+
+    def buckets(self, request, scope, rates):
+        user = request.user
+        for kind, rate in rates.items():
+            if kind == 'user':
+                # Anonymous requests fall back to the IP bucket below.
+                if not (user and user.is_authenticated):
+                    continue
+                ident = user.pk
+            elif kind == 'ip':
+                ident = self.get_ident(request)
+            else:
+                raise ImproperlyConfigured(f"Unknown throttle bucket {kind!r} in scope {scope!r}")
+            yield Bucket(f'throttle:{scope}:{kind}:{ident}', *parse_rate(rate))
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        if scope is None:
+            return True
+        rates = THROTTLE_RATES.get(scope)
+        if not rates:
+            return True
+
+        cache = caches[THROTTLE_CACHE_ALIAS]
+        now = time.time_ns() // 1_000_000
+        taken = []
+        for bucket in self.buckets(request, scope, rates):
+            wait = bucket.take(cache, now)
+            if wait:
+                for granted in taken:
+                    granted.refund(cache)
+                self.wait_ms = wait
+                return False
+            taken.append(bucket)
+        return True
+
+    def wait(self):
+        return math.ceil(self.wait_ms / 1000) if self.wait_ms else None
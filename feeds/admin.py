@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Activity
+
+class ActivityAdmin(admin.ModelAdmin):
+    list_display = ('actor', 'verb', 'created_at')
+    list_filter = ('verb', 'created_at')
+    search_fields = ('actor__username', 'verb')
+    raw_id_fields = ('actor',)
+    date_hierarchy = 'created_at'
+
+admin.site.register(Activity, ActivityAdmin)
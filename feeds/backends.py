@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from .models import TimelineEntry
+
+
+TIMELINE_LENGTH = getattr(settings, 'FEED_TIMELINE_LENGTH', 800)
+TIMELINE_CACHE_ALIAS = getattr(settings, 'FEED_TIMELINE_CACHE', 'default')
+
+
+class DatabaseTimelineStore:
+    """
+    Keeps timelines as (owner, activity) rows. Reads are capped at
+    TIMELINE_LENGTH; `trim` deletes whatever falls beyond the cap.
+    """
+
+    def add(self, activity_id, owner_ids):
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(owner_id=owner_id, activity_id=activity_id) for owner_id in owner_ids],
+            ignore_conflicts=True,
+        )
+
+    def ids(self, owner_id, before=None, limit=TIMELINE_LENGTH):
+        entries = TimelineEntry.objects.filter(owner_id=owner_id)
+        if before is not None:
+            entries = entries.filter(activity_id__lt=before)
+        return list(entries.order_by('-activity_id').values_list('activity_id', flat=True)[:limit])
+
+    def trim(self, owner_id):
+        entries = TimelineEntry.objects.filter(owner_id=owner_id).order_by('-activity_id')
+        cutoff = entries.values_list('activity_id', flat=True)[TIMELINE_LENGTH:TIMELINE_LENGTH + 1]
+        if cutoff:
+            return entries.filter(activity_id__lte=cutoff[0]).delete()[0]
+        return 0
+
+
+class CacheTimelineStore:
+    """
+    Keeps each timeline as a capped, newest-first list of activity ids under
+    one cache key. With the default LocMemCache this is an in-process
+    stand-in for a Redis list; concurrent writers to the same timeline may
+    drop an id, which is acceptable for a home feed.
+    """
+
+    def __init__(self, alias=TIMELINE_CACHE_ALIAS):
+        self.cache = caches[alias]
+
+    def key(self, owner_id):
+        return f'feeds:timeline:{owner_id}'
+
+    def add(self, activity_id, owner_ids):
+        keys = {self.key(owner_id): owner_id for owner_id in owner_ids}
+        timelines = self.cache.get_many(keys)
+        self.cache.set_many({
+            key: [activity_id] + timelines.get(key, [])[:TIMELINE_LENGTH - 1]
+            for key in keys
+        }, timeout=None)
+
+    def ids(self, owner_id, before=None, limit=TIMELINE_LENGTH):
+        timeline = self.cache.get(self.key(owner_id), [])
+        if before is not None:
+            timeline = [activity_id for activity_id in timeline if activity_id < before]
+        return timeline[:limit]
+
+    def trim(self, owner_id):
+        # Lists are capped on every write.
+        return 0
+
+
+def get_timeline_store():
+    path = getattr(settings, 'FEED_TIMELINE_BACKEND', 'feeds.backends.DatabaseTimelineStore')
+    return import_string(path)()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from feeds.backends import TIMELINE_LENGTH, get_timeline_store
+from feeds.models import TimelineEntry
+
+
+class Command(BaseCommand):
+    help = "Delete home timeline entries beyond FEED_TIMELINE_LENGTH"
+
+    def handle(self, *args, **options):
+        store = get_timeline_store()
+        owners = (
+            TimelineEntry.objects
+            .values('owner')
+            .annotate(total=Count('id'))
+            .filter(total__gt=TIMELINE_LENGTH)
+            .values_list('owner', flat=True)
+        )
+        deleted = sum(store.trim(owner_id) for owner_id in owners)
+        self.stdout.write(self.style.SUCCESS(f"deleted {deleted} timeline entries"))
@@ -0,0 +1,48 @@
+from django.db import models
+from django.conf import settings
+
+
+class Activity(models.Model):
+    """An item published by a user that shows up on their followers' timelines"""
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="activities",
+        on_delete=models.CASCADE
+    )
+    verb = models.CharField(max_length=50)
+    payload = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name_plural = "Activities"
+        indexes = [
+            models.Index(fields=["actor", "-id"], name="activity_actor_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.actor} {self.verb}"
+
+class TimelineEntry(models.Model):
+    """A pointer from a user's home timeline to an activity fanned out on write"""
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="timeline_entries",
+        on_delete=models.CASCADE
+    )
+    activity = models.ForeignKey(
+        Activity,
+        related_name="timeline_entries",
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        unique_together = ("owner", "activity")
+        ordering = ["-activity_id"]
+        verbose_name_plural = "Timeline entries"
+        indexes = [
+            models.Index(fields=["owner", "-activity_id"], name="timeline_owner_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.owner}: {self.activity_id}"
@@ -0,0 +1,11 @@
+from rest_framework import serializers
+from accounts.serializers import UserSerializer
+from core.metrics import TimedSerializerMixin
+from .models import Activity
+
+class ActivitySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    actor = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Activity
+        fields = ['id', 'actor', 'verb', 'payload', 'created_at']
@@ -0,0 +1,65 @@
+from django.conf import settings
+
+from accounts.models import UserRelationship
+from core.jobs import enqueue
+from .backends import get_timeline_store
+from .models import Activity
+
+
+# Actors with more followers than this are not fanned out on write; their
+# activities are pulled into followers' timelines when those are read.
+FANOUT_THRESHOLD = getattr(settings, 'FEED_FANOUT_THRESHOLD', 10000)
+FANOUT_CHUNK_SIZE = getattr(settings, 'FEED_FANOUT_CHUNK_SIZE', 1000)
+
+
+def publish_activity(actor, verb, payload=None):
+    """
+    Record an activity, add it to the actor's own timeline and queue the
+    fan-out to their followers' timelines.
+    """
+    activity = Activity.objects.create(actor=actor, verb=verb, payload=payload)
+    get_timeline_store().add(activity.id, [actor.pk])
+    if actor.followers_count <= FANOUT_THRESHOLD:
+        enqueue(fan_out, activity.id, activity.actor_id)
+    return activity
+
+
+def fan_out(activity_id, actor_id):
+    """Push an activity onto the timelines of the actor's followers, in chunks."""
+    store = get_timeline_store()
+    follower_ids = (
+        UserRelationship.objects
+        .filter(following_id=actor_id)
+        .values_list('follower_id', flat=True)
+    )
+    chunk = []
+    for follower_id in follower_ids.iterator(chunk_size=FANOUT_CHUNK_SIZE):
+        chunk.append(follower_id)
+        if len(chunk) >= FANOUT_CHUNK_SIZE:
+            store.add(activity_id, chunk)
+            chunk = []
+    if chunk:
+        store.add(activity_id, chunk)
+
+
+def get_timeline(user, before=None, limit=20):
+    """
+    Return up to `limit` activities for the user's home timeline, newest
+    first and older than the activity id `before` when given. Stored entries
+    are merged with recent activities of followed high-fan-out accounts.
+    """
+    store = get_timeline_store()
+    activity_ids = set(store.ids(user.pk, before=before, limit=limit))
+
+    pulled = Activity.objects.filter(
+        actor__in=UserRelationship.objects
+        .filter(follower=user, following__followers_count__gt=FANOUT_THRESHOLD)
+        .values('following')
+    )
+    if before is not None:
+        pulled = pulled.filter(id__lt=before)
+    activity_ids.update(pulled.order_by('-id').values_list('id', flat=True)[:limit])
+
+    page_ids = sorted(activity_ids, reverse=True)[:limit]
+    activities = Activity.objects.filter(id__in=page_ids).select_related('actor').order_by('-id')
+    return list(activities)
@@ -0,0 +1,106 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User, UserRelationship
+from . import backends, services
+from .backends import CacheTimelineStore, DatabaseTimelineStore
+from .models import Activity, TimelineEntry
+from .services import get_timeline, publish_activity
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], JOBS_EAGER=True)
+class TimelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.actor, cls.star, *cls.fans = (
+                User.objects.create_user(name, f'+25475000000{i}', f'{name}@example.com', 'pw')
+                for i, name in enumerate(['actor', 'star', 'fan0', 'fan1', 'fan2'])
+            )
+            for fan in cls.fans:
+                UserRelationship.objects.create(follower=fan, following=cls.actor)
+            UserRelationship.objects.create(follower=cls.fans[0], following=cls.star)
+
+    def publish(self, actor, verb='posted'):
+        actor.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            return publish_activity(actor, verb)
+
+    def timeline(self, user):
+        return list(TimelineEntry.objects.filter(owner=user).values_list('activity_id', flat=True))
+
+    def test_activities_fan_out_to_followers_in_chunks(self):
+        with mock.patch.object(services, 'FANOUT_CHUNK_SIZE', 2), \
+                mock.patch.object(DatabaseTimelineStore, 'add', autospec=True,
+                                  side_effect=DatabaseTimelineStore.add) as add:
+            activity = self.publish(self.actor)
+        self.assertEqual([len(call.args[2]) for call in add.call_args_list], [1, 2, 1])
+        for user in [self.actor, *self.fans]:
+            self.assertEqual(self.timeline(user), [activity.id])
+        self.assertEqual(self.timeline(self.star), [])
+
+    def test_high_fanout_actors_are_merged_on_read(self):
+        with mock.patch.object(services, 'FANOUT_THRESHOLD', 0):
+            pushed = self.publish(self.star)
+            self.assertEqual(self.timeline(self.fans[0]), [])
+            own = self.publish(self.fans[0])
+            self.assertEqual(get_timeline(self.fans[0]), [own, pushed])
+            self.assertEqual(get_timeline(self.fans[0], before=own.id), [pushed])
+            self.assertEqual(get_timeline(self.fans[1]), [])
+
+    def test_timeline_endpoint_pages_with_before(self):
+        activities = [self.publish(self.actor, f'posted {i}') for i in range(3)]
+        client = APIClient()
+        client.force_authenticate(self.fans[1])
+        response = client.get('/feeds/timeline/', {'page_size': 2})
+        body = response.json()
+        self.assertEqual([item['id'] for item in body['results']], [activities[2].id, activities[1].id])
+        self.assertIn(f'before={activities[1].id}', body['next'])
+        body = client.get(body['next']).json()
+        self.assertEqual([item['id'] for item in body['results']], [activities[0].id])
+        self.assertIsNone(body['next'])
+        self.assertEqual(APIClient().get('/feeds/timeline/').status_code, 401)
+
+    def test_trim_timelines_deletes_entries_beyond_the_cap(self):
+        activities = [Activity.objects.create(actor=self.actor, verb='posted') for _ in range(4)]
+        store = DatabaseTimelineStore()
+        for activity in activities:
+            store.add(activity.id, [self.fans[0].pk, self.fans[1].pk])
+        out = StringIO()
+        with mock.patch('feeds.management.commands.trim_timelines.TIMELINE_LENGTH', 3), \
+                mock.patch.object(backends, 'TIMELINE_LENGTH', 3):
+            call_command('trim_timelines', stdout=out)
+        self.assertIn('deleted 2 timeline entries', out.getvalue())
+        newest = sorted((activity.id for activity in activities), reverse=True)[:3]
+        self.assertEqual(self.timeline(self.fans[0]), newest)
+        self.assertEqual(store.ids(self.fans[1].pk, before=newest[0], limit=1), newest[1:2])
+
+
+class CacheTimelineStoreTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['throttle'].clear()
+
+    def test_explicit_alias_is_honoured(self):
+        self.assertIs(CacheTimelineStore().cache, caches[backends.TIMELINE_CACHE_ALIAS])
+        store = CacheTimelineStore('throttle')
+        store.add(1, ['owner'])
+        self.assertEqual(caches['throttle'].get(store.key('owner')), [1])
+        self.assertIsNone(caches['default'].get(store.key('owner')))
+
+    def test_timelines_are_capped_newest_first(self):
+        store = CacheTimelineStore()
+        with mock.patch.object(backends, 'TIMELINE_LENGTH', 3):
+            for activity_id in range(1, 6):
+                store.add(activity_id, ['a', 'b'])
+        self.assertEqual(store.ids('a'), [5, 4, 3])
+        self.assertEqual(store.ids('b', before=5, limit=1), [4])
+        self.assertEqual(store.ids('c'), [])
+        self.assertEqual(store.trim('a'), 0)
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'activities', views.ActivityViewSet)
+router.register(r'timeline', views.TimelineViewSet, basename='timeline')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,39 @@
+from rest_framework import mixins, viewsets, permissions
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from .models import Activity
+from .serializers import ActivitySerializer
+from .services import publish_activity, get_timeline
+
+class ActivityViewSet(mixins.CreateModelMixin,
+                      mixins.ListModelMixin,
+                      mixins.RetrieveModelMixin,
+                      viewsets.GenericViewSet):
+    queryset = Activity.objects.all()
+    serializer_class = ActivitySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return self.queryset.filter(actor=self.request.user).select_related('actor')
+
+    def perform_create(self, serializer):
+        serializer.instance = publish_activity(self.request.user, **serializer.validated_data)
+
+class TimelineViewSet(viewsets.ViewSet):
+    """Home timeline of the requesting user, paged with a `before` activity id."""
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+
+    def list(self, request):
+        before = request.query_params.get('before')
+        before = int(before) if before and before.isdigit() else None
+        page_size = request.query_params.get('page_size', '')
+        limit = min(int(page_size), self.max_page_size) if page_size.isdigit() and int(page_size) else self.page_size
+
+        activities = get_timeline(request.user, before=before, limit=limit)
+        next_url = None
+        if len(activities) == limit:
+            next_url = replace_query_param(request.build_absolute_uri(), 'before', activities[-1].id)
+        serializer = ActivitySerializer(activities, many=True, context={'request': request})
+        return Response({'next': next_url, 'results': serializer.data})
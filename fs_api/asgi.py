@@ -2,6 +2,7 @@
 ASGI config for fs_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections go to the live match socket.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +14,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fs_api.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from matches.websocket import match_socket  # noqa: E402  (needs apps loaded)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await match_socket(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -10,12 +10,18 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 import os
 
+import environ
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+env = environ.Env()
+environ.Env.read_env(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -43,13 +49,21 @@ INSTALLED_APPS = [
     'rest_framework',
     'knox',
 
+    'core.apps.CoreConfig',
     'accounts.apps.AccountsConfig',
+    'authentication.apps.AuthenticationConfig',
     'leagues.apps.LeaguesConfig',
-    'clubs.apps.ClubsConfig'
+    'clubs.apps.ClubsConfig',
+    'feeds.apps.FeedsConfig',
+    'search.apps.SearchConfig',
+    'matches.apps.MatchesConfig',
+    'notifications.apps.NotificationsConfig',
     
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,12 +97,55 @@ WSGI_APPLICATION = 'fs_api.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Configured from the environment (see .env.example); SQLite when DB_ENGINE
+# is unset. Server databases keep connections open for DB_CONN_MAX_AGE
+# seconds with health checks, or use psycopg's pool with DB_POOL=true.
+# DB_REPLICAS lists read replicas (host[:port], or file paths for SQLite)
+# that share the primary's credentials; core.routers.ReplicaRouter sends
+# viewset reads there.
+
+def database(host=None, port=None, name=None):
+    engine = env('DB_ENGINE', default='') or 'sqlite3'
+    engine = engine if '.' in engine else f'django.db.backends.{engine}'
+    if engine.endswith('sqlite3'):
+        return {'ENGINE': engine, 'NAME': name or env('DB_NAME', default='') or BASE_DIR / 'db.sqlite3'}
+    config = {
+        'ENGINE': engine,
+        'NAME': env('DB_NAME'),
+        'USER': env('DB_USER', default=''),
+        'PASSWORD': env('DB_USER_PASS', default=''),
+        'HOST': host or env('DB_HOST', default=''),
+        'PORT': port or env('DB_PORT', default=''),
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': True,
     }
-}
+    if engine.endswith('postgresql') and env.bool('DB_POOL', default=False):
+        # Pooled connections are handed back after each request instead.
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS'] = {'pool': {
+            'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+            'timeout': env.int('DB_POOL_TIMEOUT', default=10),
+        }}
+    return config
+
+
+DATABASES = {'default': database()}
+DATABASE_REPLICAS = []
+for index, replica in enumerate(env.list('DB_REPLICAS', default=[]), 1):
+    alias = f'replica_{index}'
+    if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        DATABASES[alias] = database(name=replica)
+    else:
+        host, _, port = replica.partition(':')
+        DATABASES[alias] = database(host=host, port=port)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Seconds a client's reads stay on the primary after it wrote something,
+# covering replication lag so it sees its own follows and edits.
+REPLICA_PIN_SECONDS = env.int('DB_REPLICA_PIN_SECONDS', default=5)
 
 AUTH_USER_MODEL = "accounts.User"
 
@@ -112,6 +169,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'authentication.auth.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
@@ -119,7 +177,125 @@ REST_FRAMEWORK = {
         #'rest_framework.permissions.IsAuthenticated',
         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.TokenBucketThrottle',
+    ],
+    # Reverse proxies in front of the app. Per-IP throttling takes the
+    # client address from X-Forwarded-For as appended by the outermost of
+    # them; with 0 the header, which any client can set, is ignored.
+    'NUM_PROXIES': env.int('NUM_PROXIES', default=0),
+}
+
+# Caches
+# Configured from the environment as django-environ cache URLs, e.g.
+# CACHE_URL=redis://cache:6379/0. Invalidations, response generations and
+# throttle buckets are only shared between processes through a shared
+# backend such as Redis; the per-process LocMemCache fallbacks are for
+# development. Rendered responses get their own cache so they can't evict
+# the object cache.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://default?MAX_ENTRIES=10000'),
+    'responses': env.cache('RESPONSE_CACHE_URL', default='locmemcache://responses?MAX_ENTRIES=10000'),
+    'throttle': env.cache('THROTTLE_CACHE_URL', default='locmemcache://throttle?MAX_ENTRIES=100000'),
+}
+
+# Throttling
+# Token buckets per scope (see core.throttling); views name their scope with
+# `throttle_scope` or per action with `throttle_scopes`. Buckets live in the
+# THROTTLE_CACHE_ALIAS cache, so they are only shared between processes
+# when that cache is. Set NUM_PROXIES (above) when running behind a proxy.
+
+THROTTLE_CACHE_ALIAS = 'throttle'
+THROTTLE_RATES = {
+    'follow': {'user': '60/min', 'ip': '300/min'},
+    'signup': {'ip': '10/hour'},
+}
+
+# Object cache
+# Hot User/League/Club lookups are served from a per-process LRU in front of
+# the default cache backend. OBJECT_CACHE_LOCAL_TIMEOUT bounds how stale the
+# in-process tier can get after another process invalidates an object.
+
+OBJECT_CACHE_ALIAS = 'default'
+OBJECT_CACHE_TIMEOUT = 300
+OBJECT_CACHE_LOCAL_TIMEOUT = 5
+OBJECT_CACHE_LOCAL_SIZE = 1000
+
+# Response cache
+# Public GET responses (catalogue, search) are cached per path, query,
+# format and language; League/Club/profile saves drop them by bumping a
+# generation (core.response_cache).
+
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300
+RESPONSE_CACHE_WAIT = 2.0
+
+# Background jobs
+# Queued in the core.Job table and run by `manage.py run_jobs`. JOBS_EAGER
+# runs them in-process on commit instead (tests, one-off scripts).
+
+JOBS_EAGER = False
+JOBS_MAX_ATTEMPTS = 5
+
+# Home timelines
+# Accounts with more followers than FEED_FANOUT_THRESHOLD are merged into
+# timelines on read instead of being fanned out on write. Set
+# FEED_TIMELINE_BACKEND to feeds.backends.CacheTimelineStore to keep
+# timelines in the FEED_TIMELINE_CACHE cache alias instead of the database.
+
+FEED_FANOUT_THRESHOLD = 10000
+FEED_TIMELINE_LENGTH = 800
+FEED_TIMELINE_BACKEND = 'feeds.backends.DatabaseTimelineStore'
+
+# Token auth
+# Clients log in once at /auth/login/ with HTTP Basic and send
+# "Authorization: Token <token>" afterwards; verified tokens are cached so
+# requests skip both the password hash and the token lookup.
+
+REST_KNOX = {
+    'TOKEN_TTL': timedelta(days=7),
+    'AUTO_REFRESH': True,
 }
+TOKEN_CACHE_TIMEOUT = 300
+
+# Request metrics
+# Every request records latency and response size; METRICS_SAMPLE_RATE of
+# them also record SQL and serializer time and get a Server-Timing header.
+# Scraped per process from /metrics (staff only).
+
+METRICS_ENABLED = True
+METRICS_SAMPLE_RATE = 0.1
+
+# Live matches
+# Score updates fan out through matches.hub. LocalBackend only reaches
+# connections in the publishing process; use matches.hub.RedisBackend
+# (with MATCHES_REDIS_URL) when several processes serve live streams.
+
+MATCHES_PUBSUB_BACKEND = 'matches.hub.LocalBackend'
+MATCHES_COALESCE_INTERVAL = 0.25
+MATCHES_HEARTBEAT = 20
+
+# League tables (matches.standings): points per win/draw/loss, and how
+# long a served table is cached (it is also invalidated on every result).
+STANDINGS_POINTS = {'W': 3, 'D': 1, 'L': 0}
+STANDINGS_CACHE_TIMEOUT = 300
+
+# Notifications
+# Alerts are resolved and delivered by queued jobs (see notifications.services);
+# repeated alerts of one kind for a user within the window share an inbox entry.
+
+NOTIFICATIONS_CHUNK_SIZE = 1000
+NOTIFICATIONS_COALESCE_WINDOW = 300
+
+# Search
+# Postgres queries the catalogue tables through trigram indexes (see
+# `manage.py create_search_indexes`); other databases fall back to an
+# in-process prefix index, rebuilt in the background once it is
+# SEARCH_INDEX_MAX_AGE seconds old. Set SEARCH_BACKEND to a dotted path to
+# override.
+
+SEARCH_INDEX_MAX_AGE = 300
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
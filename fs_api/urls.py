@@ -20,9 +20,19 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path, include
 
+from core.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path("auth/", include("authentication.urls")),
     path("users/", include("accounts.urls")),
+    path("leagues/", include("leagues.urls")),
+    path("clubs/", include("clubs.urls")),
+    path("search/", include("search.urls")),
+    path("feeds/", include("feeds.urls")),
+    path("matches/", include("matches.urls")),
+    path("notifications/", include("notifications.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
 
 admin.site.site_header = "Football Social Admin"
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LeaguesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'leagues'
+
+    def ready(self):
+        import leagues.signals
@@ -0,0 +1,4 @@
+from core.cache import ObjectCache
+
+
+league_cache = ObjectCache('leagues.League', lookups=['slug'])
@@ -0,0 +1,263 @@
+import csv
+import json
+import re
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.utils.text import slugify
+from django_countries import countries
+
+from clubs.cache import club_cache
+from clubs.models import Club
+from core.response_cache import bump
+from core.slugs import SlugAllocator
+from leagues.cache import league_cache
+from leagues.models import CONTINENTS, League
+
+LEAGUE_FIELDS = ['name', 'short_name', 'logo', 'country', 'continent', 'description', 'year_established']
+CLUB_FIELDS = ['name', 'full_name', 'short_name', 'logo', 'year_established', 'league']
+CONTINENT_CODES = {code for code, _ in CONTINENTS}
+WHITESPACE = re.compile(r'\s*')
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert leagues and clubs from JSON (an array), JSON lines or CSV files. "
+        "Records are matched on `slug` when given, otherwise on name "
+        "(ignoring case) plus country (leagues) or name plus league (clubs); "
+        "clubs refer to their league by slug, short_name or id. Countries are "
+        "ISO 3166 codes or English names."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', help="League records")
+        parser.add_argument('--clubs', help="Club records")
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'],
+                            help="Defaults to each file's extension")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not options['leagues'] and not options['clubs']:
+            raise CommandError("Pass --leagues and/or --clubs")
+        # Leagues first, so clubs in the same run can refer to them.
+        if options['leagues']:
+            self.load(League, options['leagues'], options, self.league_values)
+        if options['clubs']:
+            self.load(Club, options['clubs'], options, self.club_values)
+
+    def load(self, model, path, options, to_values):
+        name = model._meta.verbose_name_plural
+        self.prepare(model)
+        started = time.monotonic()
+        upserted = skipped = 0
+
+        with open(path, newline='', encoding='utf-8') as f:
+            records = enumerate(read_records(f, options['format'] or file_format(path)), 1)
+            while True:
+                chunk = list(islice(records, options['chunk_size']))
+                if not chunk:
+                    break
+                objects = {}
+                for line, record in chunk:
+                    try:
+                        obj = self.build(model, to_values(record), record.get('slug'))
+                    except ValueError as e:
+                        skipped += 1
+                        if options['verbosity'] >= 2:
+                            self.stderr.write(f"{name} record {line} skipped: {e}")
+                        continue
+                    # A later record for the same slug wins within a chunk.
+                    objects[obj.slug] = obj
+                self.upsert(model, list(objects.values()))
+                upserted += len(objects)
+                rate = upserted / (time.monotonic() - started or 1e-9)
+                self.stdout.write(f"{upserted} {name} upserted, {skipped} skipped ({rate:,.0f}/s)")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{upserted} {name} upserted, {skipped} skipped in {elapsed:.1f}s"
+        ))
+
+    def prepare(self, model):
+        """Load what matching needs into memory: existing slugs, natural keys and league references."""
+        self.existing = {}
+        self.natural_keys = {}
+        rows = model.objects.order_by().values_list('pk', 'slug', 'name', self.scope_field(model))
+        for pk, slug, name, scope in rows.iterator(chunk_size=10000):
+            self.existing[slug] = pk
+            self.natural_keys.setdefault(natural_key(name, scope), slug)
+        self.allocator = SlugAllocator(self.existing, model._meta.get_field('slug').max_length,
+                                       fallback=model._meta.model_name)
+        if model is Club:
+            self.leagues = {}
+            ambiguous = set()
+            for pk, slug, short_name in League.objects.values_list('pk', 'slug', 'short_name').iterator():
+                self.leagues[pk] = self.leagues[slug] = pk
+                if short_name in self.leagues and self.leagues[short_name] != pk:
+                    ambiguous.add(short_name)
+                self.leagues.setdefault(short_name, pk)
+            for short_name in ambiguous:
+                self.leagues[short_name] = None
+
+    @staticmethod
+    def scope_field(model):
+        return 'league_id' if model is Club else 'country'
+
+    def build(self, model, values, slug=None):
+        key = natural_key(values['name'], values[self.scope_field(model)])
+        if slug:
+            slug = slugify(slug)
+            self.allocator.taken.add(slug)
+        elif key in self.natural_keys:
+            slug = self.natural_keys[key]
+        else:
+            slug = self.allocator.allocate(values['name'])
+        self.natural_keys[key] = slug
+        obj = model(slug=slug, **values)
+        if slug in self.existing:
+            obj.pk = self.existing[slug]
+        return obj
+
+    def league_values(self, record):
+        values = clean(League, record, [field for field in LEAGUE_FIELDS if field != 'country'])
+        country = str(record.get('country') or '').strip()
+        if not country:
+            raise ValueError("country is required")
+        values['country'] = countries.alpha2(country) or countries.by_name(country)
+        if not values['country']:
+            raise ValueError(f"unknown country {country!r}")
+        continent = values.get('continent', 'AF')
+        if not isinstance(continent, str) or continent.upper() not in CONTINENT_CODES:
+            raise ValueError(f"continent must be one of {', '.join(sorted(CONTINENT_CODES))}")
+        values['continent'] = continent.upper()
+        values['short_name'] = values.get('short_name') or ''
+        return values
+
+    def club_values(self, record):
+        values = clean(Club, record, [field for field in CLUB_FIELDS if field != 'league'])
+        reference = str(record.get('league') or '').strip()
+        league_id = self.leagues.get(reference)
+        if league_id is None:
+            raise ValueError(f"unknown or ambiguous league {reference!r}")
+        values['league_id'] = league_id
+        values['full_name'] = values.get('full_name') or values['name'][:155]
+        values['short_name'] = values.get('short_name') or ''
+        return values
+
+    def upsert(self, model, objects):
+        if not objects:
+            return
+        update_fields = [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in ('slug', 'created_at')
+        ]
+        with transaction.atomic():
+            model.objects.bulk_create(
+                objects, update_conflicts=True, unique_fields=['slug'], update_fields=update_fields
+            )
+            updated = [obj.pk for obj in objects if obj.slug in self.existing]
+            # Bulk writes skip the save signals that keep the object caches current.
+            if model is League:
+                league_cache.invalidate_pk(*updated)
+                club_cache.invalidate_pk(*Club.objects.filter(league_id__in=updated).values_list('pk', flat=True))
+                bump('leagues')
+            else:
+                club_cache.invalidate_pk(*updated)
+                bump('clubs')
+        for obj in objects:
+            self.existing.setdefault(obj.slug, obj.pk)
+
+
+def file_format(path):
+    if path.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'json' if path.endswith('.json') else 'csv'
+
+
+def read_records(f, fmt):
+    if fmt == 'csv':
+        return csv.DictReader(f)
+    if fmt == 'jsonl':
+        return (json.loads(line) for line in f if line.strip())
+    return iter_json_array(f)
+
+
+def iter_json_array(f, block_size=1 << 16):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer, position = '', 0
+
+    def peek():
+        """Skip whitespace, reading blocks as needed; return the next character or '' at the end."""
+        nonlocal buffer, position
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            buffer, position = f.read(block_size), 0
+            if not buffer:
+                return ''
+
+    def read_more():
+        nonlocal buffer, position
+        more = f.read(block_size)
+        if more:
+            buffer, position = buffer[position:] + more, 0
+        return bool(more)
+
+    if peek() != '[':
+        raise CommandError("Expected a JSON array")
+    position += 1
+    if peek() == ']':
+        return
+    while True:
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if not read_more():
+                raise CommandError("Truncated or malformed JSON array")
+            continue
+        # A number ending the block may carry on in the next one.
+        if end == len(buffer) and read_more():
+            continue
+        yield value
+        position = end
+        separator = peek()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise CommandError(f"Expected ',' or ']' in JSON array, got {separator!r}" if separator
+                               else "Truncated JSON array")
+        position += 1
+        peek()
+
+
+def natural_key(name, scope):
+    return name.casefold(), str(scope)
+
+
+def clean(model, record, fields):
+    """Map a raw record onto model field values, treating blanks as missing."""
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+    values = {}
+    for name in fields:
+        value = record.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ''):
+            continue
+        field = model._meta.get_field(name)
+        if isinstance(field, models.SmallIntegerField):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a number")
+        elif field.max_length and len(str(value)) > field.max_length:
+            raise ValueError(f"{name} is longer than {field.max_length} characters")
+        values[name] = value
+    if 'name' not in values:
+        raise ValueError("name is required")
+    return values
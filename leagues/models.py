@@ -1,11 +1,11 @@
 from django.db import models
 from django.urls import reverse
-from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
-import shortuuid
 from django_countries.fields import CountryField
-from autoslug import AutoSlugField
+
+from core.ids import generate_id
+from core.slugs import SlugFromNameMixin
 
 
 CONTINENTS = (
@@ -19,15 +19,15 @@ CONTINENTS = (
 )
 
 
-class League(models.Model):
+class League(SlugFromNameMixin, models.Model):
     id = models.CharField(_(u'id'),
                           primary_key=True,
                           max_length=255,
-                          default=shortuuid.ShortUUID().random(4),
+                          default=generate_id,
                           help_text=u'League ID',
                           db_index=True)
     name = models.CharField(max_length=255)
-    slug = AutoSlugField(populate_from='name', unique=True)
+    slug = models.SlugField(max_length=255, unique=True, editable=False)
     short_name = models.CharField(max_length=255)
     logo = models.URLField(blank=True, null=True)
     country = CountryField()
@@ -37,10 +37,6 @@ class League(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return self.name
     
@@ -0,0 +1,11 @@
+from rest_framework import serializers
+from django_countries.serializers import CountryFieldMixin
+from core.metrics import TimedSerializerMixin
+from .models import League
+
+class LeagueSerializer(TimedSerializerMixin, CountryFieldMixin, serializers.ModelSerializer):
+    class Meta:
+        model = League
+        fields = ['id', 'name', 'slug', 'short_name', 'logo', 'country', 'continent',
+                  'description', 'year_established', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'slug']
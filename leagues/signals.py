@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.response_cache import bump
+from .cache import league_cache
+from .models import League
+
+@receiver([post_save, post_delete], sender=League)
+def invalidate_league_cache(sender, instance, **kwargs):
+    league_cache.invalidate(instance)
+    bump('leagues')
@@ -1,3 +1,127 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from clubs.models import Club
+from .cache import league_cache
+from .management.commands.import_football_catalogue import iter_json_array
+from .models import League
+
+
+class IterJsonArrayTests(SimpleTestCase):
+
+    def test_elements_split_across_blocks(self):
+        records = [{'name': f'League {i}', 'tags': ['x'] * (i % 4)} for i in range(30)] + [12345, 'text', None]
+        text = json.dumps(records, indent=2)
+        for block_size in (1, 2, 7, 64, 1 << 16):
+            with self.subTest(block_size=block_size):
+                self.assertEqual(list(iter_json_array(StringIO(text), block_size)), records)
+        self.assertEqual(list(iter_json_array(StringIO(' \n[ ]'), 1)), [])
+
+    def test_malformed_input(self):
+        for text, message in [
+            ('{"name": "x"}', "Expected a JSON array"),
+            ('', "Expected a JSON array"),
+            ('[1 2]', "Expected ',' or ']'"),
+            ('[1, 2', "Truncated JSON array"),
+            ('[{"name": ', "Truncated or malformed"),
+            ('[1,]', "Truncated or malformed"),
+        ]:
+            with self.subTest(text=text), self.assertRaisesMessage(CommandError, message):
+                list(iter_json_array(StringIO(text), 2))
+
+
+class LeagueCacheTests(TestCase):
+
+    def setUp(self):
+        league_cache.local.clear()
+        league_cache.shared.clear()
+
+    def test_renamed_league_is_not_served_under_its_old_slug(self):
+        league = League.objects.create(name='Premier', short_name='PL', country='KE')
+        aget = async_to_sync(league_cache.aget)
+        self.assertEqual(aget(slug='premier').pk, league.pk)
+        league.name = 'Super League'
+        league.save()
+        self.assertEqual(aget(slug='super-league').pk, league.pk)
+        with self.assertRaises(League.DoesNotExist):
+            aget(slug='premier')
+
+
+class ImportFootballCatalogueTests(TestCase):
+
+    def write(self, suffix, content):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def run_import(self, *args):
+        out = StringIO()
+        call_command('import_football_catalogue', *args, '--chunk-size', '2', stdout=out)
+        return out.getvalue()
+
+    def test_leagues_are_upserted_on_case_insensitive_natural_keys(self):
+        path = self.write('.json', json.dumps([
+            {'name': 'Premier League', 'short_name': 'KPL', 'country': 'KE'},
+            {'name': 'Premier League', 'short_name': 'EPL', 'country': 'gb', 'continent': 'eu'},
+            {'name': 'Super League', 'country': 'Kenya', 'year_established': '2003'},
+            {'name': 'Nowhere League', 'country': 'XX'},
+            {'name': 'Lost League', 'country': 'KE', 'continent': 'ZZ'},
+            {'name': 'Odd League', 'country': 'KE', 'continent': 5},
+            {'name': 'Odder League', 'country': 'KE', 'continent': ['AF']},
+            {'name': 'Bad Year', 'country': 'KE', 'year_established': 'old'},
+            {'short_name': 'NN', 'country': 'KE'},
+            ['not', 'an', 'object'],
+        ]))
+        self.assertIn('3 leagues upserted, 7 skipped', self.run_import('--leagues', path))
+        self.assertEqual(
+            sorted(League.objects.values_list('slug', 'country', 'continent', 'short_name')),
+            [('premier-league', 'KE', 'AF', 'KPL'), ('premier-league-2', 'GB', 'EU', 'EPL'),
+             ('super-league', 'KE', 'AF', '')],
+        )
+
+        path = self.write('.jsonl', '\n'.join(json.dumps(record) for record in [
+            {'name': 'premier league', 'short_name': 'FKF', 'country': 'ke'},
+            {'name': 'Super League', 'country': 'KEN', 'description': 'Second tier'},
+        ]))
+        self.run_import('--leagues', path)
+        self.assertEqual(League.objects.count(), 3)
+        self.assertEqual(League.objects.get(slug='premier-league').short_name, 'FKF')
+        self.assertEqual(League.objects.get(slug='super-league').description, 'Second tier')
+
+    def test_clubs_refer_to_leagues_by_slug_short_name_or_id(self):
+        kpl = League.objects.create(name='Premier League', short_name='KPL', country='KE')
+        other = League.objects.create(name='Premier League', short_name='UPL', country='UG')
+        League.objects.create(name='Cup', short_name='CUP', country='KE')
+        League.objects.create(name='Cup', short_name='CUP', country='UG')
+        path = self.write('.csv', (
+            'name,full_name,league,slug\n'
+            'Gor Mahia,Gor Mahia FC,KPL,\n'
+            'AFC Leopards,,premier-league,\n'
+            f'KCCA,KCCA FC,{other.pk},\n'
+            'Cup Club,,CUP,\n'
+            'Ghost FC,,missing,\n'
+            'Tusker,,KPL,tusker-fc\n'
+        ))
+        self.assertIn('4 clubs upserted, 2 skipped', self.run_import('--clubs', path))
+        self.assertEqual(
+            sorted(Club.objects.values_list('slug', 'league_id', 'full_name')),
+            [('afc-leopards', kpl.pk, 'AFC Leopards'), ('gor-mahia', kpl.pk, 'Gor Mahia FC'),
+             ('kcca', other.pk, 'KCCA FC'), ('tusker-fc', kpl.pk, 'Tusker')],
+        )
+
+        path = self.write('.csv', 'name,full_name,league\nGOR MAHIA,K\'Ogalo,KPL\nGor Mahia,,UPL\n')
+        self.run_import('--clubs', path)
+        self.assertEqual(Club.objects.get(slug='gor-mahia').full_name, "K'Ogalo")
+        self.assertEqual(Club.objects.get(slug='gor-mahia-2').league_id, other.pk)
+
+    def test_requires_a_file(self):
+        with self.assertRaisesMessage(CommandError, "Pass --leagues and/or --clubs"):
+            call_command('import_football_catalogue')
@@ -1,3 +1,47 @@
-from django.shortcuts import render
+from django.http import Http404
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from core.mixins import ConditionalGetMixin
+from core.response_cache import ResponseCacheMixin
+from matches.standings import get_table, latest_season
+from .cache import league_cache
+from .models import League
+from .pagination import CatalogueCursorPagination
+from .serializers import LeagueSerializer
 
-# Create your views here.
+class LeagueViewSet(ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = League.objects.all()
+    response_cache_namespaces = ('leagues',)
+    serializer_class = LeagueSerializer
+    pagination_class = CatalogueCursorPagination
+    lookup_field = 'slug'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        country = self.request.query_params.get('country')
+        continent = self.request.query_params.get('continent')
+        if country:
+            queryset = queryset.filter(country=country.upper())
+        if continent:
+            queryset = queryset.filter(continent=continent.upper())
+        return queryset
+
+    def get_object(self):
+        if self.action not in ('retrieve', 'standings'):
+            return super().get_object()
+        try:
+            league = league_cache.get(slug=self.kwargs['slug'])
+        except League.DoesNotExist:
+            raise Http404
+        self.check_object_permissions(self.request, league)
+        return league
+
+    @action(detail=True)
+    def standings(self, request, slug=None):
+        """The league table for `?season=` (default: the latest season with results)."""
+        league = self.get_object()
+        season = request.query_params.get('season') or latest_season(league)
+        if season is None:
+            raise Http404
+        return Response({'league': league.slug, 'season': season, 'table': get_table(league, season)})
@@ -0,0 +1,23 @@
+from django.contrib import admin
+from .models import Match, MatchEvent, Standing
+
+class MatchEventInline(admin.TabularInline):
+    model = MatchEvent
+    extra = 0
+    fields = ('kind', 'minute', 'club', 'text')
+
+class MatchAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'league', 'season', 'kickoff', 'status', 'home_score', 'away_score')
+    list_filter = ('status', 'season', 'league')
+    search_fields = ('home_club__name', 'away_club__name', 'league__name')
+    raw_id_fields = ('home_club', 'away_club', 'league')
+    inlines = [MatchEventInline]
+
+admin.site.register(Match, MatchAdmin)
+
+class StandingAdmin(admin.ModelAdmin):
+    list_display = ('position', 'club', 'league', 'season', 'played', 'points', 'form')
+    list_filter = ('season', 'league')
+    raw_id_fields = ('league', 'club')
+
+admin.site.register(Standing, StandingAdmin)
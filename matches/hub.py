@@ -0,0 +1,183 @@
+"""
+In-process pub/sub for live match updates.
+
+Publishers call `hub.publish(match_id, message)` from any thread. The
+backend carries the message to every process's hub (LocalBackend: just
+this one), where updates for a match arriving within
+MATCHES_COALESCE_INTERVAL are merged into one batch: the latest match
+snapshot plus the events in order. Each batch is encoded once and the same
+bytes are queued on every subscription, so fan-out costs one append per
+connection.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+MATCHES_COALESCE_INTERVAL = getattr(settings, 'MATCHES_COALESCE_INTERVAL', 0.25)
+# Batches kept per slow connection before the oldest are dropped; every
+# batch carries the full score, so a slow client only loses commentary.
+MATCHES_MAX_PENDING = getattr(settings, 'MATCHES_MAX_PENDING', 50)
+
+
+class Subscription:
+    """One connection's queue of encoded batches."""
+    __slots__ = ('hub', 'channel', 'queue', 'ready', 'closed')
+
+    def __init__(self, hub, channel, max_pending):
+        self.hub = hub
+        self.channel = channel
+        self.queue = deque(maxlen=max_pending)
+        self.ready = asyncio.Event()
+        self.closed = False
+
+    def deliver(self, data):
+        self.queue.append(data)
+        self.ready.set()
+
+    async def next(self, timeout=None):
+        """Return the next batch, or None on timeout or once closed."""
+        if not self.queue and not self.closed:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if not self.queue:
+            return None
+        data = self.queue.popleft()
+        if not self.queue:
+            self.ready.clear()
+        return data
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.ready.set()
+            self.hub.unsubscribe(self)
+
+
+class Hub:
+    def __init__(self, backend=None, interval=MATCHES_COALESCE_INTERVAL, max_pending=MATCHES_MAX_PENDING):
+        self.backend = backend or LocalBackend()
+        self.interval = interval
+        self.max_pending = max_pending
+        self.channels = defaultdict(set)
+        self.pending = {}
+        self.loop = None
+        self.encoder = DjangoJSONEncoder(separators=(',', ':'))
+        self.batches = 0
+        self.received = 0
+
+    def subscribe(self, channel):
+        """Subscribe to a channel; call from the event loop serving the connection."""
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # A new loop (first connection, or a test's fresh loop).
+            self.loop = loop
+            self.channels.clear()
+            self.pending.clear()
+            self.backend.start(self)
+        subscription = Subscription(self, str(channel), self.max_pending)
+        self.channels[subscription.channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscribers = self.channels.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.channels[subscription.channel]
+
+    def publish(self, channel, message):
+        """Send `message` ({'match': snapshot, 'event': dict or None}) to every subscriber of `channel`."""
+        self.backend.publish(self, str(channel), message)
+
+    def receive(self, channel, message):
+        """Called on the hub's loop with each published message."""
+        self.received += 1
+        if channel not in self.channels:
+            return
+        batch = self.pending.get(channel)
+        if batch is None:
+            batch = self.pending[channel] = {'match': None, 'events': []}
+            self.loop.call_later(self.interval, self.flush, channel)
+        batch['match'] = message.get('match') or batch['match']
+        if message.get('event'):
+            batch['events'].append(message['event'])
+
+    def flush(self, channel):
+        batch = self.pending.pop(channel, None)
+        subscribers = self.channels.get(channel)
+        if batch is None or not subscribers:
+            return
+        data = self.encoder.encode(batch).encode()
+        self.batches += 1
+        for subscription in subscribers:
+            subscription.deliver(data)
+
+    def call_on_loop(self, callback, *args):
+        """Run `callback` on the hub's loop, from whichever thread we are on."""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            callback(*args)
+        else:
+            loop.call_soon_threadsafe(callback, *args)
+
+
+class LocalBackend:
+    """Delivers to this process only; no external service needed."""
+
+    def start(self, hub):
+        pass
+
+    def publish(self, hub, channel, message):
+        hub.call_on_loop(hub.receive, channel, message)
+
+
+class RedisBackend:
+    """
+    Fans messages out to every process through Redis pub/sub. Needs the
+    `redis` package and MATCHES_REDIS_URL.
+    """
+    prefix = 'matches:'
+
+    def __init__(self, url=None):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisBackend needs the 'redis' package")
+        self.url = url or getattr(settings, 'MATCHES_REDIS_URL', 'redis://localhost:6379/0')
+        self.client = redis.Redis.from_url(self.url)
+        self.lock = threading.Lock()
+        self.listener = None
+
+    def start(self, hub):
+        import redis.asyncio
+
+        async def listen():
+            pubsub = redis.asyncio.Redis.from_url(self.url).pubsub()
+            await pubsub.psubscribe(f'{self.prefix}*')
+            async for item in pubsub.listen():
+                if item['type'] == 'pmessage':
+                    channel = item['channel'].decode()[len(self.prefix):]
+                    hub.receive(channel, json.loads(item['data']))
+
+        with self.lock:
+            self.listener = hub.loop.create_task(listen())
+
+    def publish(self, hub, channel, message):
+        self.client.publish(f'{self.prefix}{channel}', json.dumps(message, cls=DjangoJSONEncoder))
+
+
+hub = Hub(import_string(getattr(settings, 'MATCHES_PUBSUB_BACKEND', 'matches.hub.LocalBackend'))())
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leagues.models import League
+from matches.standings import recompute
+
+
+class Command(BaseCommand):
+    help = "Rebuild league tables from finished matches, after a backfill or corrections"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', help="Slug of the league to rebuild (default: all leagues)")
+        parser.add_argument('--season', help="Season to rebuild, e.g. 2024/25 (default: all seasons)")
+
+    def handle(self, *args, **options):
+        league_id = None
+        if options['league']:
+            try:
+                league_id = League.objects.get(slug=options['league']).pk
+            except League.DoesNotExist:
+                raise CommandError(f"No league with slug {options['league']!r}")
+
+        started = time.monotonic()
+        tables = recompute(league_id, options['season'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"{tables} table(s) rebuilt in {elapsed:.1f}s"))
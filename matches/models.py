@@ -0,0 +1,159 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from clubs.models import Club
+from core.ids import generate_id
+from leagues.models import League
+
+
+class Match(models.Model):
+    SCHEDULED = 'scheduled'
+    LIVE = 'live'
+    HALF_TIME = 'half_time'
+    FINISHED = 'finished'
+    POSTPONED = 'postponed'
+    STATUSES = (
+        (SCHEDULED, 'Scheduled'),
+        (LIVE, 'Live'),
+        (HALF_TIME, 'Half time'),
+        (FINISHED, 'Finished'),
+        (POSTPONED, 'Postponed'),
+    )
+
+    # Written only by matches.standings; see save().
+    COUNTED_FIELDS = ('counted_home_score', 'counted_away_score', 'counted_league', 'counted_season',
+                      'counted_home_club', 'counted_away_club')
+
+    id = models.CharField(_(u'id'),
+                          primary_key=True,
+                          max_length=255,
+                          default=generate_id,
+                          help_text=u'Match ID',
+                          db_index=True)
+    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='matches')
+    season = models.CharField(max_length=9, help_text=u'e.g. 2024/25')
+    home_club = models.ForeignKey(Club, on_delete=models.CASCADE, related_name='home_matches')
+    away_club = models.ForeignKey(Club, on_delete=models.CASCADE, related_name='away_matches')
+    kickoff = models.DateTimeField()
+    venue = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=16, choices=STATUSES, default=SCHEDULED)
+    minute = models.PositiveSmallIntegerField(blank=True, null=True)
+    home_score = models.PositiveSmallIntegerField(default=0)
+    away_score = models.PositiveSmallIntegerField(default=0)
+    # The result as currently counted in the standings: the score and the
+    # table and clubs it was counted for; null until the result is applied.
+    # See matches.standings.
+    counted_home_score = models.PositiveSmallIntegerField(blank=True, null=True, editable=False)
+    counted_away_score = models.PositiveSmallIntegerField(blank=True, null=True, editable=False)
+    counted_league = models.ForeignKey(League, on_delete=models.SET_NULL, blank=True, null=True,
+                                       editable=False, related_name='+')
+    counted_season = models.CharField(max_length=9, blank=True, editable=False)
+    counted_home_club = models.ForeignKey(Club, on_delete=models.SET_NULL, blank=True, null=True,
+                                          editable=False, related_name='+')
+    counted_away_club = models.ForeignKey(Club, on_delete=models.SET_NULL, blank=True, null=True,
+                                          editable=False, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['kickoff', 'id']
+        verbose_name_plural = 'matches'
+        indexes = [
+            models.Index(fields=['league', 'season', 'kickoff'], name='match_league_season_idx'),
+            models.Index(fields=['status', 'kickoff'], name='match_status_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=~models.Q(home_club=models.F('away_club')), name='match_distinct_clubs'),
+        ]
+
+    def __str__(self):
+        return f"{self.home_club} v {self.away_club}"
+
+    def save(self, *args, **kwargs):
+        # The counted result is owned by matches.standings, which writes it
+        # with update(); a full save from a stale instance must not undo it.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class MatchEvent(models.Model):
+    """Something that happened in a match: goals, cards, phase changes and commentary."""
+    GOAL = 'goal'
+    OWN_GOAL = 'own_goal'
+    YELLOW_CARD = 'yellow_card'
+    RED_CARD = 'red_card'
+    SUBSTITUTION = 'substitution'
+    KICKOFF = 'kickoff'
+    HALF_TIME = 'half_time'
+    SECOND_HALF = 'second_half'
+    FULL_TIME = 'full_time'
+    COMMENTARY = 'commentary'
+    KINDS = (
+        (GOAL, 'Goal'),
+        (OWN_GOAL, 'Own goal'),
+        (YELLOW_CARD, 'Yellow card'),
+        (RED_CARD, 'Red card'),
+        (SUBSTITUTION, 'Substitution'),
+        (KICKOFF, 'Kick-off'),
+        (HALF_TIME, 'Half time'),
+        (SECOND_HALF, 'Second half'),
+        (FULL_TIME, 'Full time'),
+        (COMMENTARY, 'Commentary'),
+    )
+
+    id = models.CharField(_(u'id'),
+                          primary_key=True,
+                          max_length=255,
+                          default=generate_id,
+                          help_text=u'Match event ID')
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=16, choices=KINDS)
+    minute = models.PositiveSmallIntegerField(blank=True, null=True)
+    # The club credited with the event; for an own goal, the scoring side.
+    club = models.ForeignKey(Club, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    text = models.TextField(blank=True, max_length=1000)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['match', 'id']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} ({self.minute}')"
+
+
+class Standing(models.Model):
+    """
+    One club's row in a league season table, maintained by
+    matches.standings as results come in.
+    """
+    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='standings')
+    season = models.CharField(max_length=9)
+    club = models.ForeignKey(Club, on_delete=models.CASCADE, related_name='standings')
+    position = models.PositiveSmallIntegerField(default=0)
+    played = models.PositiveSmallIntegerField(default=0)
+    won = models.PositiveSmallIntegerField(default=0)
+    drawn = models.PositiveSmallIntegerField(default=0)
+    lost = models.PositiveSmallIntegerField(default=0)
+    goals_for = models.PositiveSmallIntegerField(default=0)
+    goals_against = models.PositiveSmallIntegerField(default=0)
+    points = models.SmallIntegerField(default=0)
+    # Last results, most recent first, e.g. "WWDLW".
+    form = models.CharField(max_length=5, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['league', 'season', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['league', 'season', 'club'], name='standing_unique_club'),
+        ]
+
+    def __str__(self):
+        return f"{self.position}. {self.club} ({self.season})"
+
+    @property
+    def goal_difference(self):
+        return self.goals_for - self.goals_against
@@ -0,0 +1,48 @@
+from rest_framework import serializers
+from clubs.models import Club
+from core.metrics import TimedSerializerMixin
+from .models import Match, MatchEvent, Standing
+
+class MatchSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    league = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+    home_club = serializers.SlugRelatedField(slug_field='slug', queryset=Club.objects.all())
+    away_club = serializers.SlugRelatedField(slug_field='slug', queryset=Club.objects.all())
+
+    class Meta:
+        model = Match
+        fields = ['id', 'league', 'season', 'home_club', 'away_club', 'kickoff', 'venue',
+                  'status', 'minute', 'home_score', 'away_score', 'created_at', 'updated_at']
+        read_only_fields = ['id']
+
+    def validate(self, attrs):
+        home = attrs.get('home_club', getattr(self.instance, 'home_club', None))
+        away = attrs.get('away_club', getattr(self.instance, 'away_club', None))
+        if home is not None and home == away:
+            raise serializers.ValidationError("A club can't play itself.")
+        if home is not None and away is not None and home.league_id != away.league_id:
+            raise serializers.ValidationError("Both clubs must play in the same league.")
+        attrs['league_id'] = home.league_id
+        return attrs
+
+class MatchEventSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    club = serializers.SlugRelatedField(slug_field='slug', queryset=Club.objects.all(), required=False, allow_null=True)
+
+    class Meta:
+        model = MatchEvent
+        fields = ['id', 'kind', 'minute', 'club', 'text', 'created_at']
+        read_only_fields = ['id', 'created_at']
+
+class LiveMatchSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """The part of a match pushed to live subscribers."""
+    class Meta:
+        model = Match
+        fields = ['id', 'status', 'minute', 'home_score', 'away_score', 'updated_at']
+
+class StandingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    club = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+    club_name = serializers.CharField(source='club.name', read_only=True)
+
+    class Meta:
+        model = Standing
+        fields = ['position', 'club', 'club_name', 'played', 'won', 'drawn', 'lost',
+                  'goals_for', 'goals_against', 'goal_difference', 'points', 'form']
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .hub import hub
+from .models import Match, MatchEvent
+from .serializers import LiveMatchSerializer, MatchEventSerializer
+from .standings import update_standings
+
+# Match status after each phase event.
+PHASES = {
+    MatchEvent.KICKOFF: Match.LIVE,
+    MatchEvent.HALF_TIME: Match.HALF_TIME,
+    MatchEvent.SECOND_HALF: Match.LIVE,
+    MatchEvent.FULL_TIME: Match.FINISHED,
+}
+
+
+def record_event(match, kind, minute=None, club=None, text=''):
+    """
+    Record a match event, apply it to the score and status (and at full
+    time to the league table), and push it to live subscribers once
+    committed.
+    """
+    if kind in (MatchEvent.GOAL, MatchEvent.OWN_GOAL) and club is None:
+        raise ValueError("Goals need the club they count for")
+    if club is not None and club.pk not in (match.home_club_id, match.away_club_id):
+        raise ValueError(f"{club} is not playing in {match}")
+
+    with transaction.atomic():
+        updates = {'updated_at': timezone.now()}
+        if kind in (MatchEvent.GOAL, MatchEvent.OWN_GOAL):
+            side = 'home_score' if club.pk == match.home_club_id else 'away_score'
+            updates[side] = F(side) + 1
+        if kind in PHASES:
+            updates['status'] = PHASES[kind]
+        if minute is not None:
+            updates['minute'] = minute
+        # A single UPDATE, so concurrent goals can't overwrite each other.
+        Match.objects.filter(pk=match.pk).update(**updates)
+        match.refresh_from_db(fields=['status', 'minute', 'home_score', 'away_score', 'updated_at'])
+        # Created after the update, so receivers see the score it led to.
+        event = MatchEvent.objects.create(match=match, kind=kind, minute=minute, club=club, text=text)
+        if kind == MatchEvent.FULL_TIME:
+            update_standings(match)
+        transaction.on_commit(lambda: publish(match, event))
+    return event
+
+
+def publish(match, event=None):
+    hub.publish(match.pk, {
+        'match': LiveMatchSerializer(match).data,
+        'event': MatchEventSerializer(event).data if event is not None else None,
+    })
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Match
+from .services import publish
+from .standings import recompute, update_standings
+
+@receiver(post_save, sender=Match)
+def publish_match_change(sender, instance, created, **kwargs):
+    # Edits through the API or admin; events publish from record_event.
+    if not created:
+        transaction.on_commit(lambda: publish(instance))
+
+@receiver(post_save, sender=Match)
+def update_match_standings(sender, instance, **kwargs):
+    update_standings(instance)
+
+@receiver(post_delete, sender=Match)
+def remove_match_from_standings(sender, instance, **kwargs):
+    # `counted_home_score` may be stale on an instance loaded before the
+    # result was counted, so go by the status as well.
+    if instance.status == Match.FINISHED or instance.counted_home_score is not None:
+        recompute(instance.league_id, instance.season)
+        if instance.counted_league_id is not None and (
+            (instance.counted_league_id, instance.counted_season) != (instance.league_id, instance.season)
+        ):
+            recompute(instance.counted_league_id, instance.counted_season)
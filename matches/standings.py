@@ -0,0 +1,271 @@
+"""
+League tables. Each finished match is counted once: `update_standings`
+applies a new result to the two clubs' rows and re-ranks the table, and
+`recompute` rebuilds whole tables from the counted results with grouped
+aggregate queries, for backfills and corrected results.
+
+A club joins a table with its first counted result. Clubs level on
+points are separated by their head-to-head record (points, then goal
+difference, then goals among the tied clubs), then by overall goal
+difference, goals scored and name.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from clubs.models import Club
+from core.cache import OBJECT_CACHE_ALIAS
+from .models import Match, Standing
+
+STANDINGS_POINTS = getattr(settings, 'STANDINGS_POINTS', {'W': 3, 'D': 1, 'L': 0})
+STANDINGS_CACHE_TIMEOUT = getattr(settings, 'STANDINGS_CACHE_TIMEOUT', 300)
+FORM_LENGTH = 5
+TABLE_FIELDS = ['position', 'played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against',
+                'points', 'form', 'updated_at']
+# (club field, goals for, goals against) for each side of a match.
+SIDES = (
+    ('home_club_id', 'counted_home_score', 'counted_away_score'),
+    ('away_club_id', 'counted_away_score', 'counted_home_score'),
+)
+
+
+def outcome(scored, conceded):
+    return 'W' if scored > conceded else 'D' if scored == conceded else 'L'
+
+
+def update_standings(match):
+    """
+    Bring the table in line with `match`: count a newly finished result
+    incrementally, and recompute the affected seasons when a counted result
+    changed, was withdrawn, or moved to another season, league or clubs.
+    Safe to call on every save.
+    """
+    with transaction.atomic():
+        current = (
+            Match.objects.select_for_update()
+            .filter(pk=match.pk)
+            .values('league_id', 'season', 'home_club_id', 'away_club_id', 'status',
+                    'home_score', 'away_score', 'counted_home_score', 'counted_away_score',
+                    'counted_league_id', 'counted_season', 'counted_home_club_id', 'counted_away_club_id')
+            .first()
+        )
+        if current is None:
+            return
+        score = (current['home_score'], current['away_score']) if current['status'] == Match.FINISHED else None
+        counted = (current['counted_home_score'], current['counted_away_score'])
+        if counted[0] is None:
+            if score is not None:
+                apply_result(match.pk, current)
+            return
+        placed = (current['league_id'], current['season'], current['home_club_id'], current['away_club_id'])
+        counted_at = (current['counted_league_id'], current['counted_season'],
+                      current['counted_home_club_id'], current['counted_away_club_id'])
+        if score != counted or placed != counted_at:
+            recompute(current['league_id'], current['season'])
+            if counted_at[:2] != placed[:2] and counted_at[0] is not None:
+                # The result left the table it was counted in.
+                recompute(counted_at[0], counted_at[1])
+
+
+def apply_result(pk, match):
+    league_id, season = match['league_id'], match['season']
+    table = lock_table(league_id, season, [match['home_club_id'], match['away_club_id']])
+    now = timezone.now()
+    for club, scored, conceded in (
+        (match['home_club_id'], match['home_score'], match['away_score']),
+        (match['away_club_id'], match['away_score'], match['home_score']),
+    ):
+        result = outcome(scored, conceded)
+        standing = table[club]
+        standing.played += 1
+        standing.won += result == 'W'
+        standing.drawn += result == 'D'
+        standing.lost += result == 'L'
+        standing.goals_for += scored
+        standing.goals_against += conceded
+        standing.points += STANDINGS_POINTS[result]
+        # Results recorded out of kickoff order leave form slightly off
+        # until the next recompute.
+        standing.form = (result + standing.form)[:FORM_LENGTH]
+        standing.updated_at = now
+    Match.objects.filter(pk=pk).update(
+        counted_home_score=match['home_score'], counted_away_score=match['away_score'],
+        counted_league_id=league_id, counted_season=season,
+        counted_home_club_id=match['home_club_id'], counted_away_club_id=match['away_club_id'],
+    )
+    rank(list(table.values()), counted_results(league_id, season))
+    Standing.objects.bulk_update(table.values(), TABLE_FIELDS)
+    invalidate(league_id, season)
+
+
+def lock_table(league_id, season, club_ids):
+    """Lock a season's rows, creating any missing for `club_ids`; returns {club_id: Standing}."""
+    Standing.objects.bulk_create(
+        [Standing(league_id=league_id, season=season, club_id=club_id) for club_id in club_ids],
+        ignore_conflicts=True,
+    )
+    # Locking the whole table serialises concurrent results, so each
+    # re-rank sees the other's points.
+    rows = (
+        Standing.objects.select_for_update(of=('self',))
+        .filter(league_id=league_id, season=season).select_related('club')
+    )
+    return {standing.club_id: standing for standing in rows}
+
+
+def counted_results(league_id, season):
+    return Match.objects.filter(league_id=league_id, season=season, counted_home_score__isnull=False)
+
+
+def head_to_head(results, club_ids):
+    """Mini-table over the results between `club_ids`: {club_id: (points, goal difference, goals)}."""
+    table = {club_id: [0, 0, 0] for club_id in club_ids}
+    between = results.filter(home_club_id__in=club_ids, away_club_id__in=club_ids).values_list(
+        'home_club_id', 'away_club_id', 'counted_home_score', 'counted_away_score',
+    )
+    for home, away, home_score, away_score in between:
+        for club, scored, conceded in ((home, home_score, away_score), (away, away_score, home_score)):
+            row = table[club]
+            row[0] += STANDINGS_POINTS[outcome(scored, conceded)]
+            row[1] += scored - conceded
+            row[2] += scored
+    return {club_id: tuple(row) for club_id, row in table.items()}
+
+
+def rank(standings, results):
+    """Sort one table's rows in place and number their positions."""
+    level = defaultdict(list)
+    for standing in standings:
+        level[standing.points].append(standing.club_id)
+    mini = {}
+    for club_ids in level.values():
+        if len(club_ids) > 1:
+            mini.update(head_to_head(results, club_ids))
+    standings.sort(key=lambda s: (
+        -s.points,
+        *(-value for value in mini.get(s.club_id, (0, 0, 0))),
+        -s.goal_difference,
+        -s.goals_for,
+        s.club.name,
+    ))
+    for position, standing in enumerate(standings, 1):
+        standing.position = position
+
+
+def recompute(league_id=None, season=None):
+    """
+    Rebuild the tables of one league season, every season of a league, or
+    everything. Totals come from one grouped aggregate per side of the
+    match and form from one windowed query per side, whatever the number
+    of tables; only head-to-head ties need extra queries. Returns the number
+    of tables written.
+    """
+    matches = Match.objects.all()
+    if league_id is not None:
+        matches = matches.filter(league_id=league_id)
+    if season is not None:
+        matches = matches.filter(season=season)
+
+    with transaction.atomic():
+        matches.filter(status=Match.FINISHED).update(
+            counted_home_score=F('home_score'), counted_away_score=F('away_score'),
+            counted_league_id=F('league_id'), counted_season=F('season'),
+            counted_home_club_id=F('home_club_id'), counted_away_club_id=F('away_club_id'),
+        )
+        matches.exclude(status=Match.FINISHED).update(
+            counted_home_score=None, counted_away_score=None, counted_league_id=None, counted_season='',
+            counted_home_club_id=None, counted_away_club_id=None,
+        )
+        counted = matches.filter(counted_home_score__isnull=False).order_by()
+
+        tables = defaultdict(dict)
+
+        def row(league, season, club_id):
+            return tables[(league, season)].setdefault(
+                club_id, Standing(league_id=league, season=season, club_id=club_id),
+            )
+
+        for club, scored, conceded in SIDES:
+            totals = counted.values('league_id', 'season', club).annotate(
+                played=Count('pk'),
+                won=Count('pk', filter=Q(**{f'{scored}__gt': F(conceded)})),
+                drawn=Count('pk', filter=Q(counted_home_score=F('counted_away_score'))),
+                lost=Count('pk', filter=Q(**{f'{scored}__lt': F(conceded)})),
+                goals_for=Sum(scored),
+                goals_against=Sum(conceded),
+            )
+            for values in totals:
+                standing = row(values['league_id'], values['season'], values[club])
+                for field in ('played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against'):
+                    setattr(standing, field, getattr(standing, field) + values[field])
+
+        recent = defaultdict(list)
+        for club, scored, conceded in SIDES:
+            latest = counted.annotate(recency=Window(
+                RowNumber(),
+                partition_by=[F('league_id'), F('season'), F(club)],
+                order_by=[F('kickoff').desc(), F('id').desc()],
+            )).filter(recency__lte=FORM_LENGTH).values_list('league_id', 'season', club, 'kickoff', 'id', scored, conceded)
+            for league, season_, club_id, kickoff, pk, goals_for, goals_against in latest:
+                recent[(league, season_, club_id)].append((kickoff, pk, outcome(goals_for, goals_against)))
+
+        clubs = Club.objects.in_bulk({club_id for table in tables.values() for club_id in table})
+        now = timezone.now()
+        standings = []
+        for (league, season_), table in tables.items():
+            for club_id, standing in table.items():
+                standing.club = clubs[club_id]
+                standing.points = sum(STANDINGS_POINTS[result] * getattr(standing, field)
+                                      for result, field in (('W', 'won'), ('D', 'drawn'), ('L', 'lost')))
+                latest = sorted(recent[(league, season_, club_id)], reverse=True)[:FORM_LENGTH]
+                standing.form = ''.join(result for *_, result in latest)
+                standing.updated_at = now
+            rank(list(table.values()), counted_results(league, season_))
+            standings.extend(table.values())
+
+        scope = Standing.objects.all()
+        if league_id is not None:
+            scope = scope.filter(league_id=league_id)
+        if season is not None:
+            scope = scope.filter(season=season)
+        stale = set(scope.values_list('league_id', 'season').distinct())
+        scope.delete()
+        Standing.objects.bulk_create(standings, batch_size=1000)
+        for league, season_ in stale | set(tables):
+            invalidate(league, season_)
+    return len(tables)
+
+
+def cache_key(league_id, season):
+    return f'standings:{league_id}:{season}'
+
+
+def invalidate(league_id, season):
+    key = cache_key(league_id, season)
+    transaction.on_commit(lambda: caches[OBJECT_CACHE_ALIAS].delete(key))
+
+
+def get_table(league, season):
+    """The serialized table for a league season, read through the cache."""
+    from .serializers import StandingSerializer
+
+    cache = caches[OBJECT_CACHE_ALIAS]
+    key = cache_key(league.pk, season)
+    table = cache.get(key)
+    if table is None:
+        rows = Standing.objects.filter(league=league, season=season).select_related('club')
+        table = [dict(row) for row in StandingSerializer(rows, many=True).data]
+        cache.set(key, table, STANDINGS_CACHE_TIMEOUT)
+    return table
+
+
+def latest_season(league):
+    return (
+        Standing.objects.filter(league=league)
+        .order_by('-season').values_list('season', flat=True).first()
+    )
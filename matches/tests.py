@@ -0,0 +1,222 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from clubs.models import Club
+from leagues.models import League
+from .hub import Hub, hub
+from .models import Match, MatchEvent, Standing
+from .services import record_event
+from .websocket import match_socket
+
+
+class RecordEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Premier', short_name='PL', country='KE')
+        cls.home = Club.objects.create(name='Home', full_name='Home FC', short_name='HOM', league=cls.league)
+        cls.away = Club.objects.create(name='Away', full_name='Away FC', short_name='AWY', league=cls.league)
+        cls.match = Match.objects.create(
+            league=cls.league, season='2026/2027', home_club=cls.home, away_club=cls.away,
+            kickoff=datetime(2026, 10, 18, 15, tzinfo=timezone.utc),
+        )
+        cls.staff = User.objects.create_superuser('staff', '+254730000000', 'staff@example.com', 'pw')
+
+    def test_events_update_the_score_and_status(self):
+        record_event(self.match, MatchEvent.KICKOFF, minute=0)
+        record_event(self.match, MatchEvent.GOAL, minute=12, club=self.home)
+        record_event(self.match, MatchEvent.OWN_GOAL, minute=40, club=self.away)
+        record_event(self.match, MatchEvent.HALF_TIME, minute=45)
+        self.match.refresh_from_db()
+        self.assertEqual((self.match.home_score, self.match.away_score), (1, 1))
+        self.assertEqual((self.match.status, self.match.minute), (Match.HALF_TIME, 45))
+
+    def test_goals_need_a_club_in_the_match(self):
+        other = Club.objects.create(name='Other', full_name='Other FC', short_name='OTH', league=self.league)
+        with self.assertRaises(ValueError):
+            record_event(self.match, MatchEvent.GOAL, minute=3)
+        with self.assertRaises(ValueError):
+            record_event(self.match, MatchEvent.GOAL, minute=3, club=other)
+        self.assertFalse(self.match.events.exists())
+
+    def test_staff_post_events_and_anyone_reads_them(self):
+        client = APIClient()
+        url = f'/matches/{self.match.pk}/events/'
+        self.assertEqual(client.post(url, {'kind': MatchEvent.GOAL, 'club': 'home'}).status_code, 401)
+        client.force_authenticate(User.objects.create_user('fan', '+254730000001', 'fan@example.com', 'pw'))
+        self.assertEqual(client.post(url, {'kind': MatchEvent.GOAL, 'club': 'home'}).status_code, 403)
+        client.force_authenticate(self.staff)
+        response = client.post(url, {'kind': MatchEvent.GOAL, 'minute': 5, 'club': 'home'})
+        self.assertEqual(response.status_code, 201)
+        client.force_authenticate(None)
+        self.assertEqual([event['club'] for event in client.get(url).json()], ['home'])
+        self.assertEqual(client.get(f'/matches/{self.match.pk}/').json()['home_score'], 1)
+
+    def test_match_list_etag_follows_the_page(self):
+        listing = self.client.get('/matches/')
+        self.assertEqual(self.client.get('/matches/', HTTP_IF_NONE_MATCH=listing['ETag']).status_code, 304)
+        record_event(self.match, MatchEvent.KICKOFF, minute=0)
+        response = self.client.get('/matches/', HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], listing['ETag'])
+
+    async def test_live_stream_starts_with_a_snapshot(self):
+        response = await self.async_client.get(f'/matches/{self.match.pk}/live/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        first = await anext(chunks)
+        await chunks.aclose()
+        self.assertTrue(first.startswith(b'event: snapshot\ndata: '))
+        self.assertEqual(json.loads(first.split(b'data: ', 1)[1])['id'], self.match.pk)
+        self.assertEqual((await self.async_client.get('/matches/missing/live/')).status_code, 404)
+
+    async def test_websocket_sends_snapshot_and_batches_as_text(self):
+        received, sent = asyncio.Queue(), asyncio.Queue()
+        await received.put({'type': 'websocket.connect'})
+        scope = {'type': 'websocket', 'path': f'/ws/matches/{self.match.pk}/'}
+        socket = asyncio.ensure_future(match_socket(scope, received.get, sent.put))
+        self.assertEqual((await sent.get())['type'], 'websocket.accept')
+        snapshot = await sent.get()
+        self.assertEqual(json.loads(snapshot['text'])['snapshot']['id'], self.match.pk)
+
+        hub.publish(self.match.pk, {'match': {'id': self.match.pk, 'home_score': 1}, 'event': {'kind': 'goal'}})
+        batch = await asyncio.wait_for(sent.get(), timeout=5)
+        self.assertNotIn('bytes', batch)
+        self.assertEqual(json.loads(batch['text']), {'match': {'id': self.match.pk, 'home_score': 1},
+                                                     'events': [{'kind': 'goal'}]})
+        await received.put({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(socket, timeout=5)
+
+
+class StandingsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Premier', short_name='PL', country='KE')
+        cls.a, cls.b, cls.c = (
+            Club.objects.create(name=name, full_name=name, short_name=name, league=cls.league)
+            for name in ('Alpha', 'Bravo', 'Charlie')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.day = 0
+
+    def result(self, home, away, home_score, away_score):
+        self.day += 1
+        return Match.objects.create(
+            league=self.league, season='2026/27', home_club=home, away_club=away,
+            kickoff=datetime(2026, 9, self.day, 15, tzinfo=timezone.utc),
+            status=Match.FINISHED, home_score=home_score, away_score=away_score,
+        )
+
+    def table(self, season='2026/27', league=None):
+        return [
+            (s.club.name, s.played, s.points, s.goals_for - s.goals_against, s.form)
+            for s in Standing.objects.filter(league=league or self.league, season=season).select_related('club')
+        ]
+
+    def test_results_update_the_table_incrementally(self):
+        self.result(self.a, self.b, 1, 0)
+        self.result(self.b, self.c, 5, 0)
+        self.result(self.c, self.a, 0, 0)
+        self.result(self.c, self.b, 0, 0)
+        # Alpha and Bravo are level on points; Alpha won their meeting, so
+        # ranks above Bravo's better goal difference.
+        expected = [('Alpha', 2, 4, 1, 'DW'), ('Bravo', 3, 4, 4, 'DWL'), ('Charlie', 3, 2, -5, 'DDL')]
+        self.assertEqual(self.table(), expected)
+        call_command('recompute_standings', '--league', self.league.slug, stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.table(), expected)
+
+    def test_corrected_and_withdrawn_results_recompute_the_season(self):
+        match = self.result(self.a, self.b, 1, 0)
+        match.home_score = 0
+        match.save()
+        self.assertEqual([row[:3] for row in self.table()], [('Alpha', 1, 1), ('Bravo', 1, 1)])
+        match.delete()
+        self.assertEqual(self.table(), [])
+
+    def test_moved_results_recompute_both_tables(self):
+        self.result(self.a, self.c, 0, 0)
+        match = self.result(self.a, self.b, 1, 0)
+        match.season = '2027/28'
+        match.save()
+        self.assertEqual(self.table(), [('Alpha', 1, 1, 0, 'D'), ('Charlie', 1, 1, 0, 'D')])
+        self.assertEqual(self.table('2027/28'), [('Alpha', 1, 3, 1, 'W'), ('Bravo', 1, 0, -1, 'L')])
+
+        match.home_club, match.away_club = self.b, self.a
+        match.save()
+        self.assertEqual(self.table('2027/28'), [('Bravo', 1, 3, 1, 'W'), ('Alpha', 1, 0, -1, 'L')])
+
+        cup = League.objects.create(name='Cup', short_name='CUP', country='KE')
+        match.league, match.season = cup, '2026/27'
+        match.save()
+        self.assertEqual(self.table('2027/28'), [])
+        self.assertEqual(self.table(league=cup), [('Bravo', 1, 3, 1, 'W'), ('Alpha', 1, 0, -1, 'L')])
+        self.assertEqual(self.table(), [('Alpha', 1, 1, 0, 'D'), ('Charlie', 1, 1, 0, 'D')])
+
+        match.delete()
+        self.assertEqual(self.table(league=cup), [])
+
+    def test_full_time_event_counts_the_result(self):
+        match = Match.objects.create(league=self.league, season='2026/27', home_club=self.a, away_club=self.c,
+                                     kickoff=datetime(2026, 9, 1, 15, tzinfo=timezone.utc))
+        record_event(match, MatchEvent.KICKOFF, minute=0)
+        record_event(match, MatchEvent.GOAL, minute=10, club=self.c)
+        self.assertEqual(self.table(), [])
+        record_event(match, MatchEvent.FULL_TIME, minute=90)
+        self.assertEqual(self.table(), [('Charlie', 1, 3, 1, 'W'), ('Alpha', 1, 0, -1, 'L')])
+
+    def test_standings_endpoint_is_cached_and_invalidated(self):
+        self.result(self.a, self.b, 2, 1)
+        url = f'/leagues/{self.league.slug}/standings/'
+        self.assertEqual(self.league.get_absolute_url() + 'standings/', url)
+        response = self.client.get(url)
+        self.assertEqual(response.json()['season'], '2026/27')
+        self.assertEqual([row['club'] for row in response.json()['table']], ['alpha', 'bravo'])
+        self.client.get(url, {'season': '2026/27'})
+        with self.assertNumQueries(0):
+            self.client.get(url, {'season': '2026/27'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.result(self.b, self.a, 3, 0)
+        table = self.client.get(url, {'season': '2026/27'}).json()['table']
+        self.assertEqual([row['club'] for row in table], ['bravo', 'alpha'])
+        self.assertEqual(self.client.get(url, {'season': '1999/00'}).json()['table'], [])
+
+
+class HubTests(SimpleTestCase):
+    def test_updates_are_coalesced_and_encoded_once_per_batch(self):
+        async def scenario():
+            hub = Hub(interval=0.01)
+            first, second = hub.subscribe('m1'), hub.subscribe('m1')
+            other = hub.subscribe('m2')
+            for score in range(3):
+                hub.publish('m1', {'match': {'home_score': score}, 'event': {'kind': 'GOAL'}})
+            batch = await first.next(timeout=1)
+            self.assertIs(await second.next(timeout=1), batch)
+            self.assertIsNone(await other.next(timeout=0.05))
+            return hub, json.loads(batch)
+
+        hub, batch = asyncio.run(scenario())
+        self.assertEqual(batch['match'], {'home_score': 2})
+        self.assertEqual(len(batch['events']), 3)
+        self.assertEqual((hub.received, hub.batches), (3, 1))
+
+    def test_closed_subscriptions_stop_receiving(self):
+        async def scenario():
+            hub = Hub(interval=0)
+            subscription = hub.subscribe('m1')
+            subscription.close()
+            hub.publish('m1', {'match': {}, 'event': None})
+            await asyncio.sleep(0.01)
+            return hub, await subscription.next(timeout=0.01)
+
+        hub, data = asyncio.run(scenario())
+        self.assertIsNone(data)
+        self.assertEqual((hub.channels, hub.batches), ({}, 0))
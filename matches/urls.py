@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'', views.MatchViewSet)
+
+urlpatterns = [
+    path('<str:pk>/live/', views.live, name='match-live'),
+    path('', include(router.urls)),
+]
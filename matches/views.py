@@ -0,0 +1,96 @@
+from datetime import date
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from core.mixins import ConditionalGetMixin
+from .hub import hub
+from .models import Match
+from .pagination import MatchCursorPagination
+from .serializers import LiveMatchSerializer, MatchEventSerializer, MatchSerializer
+from .services import record_event
+
+MATCHES_HEARTBEAT = getattr(settings, 'MATCHES_HEARTBEAT', 20)
+
+
+class IsAdminOrReadOnly(permissions.BasePermission):
+    """Anyone may read; only staff users may write."""
+
+    def has_permission(self, request, view):
+        return request.method in permissions.SAFE_METHODS or bool(request.user and request.user.is_staff)
+
+
+class MatchViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Match.objects.select_related('league', 'home_club', 'away_club')
+    serializer_class = MatchSerializer
+    pagination_class = MatchCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('league'):
+            queryset = queryset.filter(league__slug=params['league'])
+        if params.get('club'):
+            club = params['club']
+            queryset = queryset.filter(home_club__slug=club) | queryset.filter(away_club__slug=club)
+        if params.get('season'):
+            queryset = queryset.filter(season=params['season'])
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('date'):
+            try:
+                queryset = queryset.filter(kickoff__date=date.fromisoformat(params['date']))
+            except ValueError:
+                queryset = queryset.none()
+        return queryset
+
+    @action(detail=True, methods=['get', 'post'], permission_classes=[IsAdminOrReadOnly])
+    def events(self, request, pk=None):
+        match = self.get_object()
+        if request.method == 'GET':
+            return Response(MatchEventSerializer(match.events.select_related('club'), many=True).data)
+        serializer = MatchEventSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            event = record_event(match, **serializer.validated_data)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(MatchEventSerializer(event).data, status=status.HTTP_201_CREATED)
+
+
+def sse(data, event=None):
+    head = f'event: {event}\n'.encode() if event else b''
+    return head + b'data: ' + data + b'\n\n'
+
+
+async def live(request, pk):
+    """
+    Server-sent events for one match: a `snapshot` event with the current
+    score, then one message per coalesced batch of updates, with comment
+    heartbeats while idle. Serve through fs_api.asgi; under WSGI every open
+    stream holds a worker thread.
+    """
+    # Subscribe before reading the snapshot so no update falls in between.
+    subscription = hub.subscribe(pk)
+    try:
+        match = await Match.objects.aget(pk=pk)
+    except Match.DoesNotExist:
+        subscription.close()
+        raise Http404
+
+    async def stream():
+        try:
+            yield sse(JSONRenderer().render(LiveMatchSerializer(match).data), 'snapshot')
+            while not subscription.closed:
+                data = await subscription.next(timeout=MATCHES_HEARTBEAT)
+                yield sse(data) if data is not None else b': heartbeat\n\n'
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,55 @@
+"""
+WebSocket endpoint for live matches, served by fs_api.asgi next to the
+Django application: ws://<host>/ws/matches/<match id>/
+
+Sends a {"snapshot": ...} message on connect and then the same coalesced
+batches as the SSE stream. Client messages are ignored.
+"""
+import asyncio
+import json
+import re
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .hub import hub
+from .models import Match
+from .serializers import LiveMatchSerializer
+from .views import MATCHES_HEARTBEAT
+
+PATH = re.compile(r'^/ws/matches/(?P<pk>[^/]+)/$')
+
+
+async def match_socket(scope, receive, send):
+    match = PATH.match(scope['path'])
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    if match is None:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    subscription = hub.subscribe(match['pk'])
+    try:
+        instance = await Match.objects.aget(pk=match['pk'])
+    except Match.DoesNotExist:
+        subscription.close()
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'websocket.disconnect':
+            pass
+        subscription.close()
+
+    await send({'type': 'websocket.accept'})
+    disconnect = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        snapshot = json.dumps({'snapshot': LiveMatchSerializer(instance).data}, cls=DjangoJSONEncoder)
+        await send({'type': 'websocket.send', 'text': snapshot})
+        while not subscription.closed:
+            data = await subscription.next(timeout=MATCHES_HEARTBEAT)
+            if data is not None:
+                # Batches are JSON like the snapshot, so go out as text frames too.
+                await send({'type': 'websocket.send', 'text': data.decode()})
+    finally:
+        subscription.close()
+        disconnect.cancel()
@@ -0,0 +1,20 @@
+from django.contrib import admin
+from .models import Favourite, Notification, UnreadCounter
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'kind', 'count', 'read_at', 'created_at')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('user__username', 'group')
+    raw_id_fields = ('user',)
+
+class FavouriteAdmin(admin.ModelAdmin):
+    list_display = ('user', 'club', 'league', 'created_at')
+    raw_id_fields = ('user', 'club', 'league')
+
+class UnreadCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread')
+    raw_id_fields = ('user',)
+
+admin.site.register(Notification, NotificationAdmin)
+admin.site.register(Favourite, FavouriteAdmin)
+admin.site.register(UnreadCounter, UnreadCounterAdmin)
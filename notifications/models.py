@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+from clubs.models import Club
+from core.ids import generate_id
+from leagues.models import League
+
+
+class Favourite(models.Model):
+    """A club or league a user wants alerts for"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="favourites", on_delete=models.CASCADE)
+    club = models.ForeignKey(Club, related_name="favourited_by", on_delete=models.CASCADE, blank=True, null=True)
+    league = models.ForeignKey(League, related_name="favourited_by", on_delete=models.CASCADE, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["club", "user"], name="favourite_club_idx"),
+            models.Index(fields=["league", "user"], name="favourite_league_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(club__isnull=True) ^ Q(league__isnull=True), name="favourite_club_or_league",
+            ),
+            models.UniqueConstraint(fields=["user", "club"], name="unique_favourite_club"),
+            models.UniqueConstraint(fields=["user", "league"], name="unique_favourite_league"),
+        ]
+
+    def __str__(self):
+        return f"{self.user}: {self.club or self.league}"
+
+
+class Notification(models.Model):
+    """
+    One entry in a user's inbox. Alerts with the same `group` arriving while
+    an entry is unread and recent are folded into it: `count` goes up and
+    `payload` holds the latest alert.
+    """
+    GOAL = 'goal'
+    KICKOFF = 'kickoff'
+    FULL_TIME = 'full_time'
+    FOLLOW = 'follow'
+    KINDS = (
+        (GOAL, 'Goal'),
+        (KICKOFF, 'Kick-off'),
+        (FULL_TIME, 'Final score'),
+        (FOLLOW, 'New follower'),
+    )
+
+    id = models.CharField(_(u'id'),
+                          primary_key=True,
+                          max_length=255,
+                          default=generate_id,
+                          help_text=u'Notification ID')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="notifications", on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    group = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    count = models.PositiveIntegerField(default=1)
+    read_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["user", "-id"], name="notification_inbox_idx"),
+            models.Index(fields=["user", "group"], condition=Q(read_at__isnull=True),
+                         name="notification_unread_group_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user}: {self.get_kind_display()} x{self.count}"
+
+
+class UnreadCounter(models.Model):
+    """Number of unread inbox entries per user, kept alongside the inbox"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True,
+                                related_name="unread_counter", on_delete=models.CASCADE)
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user}: {self.unread}"
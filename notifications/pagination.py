@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class InboxCursorPagination(CursorPagination):
+    """Newest first by time-ordered id; coalesced alerts keep their place."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
@@ -0,0 +1,34 @@
+from rest_framework import serializers
+from clubs.models import Club
+from leagues.models import League
+from core.metrics import TimedSerializerMixin
+from .models import Favourite, Notification
+
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    read = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'kind', 'payload', 'count', 'read', 'created_at', 'updated_at']
+
+    def get_read(self, obj):
+        return obj.read_at is not None
+
+class FavouriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    club = serializers.SlugRelatedField(slug_field='slug', queryset=Club.objects.all(), required=False, allow_null=True)
+    league = serializers.SlugRelatedField(slug_field='slug', queryset=League.objects.all(), required=False, allow_null=True)
+
+    class Meta:
+        model = Favourite
+        fields = ['id', 'club', 'league', 'created_at']
+
+    def validate(self, attrs):
+        if (attrs.get('club') is None) == (attrs.get('league') is None):
+            raise serializers.ValidationError("Give either a club or a league.")
+        user = self.context['request'].user
+        if Favourite.objects.filter(user=user, club=attrs.get('club'), league=attrs.get('league')).exists():
+            raise serializers.ValidationError("Already a favourite.")
+        return attrs
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.CharField(), required=False, max_length=1000)
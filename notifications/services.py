@@ -0,0 +1,192 @@
+"""
+Alerts are delivered in three steps, each a queued job:
+
+1. an alert job (e.g. `alert_match_event`) builds the payload once the
+   triggering transaction has committed, from the state queued with it,
+   and calls `fan_out`;
+2. `fan_out` streams the recipient ids and queues one `deliver` job per
+   NOTIFICATIONS_CHUNK_SIZE recipients, with one insert per batch of jobs;
+3. `deliver` writes a chunk's inbox entries with a handful of bulk
+   queries, folding the alert into a recent unread entry of the same group
+   where there is one, and bumps the unread counters of new entries only.
+   Deliveries to the same users are serialised on their counter rows.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from accounts.models import FootballerProfile, User, UserRelationship
+from clubs.models import Club
+from core.jobs import enqueue, enqueue_many
+from matches.models import MatchEvent
+from .models import Favourite, Notification, UnreadCounter
+
+NOTIFICATIONS_CHUNK_SIZE = getattr(settings, 'NOTIFICATIONS_CHUNK_SIZE', 1000)
+# Alerts of the same group within this many seconds share one inbox entry.
+NOTIFICATIONS_COALESCE_WINDOW = getattr(settings, 'NOTIFICATIONS_COALESCE_WINDOW', 300)
+# Deliver jobs inserted per query by fan_out.
+ENQUEUE_BATCH = 100
+# Match events that alert followers, and the alert kind each becomes.
+ALERTED_EVENTS = {
+    MatchEvent.GOAL: Notification.GOAL,
+    MatchEvent.OWN_GOAL: Notification.GOAL,
+    MatchEvent.KICKOFF: Notification.KICKOFF,
+    MatchEvent.FULL_TIME: Notification.FULL_TIME,
+}
+
+
+def recipients(clubs=(), leagues=(), users=(), followers_of=()):
+    """
+    Distinct ids of the users an alert reaches: fans of `clubs` and
+    `leagues`, the clubs' players (footballer profiles naming the club) and
+    their followers, `users` themselves and the followers of `followers_of`.
+    """
+    ids = []
+    if clubs or leagues:
+        ids.append(Favourite.objects.filter(Q(club__in=clubs) | Q(league__in=leagues)).values_list('user_id'))
+    if clubs:
+        named = Q()
+        for name, slug in Club.objects.filter(pk__in=clubs).values_list('name', 'slug'):
+            named |= Q(club__iexact=name) | Q(club__iexact=slug)
+        players = FootballerProfile.objects.filter(named).values('user_id')
+        ids.append(players.values_list('user_id'))
+        followers_of = [*followers_of, *players.values_list('user_id', flat=True)]
+    if followers_of:
+        ids.append(UserRelationship.objects.filter(following__in=followers_of).values_list('follower_id'))
+    if users:
+        ids.append(User.objects.filter(pk__in=users).values_list('pk'))
+    if not ids:
+        return User.objects.none().values_list('pk')
+    # UNION removes duplicates in the database, so a fan who also follows
+    # the scorer gets one alert.
+    first, *rest = [queryset.order_by() for queryset in ids]
+    return first.union(*rest) if rest else first.distinct()
+
+
+def fan_out(kind, group, payload, audience):
+    """Queue `deliver` jobs for everyone in `audience` (keyword arguments of `recipients`)."""
+    chunks, chunk = [], []
+    for row in recipients(**audience).iterator(chunk_size=NOTIFICATIONS_CHUNK_SIZE):
+        chunk.append(row[0])
+        if len(chunk) >= NOTIFICATIONS_CHUNK_SIZE:
+            chunks.append((kind, group, payload, chunk))
+            chunk = []
+            if len(chunks) >= ENQUEUE_BATCH:
+                enqueue_many(deliver, chunks)
+                chunks = []
+    if chunk:
+        chunks.append((kind, group, payload, chunk))
+    if chunks:
+        enqueue_many(deliver, chunks)
+
+
+def deliver(kind, group, payload, user_ids):
+    now = timezone.now()
+    with transaction.atomic():
+        # Skip users deleted since the recipients were resolved.
+        user_ids = list(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        # Deliveries to the same users take turns, so back-to-back alerts of
+        # one group find each other's open entry instead of both adding one.
+        lock_counters(user_ids)
+        # Oldest first, so a user's newest open entry wins.
+        open_entries = dict(
+            Notification.objects
+            .filter(user_id__in=user_ids, group=group, read_at__isnull=True,
+                    created_at__gte=now - timedelta(seconds=NOTIFICATIONS_COALESCE_WINDOW))
+            .order_by('id').values_list('user_id', 'id')
+        )
+        if open_entries:
+            Notification.objects.filter(pk__in=open_entries.values()).update(
+                kind=kind, payload=payload, count=F('count') + 1, updated_at=now,
+            )
+        new = [pk for pk in user_ids if pk not in open_entries]
+        Notification.objects.bulk_create(
+            [Notification(user_id=user_id, kind=kind, group=group, payload=payload) for user_id in new],
+            batch_size=NOTIFICATIONS_CHUNK_SIZE,
+        )
+        add_unread(new, 1)
+    return len(new), len(open_entries)
+
+
+def lock_counters(user_ids):
+    """Create the users' unread counters where missing and lock them, in a consistent order."""
+    user_ids = sorted(user_ids)
+    UnreadCounter.objects.bulk_create([UnreadCounter(user_id=pk) for pk in user_ids], ignore_conflicts=True)
+    list(UnreadCounter.objects.select_for_update().filter(user_id__in=user_ids)
+         .order_by('user_id').values_list('pk', flat=True))
+
+
+def add_unread(user_ids, amount):
+    if not user_ids:
+        return
+    UnreadCounter.objects.bulk_create([UnreadCounter(user_id=pk) for pk in user_ids], ignore_conflicts=True)
+    UnreadCounter.objects.filter(user_id__in=user_ids).update(unread=Greatest(F('unread') + amount, 0))
+
+
+def unread_count(user):
+    return UnreadCounter.objects.filter(user=user).values_list('unread', flat=True).first() or 0
+
+
+def mark_read(user, ids=None):
+    """Mark the user's unread entries (all, or those in `ids`) read; returns how many changed."""
+    with transaction.atomic():
+        unread = Notification.objects.filter(user=user, read_at__isnull=True)
+        if ids is not None:
+            unread = unread.filter(pk__in=ids)
+        count = unread.update(read_at=timezone.now())
+        if count:
+            add_unread([user.pk], -count)
+    return count
+
+
+def alert_match_event(event_id, home_score, away_score):
+    """
+    Goal, kick-off and final score alerts for both clubs' and the league's
+    followers, with the score as it stood after the event.
+    """
+    event = (
+        MatchEvent.objects
+        .select_related('match__home_club', 'match__away_club', 'club')
+        .filter(pk=event_id).first()
+    )
+    if event is None:
+        return
+    match = event.match
+    kind = ALERTED_EVENTS[event.kind]
+    payload = {
+        'match': match.pk,
+        'home_club': match.home_club.slug,
+        'away_club': match.away_club.slug,
+        'home_score': home_score,
+        'away_score': away_score,
+        'minute': event.minute,
+        'club': event.club.slug if event.club else None,
+    }
+    # The final score gets its own entry; goals fold into the live one.
+    group = f'match:{match.pk}:result' if kind == Notification.FULL_TIME else f'match:{match.pk}'
+    fan_out(kind, group, payload, {
+        'clubs': [match.home_club_id, match.away_club_id],
+        'leagues': [match.league_id],
+    })
+
+
+def alert_new_follower(follower_id, following_id):
+    deliver(Notification.FOLLOW, f'followers:{following_id}', {'follower': follower_id}, [following_id])
+
+
+def queue_match_event_alert(event):
+    # The job may run after later goals; it reports the score of this event.
+    if event.kind in ALERTED_EVENTS:
+        enqueue(alert_match_event, event.pk, event.match.home_score, event.match.away_score)
+
+
+def queue_follower_alert(relationship):
+    enqueue(alert_new_follower, relationship.follower_id, relationship.following_id)
+
+
+def queue_follower_alerts(follower_id, following_ids):
+    enqueue_many(alert_new_follower, [(follower_id, following_id) for following_id in following_ids])
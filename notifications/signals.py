@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from accounts.managers import follows_created
+from accounts.models import UserRelationship
+from matches.models import MatchEvent
+from .services import queue_follower_alert, queue_follower_alerts, queue_match_event_alert
+
+@receiver(post_save, sender=MatchEvent)
+def alert_match_event(sender, instance, created, **kwargs):
+    if created:
+        queue_match_event_alert(instance)
+
+@receiver(post_save, sender=UserRelationship)
+def alert_new_follower(sender, instance, created, **kwargs):
+    if created:
+        queue_follower_alert(instance)
+
+@receiver(follows_created, sender=UserRelationship)
+def alert_new_followers(sender, follower_id, following_ids, **kwargs):
+    queue_follower_alerts(follower_id, following_ids)
@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User, UserRelationship
+from clubs.models import Club
+from leagues.models import League
+from matches.models import Match, MatchEvent
+from matches.services import record_event
+from . import services
+from .models import Favourite, Notification
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], JOBS_EAGER=True)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Premier', short_name='PL', country='KE')
+        cls.home = Club.objects.create(name='Gor Mahia', full_name='Gor Mahia FC', short_name='GOR', league=cls.league)
+        cls.away = Club.objects.create(name='AFC Leopards', full_name='AFC Leopards', short_name='AFC', league=cls.league)
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.fan, cls.league_fan, cls.player_fan, cls.bystander = (
+                User.objects.create_user(name, f'+25474000000{i}', f'{name}@example.com', 'pw')
+                for i, name in enumerate(['fan', 'league_fan', 'player_fan', 'bystander'])
+            )
+            cls.player = User.objects.create_user('player', '+254740000009', 'player@example.com', 'pw',
+                                                  user_type=User.FOOTBALLER, is_verified=True)
+        profile = cls.player.footballerprofile
+        profile.club = 'gor mahia'
+        profile.save()
+        Favourite.objects.create(user=cls.fan, club=cls.home)
+        Favourite.objects.create(user=cls.player_fan, club=cls.away)
+        Favourite.objects.create(user=cls.league_fan, league=cls.league)
+        UserRelationship.objects.bulk_create([UserRelationship(follower=cls.player_fan, following=cls.player)])
+        cls.match = Match.objects.create(league=cls.league, season='2026/27', home_club=cls.home,
+                                         away_club=cls.away, kickoff=datetime(2026, 10, 18, 15, tzinfo=timezone.utc))
+
+    def event(self, kind, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_event(self.match, kind, **kwargs)
+
+    def test_recipients_are_distinct(self):
+        ids = [row[0] for row in services.recipients(clubs=[self.home.pk, self.away.pk], leagues=[self.league.pk])]
+        self.assertCountEqual(ids, [self.fan.pk, self.league_fan.pk, self.player_fan.pk, self.player.pk])
+
+    def test_match_alerts_reach_fans_and_coalesce(self):
+        with mock.patch.object(services, 'NOTIFICATIONS_CHUNK_SIZE', 2):
+            self.event(MatchEvent.KICKOFF, minute=0)
+            self.event(MatchEvent.GOAL, minute=10, club=self.home)
+            self.event(MatchEvent.FULL_TIME, minute=90)
+
+        self.assertFalse(self.bystander.notifications.exists())
+        for user in (self.fan, self.league_fan, self.player_fan, self.player):
+            live, result = user.notifications.order_by('id')
+            self.assertEqual((live.kind, live.count, live.payload['home_score']), (Notification.GOAL, 2, 1))
+            self.assertEqual((result.kind, result.count), (Notification.FULL_TIME, 1))
+            self.assertEqual(services.unread_count(user), 2)
+
+    def test_read_entries_are_not_coalesced_into(self):
+        self.event(MatchEvent.GOAL, minute=10, club=self.home)
+        services.mark_read(self.fan)
+        self.event(MatchEvent.GOAL, minute=20, club=self.home)
+        self.assertEqual(list(self.fan.notifications.values_list('count', flat=True)), [1, 1])
+        self.assertEqual(services.unread_count(self.fan), 1)
+
+    def test_new_followers_are_alerted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRelationship.objects.create(follower=self.fan, following=self.player)
+            UserRelationship.objects.create(follower=self.bystander, following=self.player)
+        entry = self.player.notifications.get()
+        self.assertEqual((entry.kind, entry.count, entry.payload), (Notification.FOLLOW, 2, {'follower': self.bystander.pk}))
+
+    def test_bulk_follows_are_alerted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRelationship.objects.bulk_follow(self.fan, [self.player.pk, self.bystander.pk])
+        for user in (self.player, self.bystander):
+            entry = user.notifications.get()
+            self.assertEqual((entry.kind, entry.payload), (Notification.FOLLOW, {'follower': self.fan.pk}))
+
+    def test_match_alerts_carry_the_score_of_their_event(self):
+        with mock.patch.object(services, 'fan_out', wraps=services.fan_out) as fan_out:
+            # Both alert jobs run after the second goal has been recorded.
+            with self.captureOnCommitCallbacks(execute=True):
+                record_event(self.match, MatchEvent.GOAL, minute=10, club=self.home)
+                record_event(self.match, MatchEvent.GOAL, minute=12, club=self.away)
+        scores = [(call.args[2]['home_score'], call.args[2]['away_score']) for call in fan_out.call_args_list]
+        self.assertEqual(scores, [(1, 0), (1, 1)])
+
+    def test_inbox_api(self):
+        self.event(MatchEvent.GOAL, minute=10, club=self.home)
+        self.event(MatchEvent.FULL_TIME, minute=90)
+        client = APIClient()
+        self.assertEqual(client.get('/notifications/').status_code, 401)
+        client.force_authenticate(self.fan)
+
+        page = client.get('/notifications/', {'page_size': 1}).json()
+        self.assertEqual([entry['kind'] for entry in page['results']], [Notification.FULL_TIME])
+        self.assertEqual(len(client.get(page['next']).json()['results']), 1)
+        self.assertEqual(client.get('/notifications/unread-count/').json(), {'unread': 2})
+
+        response = client.post('/notifications/read/', {'ids': [page['results'][0]['id']]}, format='json')
+        self.assertEqual(response.json(), {'marked': 1, 'unread': 1})
+        self.assertEqual(len(client.get('/notifications/', {'unread': 1}).json()['results']), 1)
+        self.assertEqual(len(client.get('/notifications/', {'unread': 'false'}).json()['results']), 2)
+        self.assertEqual(len(client.get('/notifications/', {'unread': 0}).json()['results']), 2)
+        self.assertEqual(client.get('/notifications/', {'unread': 'maybe'}).status_code, 400)
+        self.assertEqual(client.post('/notifications/read/', {}, format='json').json(), {'marked': 1, 'unread': 0})
+
+    def test_favourites_api(self):
+        client = APIClient()
+        client.force_authenticate(self.bystander)
+        self.assertEqual(client.post('/notifications/favourites/', {'club': self.home.slug}).status_code, 201)
+        self.assertEqual(client.post('/notifications/favourites/', {'club': self.home.slug}).status_code, 400)
+        self.assertEqual(client.post('/notifications/favourites/', {}).status_code, 400)
+        self.assertEqual([f['club'] for f in client.get('/notifications/favourites/').json()], [self.home.slug])
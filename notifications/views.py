@@ -0,0 +1,49 @@
+from rest_framework import mixins, permissions, serializers, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .models import Favourite, Notification
+from .pagination import InboxCursorPagination
+from .serializers import FavouriteSerializer, MarkReadSerializer, NotificationSerializer
+from .services import mark_read, unread_count
+
+class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """The requesting user's inbox."""
+    queryset = Notification.objects.all()
+    serializer_class = NotificationSerializer
+    pagination_class = InboxCursorPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = self.queryset.filter(user=self.request.user)
+        unread = self.request.query_params.get('unread')
+        # ?unread=1/true filters to unread entries; 0/false lists everything.
+        if unread is not None and serializers.BooleanField().to_internal_value(unread):
+            queryset = queryset.filter(read_at__isnull=True)
+        return queryset
+
+    @action(detail=False, url_path='unread-count')
+    def unread_count(self, request):
+        return Response({'unread': unread_count(request.user)})
+
+    @action(detail=False, methods=['post'])
+    def read(self, request):
+        """Mark the given `ids`, or every entry when none are given, as read."""
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        marked = mark_read(request.user, serializer.validated_data.get('ids'))
+        return Response({'marked': marked, 'unread': unread_count(request.user)})
+
+class FavouriteViewSet(mixins.CreateModelMixin,
+                       mixins.ListModelMixin,
+                       mixins.DestroyModelMixin,
+                       viewsets.GenericViewSet):
+    queryset = Favourite.objects.all()
+    serializer_class = FavouriteSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user).select_related('club', 'league')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
@@ -0,0 +1,264 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramDistance
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.utils.module_loading import import_string
+
+from .sources import SOURCES, normalize, tokenize
+
+# Upper bound on index entries scanned per query token and label length,
+# so one-letter prefixes over millions of documents stay cheap.
+MAX_CANDIDATES = 5000
+# Signals only reach the index of the process that made the change; other
+# processes rebuild theirs after this many seconds.
+SEARCH_INDEX_MAX_AGE = getattr(settings, 'SEARCH_INDEX_MAX_AGE', 300)
+
+
+class PrefixIndex:
+    """
+    In-process prefix index for one source. Documents are bucketed by the
+    length of their normalized label, and each bucket keeps its labels and
+    its (token, doc_id) pairs sorted, so label and token prefixes are bisect
+    ranges that can be visited in ranking order: labels starting with the
+    query first, then shorter labels, then alphabetically.
+    """
+
+    def __init__(self):
+        # label length -> ([(label, doc_id)], [(token, doc_id)]), both sorted
+        self.buckets = {}
+        self.docs = {}
+        self.lock = threading.RLock()
+        self.built_at = time.monotonic()
+
+    def add(self, doc_id, texts, result):
+        tokens = {token for text in texts for token in tokenize(text)}
+        label = normalize(result['label'])
+        with self.lock:
+            self.remove(doc_id)
+            labels, terms = self.buckets.setdefault(len(label), ([], []))
+            insort(labels, (label, doc_id))
+            for token in tokens:
+                insort(terms, (token, doc_id))
+            self.docs[doc_id] = (tokens, label, result)
+
+    def bulk_load(self, entries):
+        with self.lock:
+            buckets = {}
+            for doc_id, texts, result in entries:
+                tokens = {token for text in texts for token in tokenize(text)}
+                label = normalize(result['label'])
+                labels, terms = buckets.setdefault(len(label), ([], []))
+                labels.append((label, doc_id))
+                terms.extend((token, doc_id) for token in tokens)
+                self.docs[doc_id] = (tokens, label, result)
+            for labels, terms in buckets.values():
+                labels.sort()
+                terms.sort()
+            self.buckets = buckets
+
+    def remove(self, doc_id):
+        with self.lock:
+            doc = self.docs.pop(doc_id, None)
+            if doc is None:
+                return
+            tokens, label, _ = doc
+            labels, terms = self.buckets[len(label)]
+            for entries, key in [(labels, label), *((terms, token) for token in tokens)]:
+                index = bisect_left(entries, (key, doc_id))
+                if index < len(entries) and entries[index] == (key, doc_id):
+                    del entries[index]
+
+    def matches(self, doc_id, tokens):
+        doc_tokens = self.docs[doc_id][0]
+        return all(any(t.startswith(token) for t in doc_tokens) for token in tokens)
+
+    def search(self, query, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        normalized = normalize(query)
+        # Scan the most selective (longest) token, then check the rest.
+        tokens.sort(key=len, reverse=True)
+        hits = []
+        with self.lock:
+            lengths = sorted(self.buckets)
+            # Labels starting with the query, shortest first.
+            for length in lengths:
+                if length < len(normalized):
+                    continue
+                labels = self.buckets[length][0]
+                index = bisect_left(labels, (normalized,))
+                while len(hits) < limit and index < len(labels) and labels[index][0].startswith(normalized):
+                    doc_id = labels[index][1]
+                    if self.matches(doc_id, tokens):
+                        hits.append(doc_id)
+                    index += 1
+            # Then labels with a token starting with each query token. A
+            # bucket with more than MAX_CANDIDATES such tokens may miss
+            # alphabetical ties, never a shorter label.
+            for length in lengths:
+                if len(hits) >= limit:
+                    break
+                terms = self.buckets[length][1]
+                start = index = bisect_left(terms, (tokens[0],))
+                found = set()
+                while index < len(terms) and index - start < MAX_CANDIDATES and terms[index][0].startswith(tokens[0]):
+                    found.add(terms[index][1])
+                    index += 1
+                ranked = sorted(
+                    (self.docs[doc_id][1], doc_id) for doc_id in found
+                    if not self.docs[doc_id][1].startswith(normalized) and self.matches(doc_id, tokens[1:])
+                )
+                hits.extend(doc_id for _, doc_id in ranked[:limit - len(hits)])
+            return [self.docs[doc_id][2] for doc_id in hits]
+
+
+class PrefixIndexBackend:
+    """
+    Search backend for databases without trigram/full-text support. Each
+    process builds the index on first use, and the search signals keep it
+    current. Once it is older than SEARCH_INDEX_MAX_AGE, searches keep
+    using it while a background thread builds its replacement.
+    """
+
+    def __init__(self):
+        self.indexes = {}
+        self.lock = threading.Lock()
+        # source name -> keys changed while its replacement is being built
+        self.rebuilding = {}
+
+    def index(self, source):
+        index = self.indexes.get(source.name)
+        if index is None:
+            with self.lock:
+                if source.name not in self.indexes:
+                    self.indexes[source.name] = self.build(source)
+                return self.indexes[source.name]
+        if time.monotonic() - index.built_at >= SEARCH_INDEX_MAX_AGE and source.name not in self.rebuilding:
+            self.schedule_rebuild(source)
+        return index
+
+    def build(self, source):
+        index = PrefixIndex()
+        index.bulk_load(
+            (row[source.key], source.texts(row), source.result(row))
+            for row in source.rows().iterator(chunk_size=5000)
+        )
+        return index
+
+    def schedule_rebuild(self, source):
+        with self.lock:
+            if source.name in self.rebuilding:
+                return
+            self.rebuilding[source.name] = set()
+        threading.Thread(target=self.rebuild_in_thread, args=(source,),
+                         name=f'search-index-{source.name}', daemon=True).start()
+
+    def rebuild_in_thread(self, source):
+        try:
+            self.rebuild(source)
+        finally:
+            # The thread's own database connection.
+            connection.close()
+
+    def rebuild(self, source):
+        try:
+            index = self.build(source)
+        except Exception:
+            with self.lock:
+                self.rebuilding.pop(source.name, None)
+            raise
+        with self.lock:
+            self.indexes[source.name] = index
+            changed = self.rebuilding.pop(source.name, set())
+        # Rows read by the build before a change committed are re-read.
+        for key in changed:
+            self.update(source, key)
+
+    def search(self, query, sources, limit):
+        return {source.name: self.index(source).search(query, limit) for source in sources}
+
+    def update(self, source, key):
+        if source.name not in self.indexes:
+            return
+        if source.name in self.rebuilding:
+            self.rebuilding[source.name].add(key)
+        index = self.indexes[source.name]
+        row = source.rows(source.model._default_manager.filter(**{source.key: key})).first()
+        if row is None:
+            index.remove(key)
+        else:
+            index.add(key, source.texts(row), source.result(row))
+
+    def remove(self, source, key):
+        if source.name not in self.indexes:
+            return
+        if source.name in self.rebuilding:
+            self.rebuilding[source.name].add(key)
+        self.indexes[source.name].remove(key)
+
+
+class PostgresBackend:
+    """
+    Queries the source tables directly. `manage.py create_search_indexes`
+    adds trigram GiST indexes on the searched columns, which serve both the
+    ILIKE '%query%' filter and the nearest-first `<->` ordering, so each
+    field is one index scan that stops after `limit` rows. Closer matches
+    (the query as a word prefix, in a short label) come first; the fields'
+    hits are merged with prefix matches ranked first, as in PrefixIndex.
+    """
+
+    def search(self, query, sources, limit):
+        query = query.strip()
+        if not query:
+            return {source.name: [] for source in sources}
+        return {source.name: self.search_source(source, query, limit) for source in sources}
+
+    def search_source(self, source, query, limit):
+        rows = {}
+        for field in source.fields:
+            nearest = (
+                source.rows(source.model._default_manager.filter(Q(**{f'{field}__icontains': query})))
+                .annotate(distance=TrigramDistance(Upper(field), query.upper()))
+                .order_by('distance')[:limit]
+            )
+            for row in nearest:
+                rows.setdefault(row[source.key], row)
+        normalized = normalize(query)
+        results = [source.result(row) for row in rows.values()]
+        results.sort(key=lambda result: (
+            not normalize(result['label']).startswith(normalized), len(result['label']), result['label'],
+        ))
+        return results[:limit]
+
+    def update(self, source, key):
+        pass
+
+    def remove(self, source, key):
+        pass
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'postgresql':
+            _backend = PostgresBackend()
+        else:
+            _backend = PrefixIndexBackend()
+    return _backend
+
+
+def search(query, types=None, limit=10):
+    sources = [SOURCES[name] for name in (types or SOURCES) if name in SOURCES]
+    return get_backend().search(query, sources, limit)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from search.sources import SOURCES
+
+
+class Command(BaseCommand):
+    help = "Create the pg_trgm GiST indexes behind the Postgres search backend"
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Trigram indexes need PostgreSQL; other databases use the in-process index")
+
+        columns = set()
+        for source in SOURCES.values():
+            for path in source.fields:
+                model = source.model
+                *relations, field_name = path.split('__')
+                for relation in relations:
+                    model = model._meta.get_field(relation).related_model
+                columns.add((model._meta.db_table, model._meta.get_field(field_name).column))
+
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for table, column in sorted(columns):
+                name = f'{table}_{column}_trgm_gist'[:63]
+                # Matches the UPPER(col::text) LIKE UPPER(...) that icontains
+                # emits and the backend's UPPER(col) <-> ordering; GiST, unlike
+                # GIN, can return rows nearest first.
+                cursor.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+                    f'ON "{table}" USING gist ((UPPER("{column}"::text)) gist_trgm_ops)'
+                )
+                self.stdout.write(f"{name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(columns)} trigram index(es) in place"))
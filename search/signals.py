@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import User, FootballerProfile
+from clubs.models import Club
+from leagues.models import League
+from .backends import get_backend
+from .sources import SOURCES
+
+SOURCE_KEYS = {
+    User: [('users', 'pk'), ('players', 'pk')],
+    FootballerProfile: [('players', 'user_id')],
+    League: [('leagues', 'pk')],
+    Club: [('clubs', 'pk')],
+}
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=FootballerProfile)
+@receiver(post_save, sender=League)
+@receiver(post_save, sender=Club)
+def update_search_index(sender, instance, **kwargs):
+    backend = get_backend()
+    for name, attr in SOURCE_KEYS[sender]:
+        source, key = SOURCES[name], getattr(instance, attr)
+        # Re-read the row once committed, so a rollback can't leave it indexed.
+        transaction.on_commit(lambda source=source, key=key: backend.update(source, key))
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=FootballerProfile)
+@receiver(post_delete, sender=League)
+@receiver(post_delete, sender=Club)
+def remove_from_search_index(sender, instance, **kwargs):
+    backend = get_backend()
+    for name, attr in SOURCE_KEYS[sender]:
+        source, key = SOURCES[name], getattr(instance, attr)
+        transaction.on_commit(lambda source=source, key=key: backend.remove(source, key))
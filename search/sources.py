@@ -0,0 +1,64 @@
+import re
+import unicodedata
+
+from django.apps import apps
+
+
+def normalize(text):
+    """Lower-case and strip accents so "Atlético" matches "atletico"."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    return [token for token in re.split(r'[^\w]+', normalize(text)) if token]
+
+
+class Source:
+    """
+    A searchable kind of object: which model rows to read, which fields to
+    match against, and how to label a hit.
+    """
+
+    def __init__(self, name, model, fields, label, key='pk', extra=()):
+        self.name = name
+        self.model_label = model
+        self.fields = list(fields)
+        self.label = label
+        self.key = key
+        self.extra = list(extra)
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def rows(self, queryset=None):
+        queryset = self.model._default_manager.all() if queryset is None else queryset
+        return queryset.order_by().values(self.key, *self.fields, *self.extra)
+
+    def texts(self, row):
+        return [row[field] for field in self.fields if row[field]]
+
+    def result(self, row):
+        result = {'type': self.name, 'id': row[self.key], 'label': self.label(row)}
+        result.update({field: row[field] for field in self.extra})
+        return result
+
+
+def _player_label(row):
+    name = ' '.join(part for part in (row['user__firstname'], row['user__lastname']) if part)
+    return name or row['user__username']
+
+
+SOURCES = {
+    source.name: source for source in [
+        Source('users', 'accounts.User', ['username'], label=lambda row: row['username']),
+        Source('players', 'accounts.FootballerProfile',
+               ['user__firstname', 'user__lastname', 'user__username'],
+               label=_player_label, key='user_id'),
+        Source('leagues', 'leagues.League', ['name', 'short_name'],
+               label=lambda row: row['name'], extra=['slug']),
+        Source('clubs', 'clubs.Club', ['name', 'short_name', 'full_name'],
+               label=lambda row: row['name'], extra=['slug']),
+    ]
+}
@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from clubs.models import Club
+from core import response_cache
+from leagues.models import League
+from . import backends
+from .backends import PrefixIndex, PrefixIndexBackend
+from .sources import SOURCES
+
+
+def labels(results):
+    return [result['label'] for result in results]
+
+
+class PrefixIndexTests(SimpleTestCase):
+
+    def index(self, *names):
+        index = PrefixIndex()
+        index.bulk_load((f'd{i}', [name], {'label': name}) for i, name in enumerate(names))
+        return index
+
+    def test_label_prefixes_rank_first_then_shorter_labels(self):
+        index = self.index('Atlético Madrid', 'Madrid FC', 'Real Madrid', 'Madridista Youth', 'Gor Mahia')
+        self.assertEqual(labels(index.search('mad', 10)),
+                         ['Madrid FC', 'Madridista Youth', 'Real Madrid', 'Atlético Madrid'])
+        self.assertEqual(labels(index.search('atletico ma', 10)), ['Atlético Madrid'])
+        self.assertEqual(labels(index.search('real ma', 10)), ['Real Madrid'])
+        self.assertEqual(labels(index.search('mad', 2)), ['Madrid FC', 'Madridista Youth'])
+        self.assertEqual(index.search('  ', 10), [])
+
+    def test_candidate_cap_does_not_drop_better_matches(self):
+        index = self.index(*[f'Maa Long Club Name {i:03}' for i in range(20)], 'Mz', 'Real Mb')
+        with mock.patch.object(backends, 'MAX_CANDIDATES', 5):
+            self.assertEqual(labels(index.search('m', 2)), ['Mz', 'Maa Long Club Name 000'])
+            self.assertEqual(labels(index.search('mb', 2)), ['Real Mb'])
+
+    def test_add_and_remove_keep_buckets_current(self):
+        index = self.index('Gor Mahia', 'AFC Leopards')
+        index.add('d0', ['Gor Mahia Youth'], {'label': 'Gor Mahia Youth'})
+        self.assertEqual(labels(index.search('gor', 10)), ['Gor Mahia Youth'])
+        index.remove('d0')
+        index.remove('missing')
+        self.assertEqual(index.search('gor', 10), [])
+        self.assertEqual(labels(index.search('leo', 10)), ['AFC Leopards'])
+
+
+class PrefixIndexBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Premier', short_name='PL', country='KE')
+
+    def setUp(self):
+        self.backend = PrefixIndexBackend()
+        self.source = SOURCES['leagues']
+
+    def search(self, query):
+        return labels(self.backend.search(query, [self.source], 10)['leagues'])
+
+    def test_stale_index_is_served_while_rebuilt_in_the_background(self):
+        self.assertEqual(self.search('prem'), ['Premier'])
+        League.objects.create(name='Premier Cup', short_name='PC', country='KE')
+        self.backend.indexes['leagues'].built_at -= backends.SEARCH_INDEX_MAX_AGE
+        with mock.patch.object(backends.threading, 'Thread') as thread:
+            self.assertEqual(self.search('prem'), ['Premier'])
+            self.assertEqual(self.search('prem'), ['Premier'])
+        thread.assert_called_once()
+        self.assertEqual(thread.call_args.kwargs['target'], self.backend.rebuild_in_thread)
+
+        self.backend.rebuild(self.source)
+        self.assertEqual(self.search('prem'), ['Premier', 'Premier Cup'])
+        self.assertEqual(self.backend.rebuilding, {})
+
+    def test_changes_during_a_rebuild_are_replayed(self):
+        self.search('prem')
+        self.backend.rebuilding['leagues'] = set()
+        build = self.backend.build
+
+        def build_then_rename(source):
+            index = build(source)
+            League.objects.filter(pk=self.league.pk).update(name='Super League')
+            self.backend.update(source, self.league.pk)
+            return index
+
+        with mock.patch.object(self.backend, 'build', build_then_rename):
+            self.backend.rebuild(self.source)
+        self.assertEqual(self.search('super'), ['Super League'])
+        self.assertEqual(self.search('prem'), [])
+
+
+class SearchApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Premier', short_name='PL', country='KE')
+        Club.objects.create(name='Gor Mahia', full_name='Gor Mahia FC', short_name='GOR', league=cls.league)
+
+    def setUp(self):
+        cache.clear()
+        response_cache.cache().clear()
+        patcher = mock.patch.object(backends, '_backend', PrefixIndexBackend())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_typeahead_over_types_follows_saves(self):
+        response = self.client.get('/search/', {'q': 'gor', 'types': 'clubs,leagues'})
+        self.assertEqual(response.json()['results'], {
+            'clubs': [{'type': 'clubs', 'id': Club.objects.get().pk, 'label': 'Gor Mahia', 'slug': 'gor-mahia'}],
+            'leagues': [],
+        })
+        with self.captureOnCommitCallbacks(execute=True):
+            Club.objects.create(name='Gorilla FC', full_name='Gorilla FC', short_name='GFC', league=self.league)
+        response = self.client.get('/search/', {'q': 'gor', 'types': 'clubs', 'limit': '1'})
+        self.assertEqual(labels(response.json()['results']['clubs']), ['Gor Mahia'])
+        response = self.client.get('/search/', {'q': 'gori', 'types': 'clubs'})
+        self.assertEqual(labels(response.json()['results']['clubs']), ['Gorilla FC'])
@@ -0,0 +1,26 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.response_cache import ResponseCacheMixin
+from .backends import search
+from .sources import SOURCES
+
+class SearchView(ResponseCacheMixin, APIView):
+    """
+    Typeahead search over users, players, leagues and clubs.
+
+    ?q=<text>&types=clubs,leagues&limit=10
+    """
+    permission_classes = [permissions.AllowAny]
+    max_limit = 50
+    response_cache_namespaces = ('leagues', 'clubs', 'profiles')
+
+    def get(self, request):
+        return self.cached_response(request, self.search)
+
+    def search(self, request):
+        query = request.query_params.get('q', '')[:100]
+        types = [name for name in request.query_params.get('types', '').split(',') if name in SOURCES]
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), self.max_limit) if limit.isdigit() and int(limit) else 10
+        return Response({'query': query, 'results': search(query, types or None, limit)})